@@ -12,6 +12,8 @@ from prompt_toolkit.shortcuts import confirm
 from prompt_toolkit.styles import Style
 from prompt_toolkit.formatted_text import HTML
 from colorama import Fore, Back, Style as ColoramaStyle, init
+from app.services.deploy_queue import DeploymentQueue
+from app.services.runner_client import RunnerClient, RunnerError
 
 # Initialize colorama
 init(autoreset=True)
@@ -71,6 +73,33 @@ class AdminManager(DatabaseManager):
             'dialog.body': 'bg:#000000 #00ff00',
             'dialog shadow': 'bg:#00aa00',
         })
+        # Sites are started and stopped by the site runner daemon
+        runner_socket = os.getenv("SITE_RUNNER_SOCKET")
+        self.runner = RunnerClient(runner_socket) if runner_socket else None
+
+    def stop_sites(self, ports: List[int]) -> bool:
+        """Stop the sites on ports through the site runner; False if they may still be serving"""
+        if not ports:
+            return True
+        if self.runner is None:
+            print(f"{Fore.YELLOW}SITE_RUNNER_SOCKET is not set: sites on ports {ports} may still be serving{Fore.RESET}")
+            return False
+        try:
+            self.runner.stop(ports)
+            return True
+        except RunnerError as e:
+            print(f"{Fore.RED}Could not stop sites on ports {ports}: {str(e)}{Fore.RESET}")
+            return False
+
+    def live_status(self, ports: List[int]) -> Dict[int, Dict]:
+        """Serving state of every port in one site runner request (empty without the runner)"""
+        if self.runner is None or not ports:
+            return {}
+        try:
+            return self.runner.bulk_status(ports)
+        except RunnerError as e:
+            print(f"{Fore.YELLOW}Site runner unavailable, live status not shown: {str(e)}{Fore.RESET}")
+            return {}
 
     def list_users(self) -> List[Dict]:
         """List all users in the system"""
@@ -122,13 +151,22 @@ class AdminManager(DatabaseManager):
                     print(f"\n{Fore.YELLOW}Deletion cancelled{Fore.RESET}")
                     return False
                 
-                # First delete related data
-                print(f"\n{Fore.YELLOW}Deleting user's websites and reviews...{Fore.RESET}")
-                cursor.execute("DELETE FROM websites WHERE user_id = %s", (user_id,))
-                cursor.execute("DELETE FROM reviews WHERE user_id = %s", (user_id,))
-                
-                # Then delete the user
-                cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+                cursor.execute("SELECT id, port FROM websites WHERE user_id = %s", (user_id,))
+                websites = cursor.fetchall()
+                # Their sites' deploy locks too, as for a single website
+                with DeploymentQueue().site_lock(*(row['id'] for row in websites)):
+                    # Take their sites down before the rows that describe them are gone
+                    if not self.stop_sites([row['port'] for row in websites]) and not confirm("Delete the user anyway?"):
+                        print(f"\n{Fore.YELLOW}Deletion cancelled{Fore.RESET}")
+                        return False
+
+                    # First delete related data
+                    print(f"\n{Fore.YELLOW}Deleting user's websites and reviews...{Fore.RESET}")
+                    cursor.execute("DELETE FROM websites WHERE user_id = %s", (user_id,))
+                    cursor.execute("DELETE FROM reviews WHERE user_id = %s", (user_id,))
+
+                    # Then delete the user
+                    cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
                 print(f"\n{Fore.GREEN}User {user['email']} deleted successfully{Fore.RESET}")
                 return True
         except psycopg2.Error as e:
@@ -172,24 +210,50 @@ class AdminManager(DatabaseManager):
                     print(f"\n{Fore.YELLOW}Deletion cancelled{Fore.RESET}")
                     return False
                 
-                # Try to stop the website process if running
+                # Under the site's deploy lock, as the API deletes it: a running
+                # deployment finishes first, and a queued one can't start it again
                 port = website['port']
                 print(f"\n{Fore.YELLOW}Stopping website on port {port}...{Fore.RESET}")
-                try:
-                    import subprocess
-                    import signal
-                    subprocess.run(["lsof", "-i", f":{port}", "-t"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                except:
-                    pass  # If lsof fails, just continue with deletion
-                
-                # Delete the website
-                cursor.execute("DELETE FROM websites WHERE id = %s", (website_id,))
+                with DeploymentQueue().site_lock(website_id):
+                    # Stop the website's server before deleting its row
+                    if not self.stop_sites([port]) and not confirm("Delete the website anyway?"):
+                        print(f"\n{Fore.YELLOW}Deletion cancelled{Fore.RESET}")
+                        return False
+
+                    # Delete the website
+                    cursor.execute("DELETE FROM websites WHERE id = %s", (website_id,))
                 print(f"\n{Fore.GREEN}Website '{website['name']}' deleted successfully{Fore.RESET}")
                 return True
         except psycopg2.Error as e:
             print(f"\n{Fore.RED}Database error: {str(e)}{Fore.RESET}")
             return False
     
+    def restart_website(self, website_id: int) -> bool:
+        """Restart a website's server through the site runner"""
+        if self.runner is None:
+            print(f"\n{Fore.RED}SITE_RUNNER_SOCKET is not set: cannot reach the site runner{Fore.RESET}")
+            return False
+        try:
+            with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute("SELECT name, port FROM websites WHERE id = %s", (website_id,))
+                website = cursor.fetchone()
+        except psycopg2.Error as e:
+            print(f"\n{Fore.RED}Database error: {str(e)}{Fore.RESET}")
+            return False
+        if not website:
+            print(f"\n{Fore.RED}Website with ID {website_id} not found{Fore.RESET}")
+            return False
+        try:
+            result = self.runner.restart([website['port']])[website['port']]
+        except RunnerError as e:
+            print(f"\n{Fore.RED}Could not restart website: {str(e)}{Fore.RESET}")
+            return False
+        if "error" in result:
+            print(f"\n{Fore.RED}Could not restart website '{website['name']}': {result['error']}{Fore.RESET}")
+            return False
+        print(f"\n{Fore.GREEN}Website '{website['name']}' restarted (pid {result['pid']}){Fore.RESET}")
+        return True
+
     def list_reviews(self) -> List[Dict]:
         """List all reviews in the system"""
         try:
@@ -265,16 +329,25 @@ class AdminManager(DatabaseManager):
             print(f"{Fore.YELLOW}No websites found{Fore.RESET}")
             return
         
-        print(f"\n{Fore.BLUE}{Back.WHITE}{ColoramaStyle.BRIGHT}{'ID':<5} {'Name':<25} {'Git Repo':<30} {'Port':<8} {'Status':<12} {'Owner':<25} {'Created At':<20}{ColoramaStyle.RESET_ALL}")
-        print(f"{Fore.BLUE}{'-' * 130}{Fore.RESET}")
+        live = self.live_status([website['port'] for website in websites])
+        print(f"\n{Fore.BLUE}{Back.WHITE}{ColoramaStyle.BRIGHT}{'ID':<5} {'Name':<25} {'Git Repo':<30} {'Port':<8} {'Status':<12} {'Live':<8} {'Owner':<25} {'Created At':<20}{ColoramaStyle.RESET_ALL}")
+        print(f"{Fore.BLUE}{'-' * 139}{Fore.RESET}")
         for i, website in enumerate(websites):
             bg_color = Fore.BLACK + Back.WHITE if i % 2 == 0 else ""
             status_color = Fore.GREEN if website['status'] == 'running' else (Fore.RED if website['status'] == 'error' else Fore.YELLOW)
+            state = live.get(website['port'])
+            if state is None:
+                serving = '?'
+            elif state['serving']:
+                serving = 'asleep' if state['hibernated'] else 'yes'
+            else:
+                serving = 'no'
             
             print(f"{bg_color}{website['id']:<5} {Fore.CYAN}{website['name'][:25]:<25}{Fore.RESET}{bg_color} "
                   f"{website['git_repo'][:30]:<30} "
                   f"{website['port']:<8} "
                   f"{status_color}{website['status']:<12}{Fore.RESET}{bg_color} "
+                  f"{serving:<8} "
                   f"{website['owner_email'][:25]:<25} "
                   f"{website['created_at'].strftime('%Y-%m-%d %H:%M'):<20}{Fore.RESET}")
         print()
@@ -369,11 +442,12 @@ class AdminManager(DatabaseManager):
             print(f"\n{Fore.MAGENTA}{ColoramaStyle.BRIGHT}Website Management Menu{ColoramaStyle.RESET_ALL}")
             print(f"{Fore.CYAN}1. List all websites")
             print(f"{Fore.CYAN}2. Delete website")
-            print(f"{Fore.CYAN}3. Back to main menu{Fore.RESET}")
+            print(f"{Fore.CYAN}3. Restart website")
+            print(f"{Fore.CYAN}4. Back to main menu{Fore.RESET}")
             
             choice = self.session.prompt(
-                f"\n{Fore.GREEN}Enter your choice (1-3): {Fore.RESET}",
-                completer=WordCompleter(['1', '2', '3']),
+                f"\n{Fore.GREEN}Enter your choice (1-4): {Fore.RESET}",
+                completer=WordCompleter(['1', '2', '3', '4']),
             ).strip()
 
             if choice == '1':
@@ -400,6 +474,16 @@ class AdminManager(DatabaseManager):
                 
                 self.delete_website(website_id)
             elif choice == '3':
+                try:
+                    website_id = int(self.session.prompt(
+                        f"{Fore.GREEN}Enter ID of website to restart: {Fore.RESET}",
+                    ).strip())
+                except ValueError:
+                    print(f"{Fore.RED}Invalid ID. Please enter a number.{Fore.RESET}")
+                    continue
+
+                self.restart_website(website_id)
+            elif choice == '4':
                 return
             else:
                 print(f"{Fore.RED}Invalid choice. Please try again.{Fore.RESET}")
@@ -1,25 +1,36 @@
-from fastapi import Depends, HTTPException, status
+import hashlib
+from functools import lru_cache
+from typing import List, Optional, Set, Type
+from fastapi import Depends, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel, TypeAdapter
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
-from sqlalchemy.orm import Session
-from ..database import SessionLocal, get_db  # Import both SessionLocal and get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import AsyncSessionLocal
 from ..models.user import User
+from ..core.principal_cache import principal_cache
+from ..crud.pagination import next_cursor
 from ..core.security import SECRET_KEY, ALGORITHM
 from ..schemas.token import TokenData
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    """Async session per request; scripts and worker threads use database.SessionLocal"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 async def get_current_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
+    # A cached principal was validated when it was stored and expires with its token
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
+    generation = principal_cache.generation
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -34,9 +45,13 @@ async def get_current_user(
     except jwt.JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    result = await db.execute(select(User).where(User.email == token_data.email))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
+    # Detach it: the instance is shared by later requests with other sessions
+    db.expunge(user)
+    principal_cache.put(token, user, payload.get("exp"), generation)
     return user
 
 async def get_current_admin(
@@ -47,4 +62,62 @@ async def get_current_admin(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin privileges required"
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+def set_next_cursor(response: Response, rows: List, limit: int):
+    """Advertise the cursor of the following page of a list response, if there is one"""
+    cursor = next_cursor(rows, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+
+def conditional_get(request: Request, response: Response, version: tuple, private: bool = True) -> Optional[Response]:
+    """
+    Tag a list response with an ETag made of the collection version and the
+    request URL (so paging and fields vary it). Returns the 304 Not Modified
+    to send instead when If-None-Match already names it.
+    """
+    digest = hashlib.sha1(f"{request.url.path}?{request.url.query}|{version!r}".encode()).hexdigest()
+    etag = f'W/"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache" if private else "no-cache"}
+    if private:
+        headers["Vary"] = "Authorization"
+    # Weak comparison: the W/ prefix is ignored on both sides
+    candidates = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+    if "*" in candidates or etag.removeprefix("W/") in candidates:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+def sparse_fieldset(schema: Type[BaseModel]):
+    """Dependency reading ?fields=a,b,c: the subset of schema's fields a list response should carry"""
+    def dependency(
+        fields: Optional[str] = Query(
+            None, description=f"Comma-separated fields to return, of: {', '.join(schema.model_fields)}"
+        )
+    ) -> Optional[Set[str]]:
+        if not fields:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - schema.model_fields.keys()
+        if unknown or not requested:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}" if unknown else "No fields requested"
+            )
+        return requested
+    return dependency
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+def project(response: Response, rows: List, schema: Type[BaseModel], fields: Optional[Set[str]]):
+    """rows as the response body, reduced to fields when a sparse fieldset was requested"""
+    if fields is None:
+        return rows
+    # Encoded by pydantic-core straight to bytes, as FastAPI does for response models
+    adapter = _list_adapter(schema)
+    content = adapter.dump_json(adapter.validate_python(rows, from_attributes=True), include={"__all__": fields})
+    # Returning a response directly drops headers set on the injected one (X-Next-Cursor)
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -1,27 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..deps import get_db
-from ...core.security import create_access_token, verify_password
+from ...core.security import create_access_token, verify_password_async
 from ...crud.user import get_user_by_email
 from ...schemas.token import Token
 
 router = APIRouter(tags=["authentication"])
 
 @router.post("/token", response_model=Token)
-def login_for_access_token(
-    db: Session = Depends(get_db),
+async def login_for_access_token(
+    db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """Generate access token for user authentication"""
-    user = get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await get_user_by_email(db, email=form_data.username)
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_password_async(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # The stored hash predates the current bcrypt settings: upgrade it while we know the password
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     # Create token with user's email as the subject ("sub")
     access_token = create_access_token(data={"sub": user.email})
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from ..deps import get_db, get_current_user, get_current_admin
+from ...core.query_budget import query_budget
+from ...models.user import User as DBUser
+from ...schemas.deployment import Deployment as DeploymentSchema, DeploymentStatus
+from ...crud.deployment import (
+    get_deployment,
+    get_deployments_by_website,
+    get_all_deployments
+)
+from ...crud.website import get_website
+from ...core.metrics import metrics
+
+router = APIRouter(tags=["deployments"])
+admin_router = APIRouter(prefix="/admin", tags=["admin"])
+
+@router.get(
+    "/websites/{website_id}/deployments",
+    response_model=List[DeploymentSchema],
+    responses={404: {"description": "Website not found"}}
+)
+@query_budget(3)
+async def read_website_deployments(
+    website_id: int,
+    skip: int = 0,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_user)
+):
+    """Get the most recent deployment jobs of a website"""
+    db_website = await get_website(db, website_id)
+    if not db_website or (db_website.user_id != current_user.id and not current_user.is_admin):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
+    return await get_deployments_by_website(db, website_id, skip=skip, limit=limit)
+
+@router.get(
+    "/deployments/{deployment_id}",
+    response_model=DeploymentSchema,
+    responses={404: {"description": "Deployment not found"}}
+)
+@query_budget(2)
+async def read_deployment(
+    deployment_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_user)
+):
+    """Get the state and progress of a deployment job"""
+    db_deployment = await get_deployment(db, deployment_id)
+    if not db_deployment or (
+        db_deployment.website.user_id != current_user.id and not current_user.is_admin
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Deployment not found"
+        )
+    return db_deployment
+
+# Admin deployment routes
+@admin_router.get("/deployments/", response_model=List[DeploymentSchema])
+@query_budget(2)
+async def admin_read_all_deployments(
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[DeploymentStatus] = None,
+    db: AsyncSession = Depends(get_db),
+    admin_user: DBUser = Depends(get_current_admin)
+):
+    """ADMIN ONLY: Get deployment jobs across all websites"""
+    return await get_all_deployments(db, status=status, skip=skip, limit=limit)
+
+@admin_router.get("/metrics")
+async def admin_read_metrics(
+    admin_user: DBUser = Depends(get_current_admin)
+):
+    """ADMIN ONLY: In-process counters and timings (deploy queue wait, run time, ...)"""
+    return metrics.snapshot()
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Optional, List
-from ..deps import get_db, get_current_user, get_current_admin
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Set
+from datetime import datetime
+from ..deps import (
+    get_db, get_current_user, get_current_admin, set_next_cursor, sparse_fieldset, project, conditional_get
+)
+from ...core.query_budget import query_budget
 from ...models.user import User as DBUser
 from ...models.review import Review as DBReview
-from ...schemas.review import ReviewCreate, ReviewUpdate, Review as ReviewSchema
+from ...schemas.review import ReviewCreate, ReviewUpdate, Review as ReviewSchema, ReviewSummary
 from ...crud.review import (
     create_review,
     get_reviews_by_user,
@@ -12,7 +16,9 @@ from ...crud.review import (
     update_review,
     delete_review,
     get_all_reviews,
+    get_reviews_version,
 )
+from ...crud.filters import ReviewFilter
 
 # Create two separate routers for better organization
 router = APIRouter(tags=["reviews"])
@@ -20,33 +26,44 @@ admin_router = APIRouter(prefix="/admin", tags=["admin"])
 
 # User review routes
 @router.post("/reviews/", response_model=ReviewSchema, status_code=status.HTTP_201_CREATED)
-def create_review_for_website(
+async def create_review_for_website(
     review: ReviewCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Create a new review for a website"""
-    return create_review(db, review, current_user.id)
+    return await create_review(db, review, current_user.id)
 
-@router.get("/reviews/", response_model=List[ReviewSchema])
-def read_user_reviews(
+@router.get("/reviews/", response_model=List[ReviewSummary], responses={304: {"description": "Not modified"}})
+@query_budget(3)
+async def read_user_reviews(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[Set[str]] = Depends(sparse_fieldset(ReviewSummary)),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
-    """Get all reviews created by the current user"""
-    reviews = get_reviews_by_user(db, current_user.id, skip=skip, limit=limit)
-    return reviews
+    """Get all reviews created by the current user, newest first"""
+    version = await get_reviews_version(db, current_user.id)
+    not_modified = conditional_get(request, response, (current_user.id, *version))
+    if not_modified:
+        return not_modified
+    reviews = await get_reviews_by_user(db, current_user.id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, reviews, limit)
+    return project(response, reviews, ReviewSummary, fields)
 
 @router.get("/reviews/{review_id}", response_model=ReviewSchema)
-def read_review(
+@query_budget(2)
+async def read_review(
     review_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Get a specific review by ID (only if created by the current user)"""
-    db_review = get_review(db, review_id)
+    db_review = await get_review(db, review_id)
     if not db_review or db_review.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -55,82 +72,101 @@ def read_review(
     return db_review
 
 @router.put("/reviews/{review_id}", response_model=ReviewSchema)
-def update_review_route(
+async def update_review_route(
     review_id: int,
     review_update: ReviewUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Update a specific review (only if created by the current user)"""
-    db_review = get_review(db, review_id)
+    db_review = await get_review(db, review_id)
     if not db_review or db_review.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Review not found"
         )
-    return update_review(db, review_id, review_update)
+    return await update_review(db, review_id, review_update)
 
 @router.delete("/reviews/{review_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_review_route(
+async def delete_review_route(
     review_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Delete a specific review (only if created by the current user)"""
-    db_review = get_review(db, review_id)
+    db_review = await get_review(db, review_id)
     if not db_review or db_review.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Review not found"
         )
-    delete_review(db, review_id)
+    await delete_review(db, review_id)
     return {"ok": True}
 
 # Public reviews endpoint - allow accessing all published reviews
-@router.get("/reviews/public/all", response_model=List[ReviewSchema])
-def read_all_public_reviews(
+@router.get("/reviews/public/all", response_model=List[ReviewSummary], responses={304: {"description": "Not modified"}})
+@query_budget(2)
+async def read_all_public_reviews(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    fields: Optional[Set[str]] = Depends(sparse_fieldset(ReviewSummary)),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all public reviews (no authentication required)"""
-    return get_all_reviews(db, skip=skip, limit=limit)
+    """Get all public reviews, newest first (no authentication required)"""
+    not_modified = conditional_get(request, response, await get_reviews_version(db), private=False)
+    if not_modified:
+        return not_modified
+    reviews = await get_all_reviews(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, reviews, limit)
+    return project(response, reviews, ReviewSummary, fields)
 
 # Admin review routes
-@admin_router.get("/reviews/", response_model=List[ReviewSchema])
-def admin_read_all_reviews(
+@admin_router.get("/reviews/", response_model=List[ReviewSummary])
+@query_budget(2)
+async def admin_read_all_reviews(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     website_id: Optional[int] = None,
     user_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    min_rating: Optional[int] = None,
+    max_rating: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[Set[str]] = Depends(sparse_fieldset(ReviewSummary)),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
-    """ADMIN ONLY: Get all reviews with filtering options"""
-    reviews = get_all_reviews(db, skip=skip, limit=limit)
-    
-    # Filter by website if specified
-    if website_id is not None:
-        reviews = [r for r in reviews if r.website_id == website_id]
-    
-    # Filter by user if specified
-    if user_id is not None:
-        reviews = [r for r in reviews if r.user_id == user_id]
-    
-    return reviews
+    """ADMIN ONLY: Get all reviews with filtering options, newest first"""
+    filters = ReviewFilter(
+        website_id=website_id,
+        user_id=user_id,
+        min_rating=min_rating,
+        max_rating=max_rating,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    reviews = await get_all_reviews(db, skip=skip, limit=limit, cursor=cursor, filters=filters)
+    set_next_cursor(response, reviews, limit)
+    return project(response, reviews, ReviewSummary, fields)
 
 @admin_router.get(
     "/reviews/{review_id}",
     response_model=ReviewSchema, 
     responses={404: {"description": "Review not found"}}
 )
-def admin_read_review(
+@query_budget(2)
+async def admin_read_review(
     review_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Get any review details"""
-    db_review = get_review(db, review_id)
+    db_review = await get_review(db, review_id)
     if not db_review:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
@@ -143,17 +179,17 @@ def admin_read_review(
     status_code=status.HTTP_204_NO_CONTENT,
     responses={404: {"description": "Review not found"}}
 )
-def admin_delete_review(
+async def admin_delete_review(
     review_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Delete any review (e.g., inappropriate content)"""
-    db_review = get_review(db, review_id)
+    db_review = await get_review(db, review_id)
     if not db_review:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, 
             detail="Review not found"
         )
-    delete_review(db, review_id)
+    await delete_review(db, review_id)
     return {"ok": True, "message": f"Review {review_id} successfully deleted"}
\ No newline at end of file
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from ..deps import get_db, get_current_user, get_current_admin
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from typing import Optional
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..deps import get_db, get_current_user, get_current_admin, set_next_cursor
+from ...core.query_budget import query_budget
 from ...schemas.user import UserCreate, UserUpdate, User as UserSchema
 from ...crud.user import (
     create_user,
@@ -8,7 +11,9 @@ from ...crud.user import (
     get_users,
     update_user,
     delete_user,
+    set_admin_status,
 )
+from ...crud.filters import UserFilter
 from ...models.user import User as DBUser
 
 # Create two separate routers for better organization
@@ -17,97 +22,109 @@ admin_router = APIRouter(prefix="/admin", tags=["admin"])
 
 # Public routes - Registration
 @router.post("/users/", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-def create_new_user(
+async def create_new_user(
     user: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Register a new user"""
-    db_user = create_user(db, user)
+    db_user = await create_user(db, user)
     return db_user
 
 # Current user routes - only allow operations on the current user
 @router.get("/users/me", response_model=UserSchema)
-def read_current_user(
+async def read_current_user(
     current_user: DBUser = Depends(get_current_user)
 ):
     """Get the current logged-in user profile"""
     return current_user
 
 @router.put("/users/me", response_model=UserSchema)
-def update_current_user(
+async def update_current_user(
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Update the current user's own profile"""
-    return update_user(db, current_user.id, user_update)
+    return await update_user(db, current_user.id, user_update)
 
 @router.post("/users/me/settings", response_model=UserSchema)
-def update_user_settings(
+async def update_user_settings(
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Update the current user's settings"""
-    return update_user(db, current_user.id, user_update)
+    return await update_user(db, current_user.id, user_update)
 
 @router.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT)
-def delete_current_user(
-    db: Session = Depends(get_db),
+async def delete_current_user(
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Delete the current user's own account"""
-    delete_user(db, current_user.id)
+    await delete_user(db, current_user.id)
     return {"ok": True}
 
 # Admin routes - for user management by administrators
 @admin_router.get("/users/", response_model=list[UserSchema])
-def admin_read_all_users(
+@query_budget(2)
+async def admin_read_all_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     active_only: bool = False,
-    db: Session = Depends(get_db),
+    is_admin: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
-    """ADMIN ONLY: Get all users with optional filtering"""
-    users = get_users(db, skip=skip, limit=limit)
-    if active_only:
-        return [user for user in users if user.is_active]
+    """ADMIN ONLY: Get all users with optional filtering, newest first"""
+    filters = UserFilter(
+        is_active=True if active_only else None,
+        is_admin=is_admin,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    users = await get_users(db, skip=skip, limit=limit, cursor=cursor, filters=filters)
+    set_next_cursor(response, users, limit)
     return users
 
 @admin_router.get("/users/{user_id}", response_model=UserSchema)
-def admin_read_user(
+@query_budget(2)
+async def admin_read_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Get any user by ID"""
-    db_user = get_user(db, user_id)
+    db_user = await get_user(db, user_id)
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return db_user
 
 @admin_router.put("/users/{user_id}", response_model=UserSchema)
-def admin_update_user(
+async def admin_update_user(
     user_id: int,
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Update any user's profile including admin status"""
-    db_user = get_user(db, user_id)
+    db_user = await get_user(db, user_id)
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    return update_user(db, user_id, user_update)
+    return await update_user(db, user_id, user_update)
 
 @admin_router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def admin_delete_user(
+async def admin_delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Delete any user account"""
-    db_user = get_user(db, user_id)
+    db_user = await get_user(db, user_id)
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
@@ -118,17 +135,17 @@ def admin_delete_user(
             detail="Cannot delete your own admin account"
         )
     
-    delete_user(db, user_id)
+    await delete_user(db, user_id)
     return {"ok": True, "message": f"User {user_id} successfully deleted"}
 
 @admin_router.post("/users/{user_id}/toggle-admin", status_code=status.HTTP_200_OK)
-def admin_toggle_admin_status(
+async def admin_toggle_admin_status(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Toggle admin status for a user"""
-    db_user = get_user(db, user_id)
+    db_user = await get_user(db, user_id)
     if not db_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
@@ -139,9 +156,7 @@ def admin_toggle_admin_status(
             detail="Cannot remove your own admin privileges"
         )
     
-    db_user.is_admin = not db_user.is_admin
-    db.commit()
-    db.refresh(db_user)
+    db_user = await set_admin_status(db, user_id, not db_user.is_admin)
     
     status_msg = "granted" if db_user.is_admin else "revoked"
     return {
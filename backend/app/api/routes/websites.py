@@ -1,39 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Set
+import asyncio
 import sys
 
-from ..deps import get_db, get_current_user, get_current_admin
+from ..deps import (
+    get_db, get_current_user, get_current_admin, set_next_cursor, sparse_fieldset, project, conditional_get
+)
+from ...core.query_budget import query_budget
+from ...database import SessionLocal
 from ...models.user import User as DBUser
+from ...models.website import Website as DBWebsite, SERVING_STATUSES
 from ...schemas.website import (
     WebsiteCreate, 
     WebsiteUpdate, 
     Website as WebsiteSchema,
-    WebsiteStatus
+    WebsiteSummary,
+    WebsiteStatus,
+    WebsiteIds,
+    ExpirySweep,
+    Release as ReleaseSchema,
+    LogChunk
 )
 from ...crud.website import (
     create_website,
     get_website,
     get_websites_by_user,
+    get_websites_version,
     update_website,
-    delete_website,
     get_all_websites,
-    get_websites_by_status
+    get_websites_by_ids
 )
+from ...crud.filters import WebsiteFilter
 from ...services.deployment import WebsiteProcessManager
+from ...services.deploy_queue import DeploymentQueue, QueueFullError
+from ...services.ports import PortAllocator
+from ...services.log_stream import LogTailer, read_log_range
+from ...services.events import EventBroker, RESYNC
+from ...services.expiry import ExpirySweeper
 from ...core.config import settings
+from ...core.logger import logger
 
 # Create two separate routers for better organization
 router = APIRouter(prefix="/websites", tags=["websites"])
 admin_router = APIRouter(prefix="/admin/websites", tags=["admin"])
 
+# Largest log range returned by one GET /logs request
+MAX_LOG_READ = 1024 * 1024
+
 # User website routes
 @router.post("/", response_model=WebsiteSchema, status_code=status.HTTP_201_CREATED)
 async def create_new_website(
     website: WebsiteCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Create a new website with automatic port assignment"""
@@ -43,49 +64,71 @@ async def create_new_website(
             detail="Your subscription has expired"
         )
     
-    manager = WebsiteProcessManager()
     try:
-        port = manager.get_available_port(db)
+        db_website = await PortAllocator().assign(
+            db, lambda port: create_website(db, website, current_user.id, port)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
     
-    db_website = create_website(db, website, current_user.id, port)
-    
-    background_tasks.add_task(
-        manager.deploy_static_site,
-        db,
-        db_website.git_repo,
-        db_website.name,
-        current_user.id
-    )
+    try:
+        await DeploymentQueue().enqueue(db, db_website, current_user.id)
+    except QueueFullError as e:
+        db_website.status = WebsiteStatus.ERROR
+        db_website.deployment_log = str(e)
+        await db.commit()
     
-    return db_website
+    return await get_website(db, db_website.id)
 
-@router.get("/", response_model=List[WebsiteSchema])
-def read_user_websites(
+@router.get("/", response_model=List[WebsiteSummary], responses={304: {"description": "Not modified"}})
+@query_budget(3)
+async def read_user_websites(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[Set[str]] = Depends(sparse_fieldset(WebsiteSummary)),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
-    """Get all websites for the current user"""
-    return get_websites_by_user(db, current_user.id, skip=skip, limit=limit)
+    """Get all websites for the current user, newest first"""
+    version = await get_websites_version(db, current_user.id)
+    not_modified = conditional_get(request, response, (current_user.id, *version))
+    if not_modified:
+        return not_modified
+    websites = await get_websites_by_user(db, current_user.id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, websites, limit)
+    return project(response, websites, WebsiteSummary, fields)
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Status changes as Server-Sent Events"}}
+)
+async def stream_website_events(
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_user)
+):
+    """Follow the status changes of the current user's websites"""
+    return await _event_stream_response(db, current_user.id)
 
 @router.get(
     "/{website_id}",
     response_model=WebsiteSchema,
     responses={404: {"description": "Website not found"}}
 )
-def read_website(
+@query_budget(2)
+async def read_website(
     website_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Get a specific website by ID"""
-    db_website = get_website(db, website_id)
+    db_website = await get_website(db, website_id)
     if not db_website or db_website.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,20 +141,20 @@ def read_website(
     response_model=WebsiteSchema,
     responses={404: {"description": "Website not found"}}
 )
-def update_website_route(
+async def update_website_route(
     website_id: int,
     website_update: WebsiteUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Update website details"""
-    db_website = get_website(db, website_id)
+    db_website = await get_website(db, website_id)
     if not db_website or db_website.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Website not found"
         )
-    return update_website(db, website_id, website_update)
+    return await update_website(db, website_id, website_update)
 
 @router.delete(
     "/{website_id}",
@@ -122,78 +165,72 @@ def update_website_route(
 )
 async def delete_website_route(
     website_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Delete a website and cleanup resources"""
-    db_website = get_website(db, website_id)
+    db_website = await get_website(db, website_id)
     if not db_website or db_website.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Website not found"
         )
     
-    manager = WebsiteProcessManager()
-    if not manager.delete_site(db, db_website.name, db_website.port, current_user.id):
+    port = db_website.port
+    if not await asyncio.to_thread(_delete_site, website_id):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to cleanup website resources"
         )
     
-    delete_website(db, website_id)
+    PortAllocator().release(port)
     return {"ok": True}
 
 @router.post(
     "/{website_id}/start",
     response_model=WebsiteSchema,
     responses={
-        400: {"description": "Website already running"},
+        400: {"description": "Website already running or deploying"},
         404: {"description": "Website not found"},
-        500: {"description": "Deployment failed"}
+        503: {"description": "Deployment queue is full"}
     }
 )
 async def start_website(
     website_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
-    """Start a website"""
-    db_website = get_website(db, website_id)
+    """Start a website by queueing a deployment of its repository"""
+    db_website = await get_website(db, website_id)
     if not db_website or db_website.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Website not found"
         )
     
-    if db_website.status == WebsiteStatus.RUNNING:
+    if db_website.status in SERVING_STATUSES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Website already running"
         )
     
+    if db_website.status == WebsiteStatus.DEPLOYING:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Website is already being deployed"
+        )
+    
+    # The clone runs on a deployment worker, never on a request thread
     try:
-        manager = WebsiteProcessManager()
-        port = manager.deploy_static_site(
-            db,
-            db_website.git_repo,
-            db_website.name,
-            current_user.id
-        )
-        
-        db_website.status = WebsiteStatus.RUNNING
-        db_website.pid = port  # This will be the process ID
-        db.commit()
-        db.refresh(db_website)
-        
-        return db_website
-    except Exception as e:
-        db_website.status = WebsiteStatus.ERROR
-        db_website.deployment_log = str(e)
-        db.commit()
+        await DeploymentQueue().enqueue(db, db_website, current_user.id)
+    except QueueFullError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Deployment failed: {str(e)}"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
         )
+    
+    return await get_website(db, website_id)
 
 @router.post(
     "/{website_id}/stop",
@@ -206,116 +243,217 @@ async def start_website(
 )
 async def stop_website(
     website_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
     """Stop a running website"""
-    db_website = get_website(db, website_id)
+    db_website = await get_website(db, website_id)
     if not db_website or db_website.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Website not found"
         )
     
-    if db_website.status != WebsiteStatus.RUNNING:
+    if db_website.status not in SERVING_STATUSES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Website not running"
         )
     
-    manager = WebsiteProcessManager()
-    stopped = manager.stop_site(db_website.port)
-    
-    db_website.status = WebsiteStatus.STOPPED
-    db_website.pid = None
-    db.commit()
-    db.refresh(db_website)
+    # Re-checked under the deploy lock: a deployment may have been activating
+    if not await asyncio.to_thread(_stop_site, website_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Website not running"
+        )
     
-    return db_website
+    return await get_website(db, website_id)
 
 @router.post(
     "/{website_id}/redeploy",
     response_model=WebsiteSchema,
     responses={
         404: {"description": "Website not found"},
-        500: {"description": "Redeployment failed"}
+        503: {"description": "Deployment queue is full"}
     }
 )
 async def redeploy_website(
     website_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: DBUser = Depends(get_current_user)
 ):
-    """Redeploy a website (stop and start again)"""
-    db_website = get_website(db, website_id)
+    """Redeploy a website (build a new release and swap it in; the site keeps serving)"""
+    db_website = await get_website(db, website_id)
     if not db_website or db_website.user_id != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Website not found"
         )
     
-    manager = WebsiteProcessManager()
+    # Queue the deployment; a running site keeps serving its current release
+    # until the new one is activated
+    try:
+        await DeploymentQueue().enqueue(db, db_website, current_user.id)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
     
-    # Stop if running
-    if db_website.status == WebsiteStatus.RUNNING:
-        if not manager.stop_site(db_website.port):
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to stop website for redeployment"
-            )
+    return await get_website(db, website_id)
+
+@router.get(
+    "/{website_id}/releases",
+    response_model=List[ReleaseSchema],
+    responses={404: {"description": "Website not found"}}
+)
+async def read_website_releases(
+    website_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_user)
+):
+    """List the retained releases of a website, newest first"""
+    db_website = await get_website(db, website_id)
+    if not db_website or db_website.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
+    manager = WebsiteProcessManager()
+    return await asyncio.to_thread(manager.list_releases, db_website.owner.full_name, db_website.name)
+
+@router.get(
+    "/{website_id}/logs",
+    response_model=LogChunk,
+    responses={404: {"description": "Website not found"}}
+)
+async def read_website_logs(
+    website_id: int,
+    offset: Optional[int] = Query(None, ge=0, description="Start offset; the end of the log if omitted"),
+    limit: int = Query(64 * 1024, ge=1, le=MAX_LOG_READ),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_user)
+):
+    """Read part of a website's deployment and server log"""
+    db_website = await get_website(db, website_id)
+    if not db_website or db_website.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
+    return await _read_log_chunk(db_website, offset, limit)
+
+@router.get(
+    "/{website_id}/logs/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Log lines as Server-Sent Events"},
+        404: {"description": "Website not found"}
+    }
+)
+async def stream_website_logs(
+    website_id: int,
+    offset: int = Query(0, ge=0),
+    last_event_id: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_user)
+):
+    """Follow a website's log; event ids are byte offsets, so reconnects resume via Last-Event-ID"""
+    db_website = await get_website(db, website_id)
+    if not db_website or db_website.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
+    return await _log_stream_response(db, db_website, offset, last_event_id)
+
+@router.post(
+    "/{website_id}/rollback",
+    response_model=WebsiteSchema,
+    responses={
+        400: {"description": "Release not available"},
+        404: {"description": "Website not found"}
+    }
+)
+async def rollback_website(
+    website_id: int,
+    release: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: DBUser = Depends(get_current_user)
+):
+    """Switch a website back to a retained release (the previous one by default)"""
+    db_website = await get_website(db, website_id)
+    if not db_website or db_website.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
     
-    # Deploy in background
     try:
-        background_tasks.add_task(
-            manager.deploy_static_site,
-            db,
-            db_website.git_repo,
-            db_website.name,
-            current_user.id
-        )
-        
-        db_website.status = WebsiteStatus.DEPLOYING
-        db.commit()
-        db.refresh(db_website)
-        
-        return db_website
-    except Exception as e:
-        db_website.status = WebsiteStatus.ERROR
-        db.commit()
+        await asyncio.to_thread(_rollback_site, website_id, release)
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Redeployment failed: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
+    return await get_website(db, website_id)
 
 # Admin website routes
-@admin_router.get("/", response_model=List[WebsiteSchema])
-def admin_read_all_websites(
+@admin_router.get("/", response_model=List[WebsiteSummary])
+@query_budget(2)
+async def admin_read_all_websites(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     include_expired: bool = False,
     status: Optional[WebsiteStatus] = None,
-    db: Session = Depends(get_db),
+    owner_id: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[Set[str]] = Depends(sparse_fieldset(WebsiteSummary)),
+    db: AsyncSession = Depends(get_db),
+    admin_user: DBUser = Depends(get_current_admin)
+):
+    """ADMIN ONLY: Get all websites with filtering options, newest first"""
+    filters = WebsiteFilter(
+        status=status,
+        owner_id=owner_id,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    websites = await get_all_websites(
+        db, skip=skip, limit=limit, only_active=not include_expired, cursor=cursor, filters=filters
+    )
+    set_next_cursor(response, websites, limit)
+    return project(response, websites, WebsiteSummary, fields)
+
+@admin_router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Status changes as Server-Sent Events"}}
+)
+async def admin_stream_website_events(
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
-    """ADMIN ONLY: Get all websites with filtering options"""
-    if status:
-        return get_websites_by_status(db, status, skip=skip, limit=limit)
-    else:
-        return get_all_websites(db, skip=skip, limit=limit, only_active=not include_expired)
+    """ADMIN ONLY: Follow the status changes of every website"""
+    return await _event_stream_response(db, None)
 
 @admin_router.get(
     "/{website_id}",
     response_model=WebsiteSchema,
     responses={404: {"description": "Website not found"}}
 )
-def admin_read_website(
+@query_budget(2)
+async def admin_read_website(
     website_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Get any website details"""
-    db_website = get_website(db, website_id)
+    db_website = await get_website(db, website_id)
     if not db_website:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -328,20 +466,20 @@ def admin_read_website(
     response_model=WebsiteSchema,
     responses={404: {"description": "Website not found"}}
 )
-def admin_update_website(
+async def admin_update_website(
     website_id: int,
     website_update: WebsiteUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Update any website details"""
-    db_website = get_website(db, website_id)
+    db_website = await get_website(db, website_id)
     if not db_website:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Website not found"
         )
-    return update_website(db, website_id, website_update)
+    return await update_website(db, website_id, website_update)
 
 @admin_router.delete(
     "/{website_id}",
@@ -352,84 +490,72 @@ def admin_update_website(
 )
 async def admin_delete_website(
     website_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Delete any website and cleanup resources"""
-    db_website = get_website(db, website_id)
+    db_website = await get_website(db, website_id)
     if not db_website:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Website not found"
         )
     
-    manager = WebsiteProcessManager()
-    # Get the website owner's info for cleanup
-    owner_id = db_website.user_id
-    
-    if not manager.delete_site(db, db_website.name, db_website.port, owner_id):
+    port = db_website.port
+    if not await asyncio.to_thread(_delete_site, website_id):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to cleanup website resources"
         )
     
-    delete_website(db, website_id)
+    PortAllocator().release(port)
     return {"ok": True, "message": f"Website {website_id} successfully deleted"}
 
 @admin_router.post(
     "/{website_id}/start",
     response_model=WebsiteSchema,
     responses={
-        400: {"description": "Website already running"},
+        400: {"description": "Website already running or deploying"},
         404: {"description": "Website not found"},
-        500: {"description": "Deployment failed"}
+        503: {"description": "Deployment queue is full"}
     }
 )
 async def admin_start_website(
     website_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
-    """ADMIN ONLY: Start any website"""
-    db_website = get_website(db, website_id)
+    """ADMIN ONLY: Start any website by queueing a deployment"""
+    db_website = await get_website(db, website_id)
     if not db_website:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Website not found"
         )
     
-    if db_website.status == WebsiteStatus.RUNNING:
+    if db_website.status in SERVING_STATUSES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Website already running"
         )
     
+    if db_website.status == WebsiteStatus.DEPLOYING:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Website is already being deployed"
+        )
+    
+    # The clone runs on a deployment worker, never on a request thread
     try:
-        # Get the website owner's info for deploying
-        owner_id = db_website.user_id
-        
-        manager = WebsiteProcessManager()
-        port = manager.deploy_static_site(
-            db,
-            db_website.git_repo,
-            db_website.name,
-            owner_id
-        )
-        
-        db_website.status = WebsiteStatus.RUNNING
-        db_website.pid = port  # This should be the process ID
-        db.commit()
-        db.refresh(db_website)
-        
-        return db_website
-    except Exception as e:
-        db_website.status = WebsiteStatus.ERROR
-        db_website.deployment_log = str(e)
-        db.commit()
+        await DeploymentQueue().enqueue(db, db_website, admin_user.id)
+    except QueueFullError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Deployment failed: {str(e)}"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
         )
+    
+    return await get_website(db, website_id)
 
 @admin_router.post(
     "/{website_id}/stop",
@@ -442,86 +568,283 @@ async def admin_start_website(
 )
 async def admin_stop_website(
     website_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Stop any running website"""
-    db_website = get_website(db, website_id)
+    db_website = await get_website(db, website_id)
     if not db_website:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Website not found"
         )
     
-    if db_website.status != WebsiteStatus.RUNNING:
+    if db_website.status not in SERVING_STATUSES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Website not running"
         )
     
-    manager = WebsiteProcessManager()
-    stopped = manager.stop_site(db_website.port)
-    
-    db_website.status = WebsiteStatus.STOPPED
-    db_website.pid = None
-    db.commit()
-    db.refresh(db_website)
+    # Re-checked under the deploy lock: a deployment may have been activating
+    if not await asyncio.to_thread(_stop_site, website_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Website not running"
+        )
     
-    return db_website
+    return await get_website(db, website_id)
 
 @admin_router.post(
     "/{website_id}/redeploy",
     response_model=WebsiteSchema,
     responses={
         404: {"description": "Website not found"},
-        500: {"description": "Redeployment failed"}
+        503: {"description": "Deployment queue is full"}
     }
 )
 async def admin_redeploy_website(
     website_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin_user: DBUser = Depends(get_current_admin)
 ):
     """ADMIN ONLY: Redeploy any website"""
-    db_website = get_website(db, website_id)
+    db_website = await get_website(db, website_id)
     if not db_website:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Website not found"
         )
     
-    manager = WebsiteProcessManager()
+    # Queue the deployment; a running site keeps serving its current release
+    # until the new one is activated
+    try:
+        await DeploymentQueue().enqueue(db, db_website, admin_user.id)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "30"}
+        )
     
-    # Stop if running
-    if db_website.status == WebsiteStatus.RUNNING:
-        if not manager.stop_site(db_website.port):
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to stop website for redeployment"
-            )
+    return await get_website(db, website_id)
+
+
+@admin_router.get(
+    "/{website_id}/releases",
+    response_model=List[ReleaseSchema],
+    responses={404: {"description": "Website not found"}}
+)
+async def admin_read_website_releases(
+    website_id: int,
+    db: AsyncSession = Depends(get_db),
+    admin_user: DBUser = Depends(get_current_admin)
+):
+    """ADMIN ONLY: List the retained releases of any website"""
+    db_website = await get_website(db, website_id)
+    if not db_website:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
+    manager = WebsiteProcessManager()
+    return await asyncio.to_thread(manager.list_releases, db_website.owner.full_name, db_website.name)
+
+@admin_router.get(
+    "/{website_id}/logs",
+    response_model=LogChunk,
+    responses={404: {"description": "Website not found"}}
+)
+async def admin_read_website_logs(
+    website_id: int,
+    offset: Optional[int] = Query(None, ge=0, description="Start offset; the end of the log if omitted"),
+    limit: int = Query(64 * 1024, ge=1, le=MAX_LOG_READ),
+    db: AsyncSession = Depends(get_db),
+    admin_user: DBUser = Depends(get_current_admin)
+):
+    """ADMIN ONLY: Read part of any website's log"""
+    db_website = await get_website(db, website_id)
+    if not db_website:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
+    return await _read_log_chunk(db_website, offset, limit)
+
+@admin_router.get(
+    "/{website_id}/logs/stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Log lines as Server-Sent Events"},
+        404: {"description": "Website not found"}
+    }
+)
+async def admin_stream_website_logs(
+    website_id: int,
+    offset: int = Query(0, ge=0),
+    last_event_id: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    admin_user: DBUser = Depends(get_current_admin)
+):
+    """ADMIN ONLY: Follow any website's log"""
+    db_website = await get_website(db, website_id)
+    if not db_website:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
+    return await _log_stream_response(db, db_website, offset, last_event_id)
+
+@admin_router.post(
+    "/{website_id}/rollback",
+    response_model=WebsiteSchema,
+    responses={
+        400: {"description": "Release not available"},
+        404: {"description": "Website not found"}
+    }
+)
+async def admin_rollback_website(
+    website_id: int,
+    release: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    admin_user: DBUser = Depends(get_current_admin)
+):
+    """ADMIN ONLY: Switch any website back to a retained release"""
+    db_website = await get_website(db, website_id)
+    if not db_website:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Website not found"
+        )
     
-    # Deploy in background
     try:
-        owner_id = db_website.user_id
-        
-        background_tasks.add_task(
-            manager.deploy_static_site,
-            db,
-            db_website.git_repo,
-            db_website.name,
-            owner_id
-        )
-        
-        db_website.status = WebsiteStatus.DEPLOYING
-        db.commit()
-        db.refresh(db_website)
-        
-        return db_website
-    except Exception as e:
-        db_website.status = WebsiteStatus.ERROR
-        db.commit()
+        await asyncio.to_thread(_rollback_site, website_id, release)
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Redeployment failed: {str(e)}"
-        )
\ No newline at end of file
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return await get_website(db, website_id)
+
+@admin_router.post("/bulk-stop", response_model=List[WebsiteSchema])
+async def admin_bulk_stop_websites(
+    website_ids: WebsiteIds,
+    db: AsyncSession = Depends(get_db),
+    admin_user: DBUser = Depends(get_current_admin)
+):
+    """ADMIN ONLY: Stop many websites at once"""
+    websites = await get_websites_by_ids(db, website_ids.ids)
+    running = [w.id for w in websites if w.status in SERVING_STATUSES]
+    if running:
+        await asyncio.to_thread(_stop_sites, running)
+        # Stopped through another session: load the new statuses
+        db.expire_all()
+        websites = await get_websites_by_ids(db, website_ids.ids)
+    return websites
+
+@admin_router.post("/sweep-expired", response_model=ExpirySweep)
+async def admin_sweep_expired_websites(
+    dry_run: bool = True,
+    admin_user: DBUser = Depends(get_current_admin)
+):
+    """ADMIN ONLY: Stop expired websites now (only list them unless dry_run=false)"""
+    return await asyncio.to_thread(ExpirySweeper().sweep, dry_run)
+
+
+async def _read_log_chunk(db_website, offset: Optional[int], limit: int) -> LogChunk:
+    path = WebsiteProcessManager().log_path(db_website.owner.full_name, db_website.name)
+    start, data, size = await asyncio.to_thread(read_log_range, path, offset, limit)
+    return LogChunk(
+        offset=start,
+        next_offset=start + len(data),
+        size=size,
+        content=data.decode("utf-8", errors="replace")
+    )
+
+async def _log_stream_response(db: AsyncSession, db_website, offset: int, last_event_id: Optional[str]) -> StreamingResponse:
+    path = WebsiteProcessManager().log_path(db_website.owner.full_name, db_website.name)
+    if last_event_id and last_event_id.isdigit():
+        offset = int(last_event_id)
+    # Streams are long-lived: give the connection back to the pool now
+    await db.close()
+
+    async def events():
+        yield "retry: 3000\n\n"
+        async for next_offset, data in LogTailer().follow(path, offset):
+            if data is None:
+                yield ": keep-alive\n\n"
+                continue
+            lines = data.decode("utf-8", errors="replace").rstrip("\n").split("\n")
+            yield f"id: {next_offset}\n" + "".join(f"data: {line}\n" for line in lines) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _event_stream_response(db: AsyncSession, user_id: Optional[int]) -> StreamingResponse:
+    # Streams are long-lived: give the connection back to the pool now
+    await db.close()
+
+    async def events():
+        async with EventBroker().subscribe(user_id) as subscription:
+            # Sent once subscribed: a client loading the list after it misses no change
+            yield "retry: 3000\n\n"
+            async for event in subscription:
+                if event is None:
+                    yield ": keep-alive\n\n"
+                elif event == RESYNC:
+                    yield "event: resync\ndata: {}\n\n"
+                else:
+                    yield f"event: status\ndata: {event.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# The process manager works with sync sessions; these run it in a worker thread,
+# holding the website's deploy lock so that no deployment activates meanwhile
+def _delete_site(website_id: int) -> bool:
+    with DeploymentQueue().site_lock(website_id), SessionLocal() as sync_db:
+        website = sync_db.get(DBWebsite, website_id)
+        if website is None:
+            return True
+        if not WebsiteProcessManager().delete_site(sync_db, website.name, website.port, website.user_id):
+            return False
+        # Deleted before the lock is released, or a queued job could deploy the site again
+        sync_db.delete(website)
+        sync_db.commit()
+        logger.info(f"Deleted website {website_id}")
+        return True
+
+def _stop_site(website_id: int) -> bool:
+    """Stop a serving website; False if it is not serving (any more)"""
+    with DeploymentQueue().site_lock(website_id), SessionLocal() as sync_db:
+        website = sync_db.get(DBWebsite, website_id)
+        if website is None or website.status not in SERVING_STATUSES:
+            return False
+        WebsiteProcessManager().stop_site(website.port)
+        website.status = WebsiteStatus.STOPPED
+        website.pid = None
+        sync_db.commit()
+        return True
+
+def _stop_sites(website_ids: List[int]):
+    with DeploymentQueue().site_lock(*website_ids), SessionLocal() as sync_db:
+        running = sync_db.query(DBWebsite)\
+                         .filter(DBWebsite.id.in_(website_ids), DBWebsite.status.in_(SERVING_STATUSES))\
+                         .all()
+        WebsiteProcessManager().stop_sites([w.port for w in running])
+        for website in running:
+            website.status = WebsiteStatus.STOPPED
+            website.pid = None
+        sync_db.commit()
+
+def _rollback_site(website_id: int, release: Optional[str]) -> str:
+    with DeploymentQueue().site_lock(website_id), SessionLocal() as sync_db:
+        website = sync_db.get(DBWebsite, website_id)
+        if website is None:
+            raise ValueError(f"Website {website_id} not found")
+        return WebsiteProcessManager().rollback_site(sync_db, website, release)
@@ -2,16 +2,75 @@ from pydantic_settings import BaseSettings
 from pydantic import Field, HttpUrl
 from typing import Optional
 from pathlib import Path
+import os
 
 class Settings(BaseSettings):
     DATABASE_URL: str = Field(..., env="DATABASE_URL")
     STATIC_SITES_DIR: str = Field("/app/static_sites", env="STATIC_SITES_DIR")
     WEBSITE_MIN_PORT: int = Field(8000, env="WEBSITE_MIN_PORT")
+    WEBSITE_PORT_RANGE_SIZE: int = Field(100, env="WEBSITE_PORT_RANGE_SIZE")
+
+    # Static site serving: "multiplexed" hosts every site from shared worker
+    # processes, "process" spawns one http.server per site
+    STATIC_SERVER_MODE: str = Field("multiplexed", env="STATIC_SERVER_MODE")
+    STATIC_SERVER_WORKERS: int = Field(1, env="STATIC_SERVER_WORKERS")
+    # Process mode only: stop a site's server after this many idle seconds (0 disables)
+    HIBERNATE_IDLE_SECONDS: int = Field(0, env="HIBERNATE_IDLE_SECONDS")
+
+    # Bare mirrors of deployed repositories, evicted LRU beyond this size
+    GIT_CACHE_MAX_BYTES: int = Field(2 * 1024 ** 3, env="GIT_CACHE_MAX_BYTES")
+
+    # Number of release directories retained per site for rollback
+    RELEASES_TO_KEEP: int = Field(5, env="RELEASES_TO_KEEP")
+
+    # Deployment job queue
+    DEPLOY_WORKERS: int = Field(4, env="DEPLOY_WORKERS")
+    DEPLOY_QUEUE_MAX: int = Field(100, env="DEPLOY_QUEUE_MAX")
+    DEPLOY_POLL_INTERVAL: float = Field(2.0, env="DEPLOY_POLL_INTERVAL")
+
+    # Expired websites (and websites of expired plans) are stopped every EXPIRY_SWEEP_INTERVAL
+    # seconds (0 disables), EXPIRY_SWEEP_BATCH at a time; a dry run only logs what it would stop
+    EXPIRY_SWEEP_INTERVAL: float = Field(300.0, env="EXPIRY_SWEEP_INTERVAL")
+    EXPIRY_SWEEP_BATCH: int = Field(50, env="EXPIRY_SWEEP_BATCH")
+    EXPIRY_SWEEP_DRY_RUN: bool = Field(False, env="EXPIRY_SWEEP_DRY_RUN")
+
+    # Startup reconciliation: parallel site restarts and how long to wait for them to serve
+    RECONCILE_CONCURRENCY: int = Field(16, env="RECONCILE_CONCURRENCY")
+    RECONCILE_TIMEOUT: float = Field(60.0, env="RECONCILE_TIMEOUT")
+
+    # Unix socket of the site runner daemon that owns every site server; unset, the
+    # API runs sites itself. Requests wait up to SITE_RUNNER_TIMEOUT seconds
+    SITE_RUNNER_SOCKET: str = Field("", env="SITE_RUNNER_SOCKET")
+    SITE_RUNNER_TIMEOUT: float = Field(60.0, env="SITE_RUNNER_TIMEOUT")
     
     # JWT Configuration
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
     ALGORITHM: str = Field("HS256", env="ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(60, env="ACCESS_TOKEN_EXPIRE_MINUTES")
+    # API worker processes (read by uvicorn too)
+    WEB_CONCURRENCY: int = Field(1, env="WEB_CONCURRENCY")
+    # Users resolved from bearer tokens are cached per process (0 disables)
+    PRINCIPAL_CACHE_SIZE: int = Field(1024, env="PRINCIPAL_CACHE_SIZE")
+    PRINCIPAL_CACHE_TTL: float = Field(30.0, env="PRINCIPAL_CACHE_TTL")
+
+    # Password hashing: bcrypt cost, hashing processes and how many calls may wait for them
+    BCRYPT_ROUNDS: int = Field(12, env="BCRYPT_ROUNDS")
+    PASSWORD_HASH_WORKERS: int = Field(default_factory=lambda: os.cpu_count() or 1, env="PASSWORD_HASH_WORKERS")
+    PASSWORD_HASH_QUEUE_MAX: int = Field(64, env="PASSWORD_HASH_QUEUE_MAX")
+
+    # SQL statements per request: "off", "warn" (log and count) or "raise" (fail the
+    # request, for tests and development) when a route runs more than its budget
+    QUERY_BUDGET_MODE: str = Field("off", env="QUERY_BUDGET_MODE")
+    QUERY_BUDGET_DEFAULT: int = Field(20, env="QUERY_BUDGET_DEFAULT")
+
+    # Responses of at least GZIP_MIN_SIZE bytes are gzipped for clients that accept it (0 disables)
+    GZIP_MIN_SIZE: int = Field(1024, env="GZIP_MIN_SIZE")
+    GZIP_LEVEL: int = Field(5, env="GZIP_LEVEL")
+
+    # Website status event streams: events buffered per subscriber before the oldest are
+    # dropped, and how often databases without LISTEN/NOTIFY are polled for changes
+    EVENTS_QUEUE_SIZE: int = Field(100, env="EVENTS_QUEUE_SIZE")
+    EVENTS_POLL_INTERVAL: float = Field(1.0, env="EVENTS_POLL_INTERVAL")
 
     class Config:
         env_file = ".env"
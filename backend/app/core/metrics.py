@@ -0,0 +1,59 @@
+import threading
+from collections import deque
+from typing import Deque, Dict
+
+
+class Metrics:
+    """In-process counters, gauges and timing summaries"""
+
+    WINDOW = 1024  # Samples kept per timing for percentile estimates
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Deque[float]] = {}
+        self._timing_totals: Dict[str, list] = {}
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            self._timings.setdefault(name, deque(maxlen=self.WINDOW)).append(seconds)
+            totals = self._timing_totals.setdefault(name, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    @staticmethod
+    def _percentile(ordered: list, fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self) -> Dict:
+        """Current values; timings report count, mean and recent percentiles"""
+        with self._lock:
+            timings = {}
+            for name, samples in self._timings.items():
+                ordered = sorted(samples)
+                count, total = self._timing_totals[name]
+                timings[name] = {
+                    "count": count,
+                    "mean": total / count,
+                    "p50": self._percentile(ordered, 0.50),
+                    "p95": self._percentile(ordered, 0.95),
+                    "p99": self._percentile(ordered, 0.99),
+                    "max": ordered[-1],
+                }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "timings": timings,
+            }
+
+
+metrics = Metrics()
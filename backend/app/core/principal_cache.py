@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from .config import settings
+from .metrics import metrics
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of users resolved from bearer tokens.
+
+    Entries live for PRINCIPAL_CACHE_TTL seconds at most and never past the
+    token's own expiry. The crud functions that change a user call
+    invalidate_user, which only reaches this process. With several API
+    workers the cache therefore serves nothing unless shared is set: the
+    user change listener (app/services/user_changes.py) sets it while it
+    hears every worker's changes. A single worker without it still sees its
+    own changes at once, while admin-manager.py edits wait for the TTL.
+    """
+
+    def __init__(self, max_size: int, ttl: float, single_process: bool = True):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.single_process = single_process
+        # Whether changes made by other processes reach invalidate_user
+        self.shared = False
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[object, int, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        # Bumped by every invalidation so a lookup that raced one is not cached
+        self.generation = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0 and (self.single_process or self.shared)
+
+    def set_shared(self, shared: bool):
+        """Note whether other processes' changes are heard; entries from before cannot be trusted"""
+        self.shared = shared
+        self.clear()
+
+    def get(self, token: str):
+        """The user cached for token, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[2] > time.monotonic():
+                self._entries.move_to_end(token)
+                metrics.incr("auth.principal_cache.hits")
+                return entry[0]
+            if entry is not None:
+                self._remove(token)
+        metrics.incr("auth.principal_cache.misses")
+        return None
+
+    def put(self, token: str, user, token_expires_at: Optional[float], generation: int):
+        """
+        Cache user for token. token_expires_at is the token's exp as a Unix
+        timestamp, generation the value of self.generation before the user was read.
+        """
+        if not self.enabled:
+            return
+        lifetime = self.ttl
+        if token_expires_at is not None:
+            lifetime = min(lifetime, token_expires_at - time.time())
+        if lifetime <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._remove(token)
+            self._entries[token] = (user, user.id, time.monotonic() + lifetime)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+            metrics.set_gauge("auth.principal_cache.size", len(self._entries))
+
+    def invalidate_user(self, user_id: int):
+        """Forget every cached token of a user"""
+        with self._lock:
+            self.generation += 1
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+            metrics.set_gauge("auth.principal_cache.size", len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._tokens_by_user.clear()
+            metrics.set_gauge("auth.principal_cache.size", 0)
+
+    def _remove(self, token: str):
+        """Drop one entry (caller holds the lock)"""
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[1])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[1]]
+
+
+principal_cache = PrincipalCache(
+    settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL, single_process=settings.WEB_CONCURRENCY <= 1
+)
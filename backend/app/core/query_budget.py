@@ -0,0 +1,88 @@
+import contextvars
+from typing import Callable, Optional
+
+from sqlalchemy import event
+
+from .config import settings
+from .logger import logger
+from .metrics import metrics
+
+# Statement counter of the request being served, None outside of one
+_statements: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("query_statements", default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in "raise" mode when a route runs more SQL statements than its budget"""
+
+
+def query_budget(statements: int) -> Callable:
+    """Route decorator: the most SQL statements one request of the route may run"""
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.query_budget = statements
+        return endpoint
+    return decorator
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def install(*engines):
+    """Count the statements the engines execute on behalf of a request"""
+    for engine in engines:
+        engine = getattr(engine, "sync_engine", engine)
+        if not event.contains(engine, "before_cursor_execute", _count_statement):
+            event.listen(engine, "before_cursor_execute", _count_statement)
+
+
+class QueryBudgetMiddleware:
+    """
+    Counts the SQL statements of every HTTP request and checks them against the
+    route's budget (query_budget(), else QUERY_BUDGET_DEFAULT).
+
+    Statements are counted until the response starts, which covers the route,
+    its dependencies and the threads it hands work to; the count is sent as
+    X-Query-Count. Over budget, "warn" logs and counts db.query_budget_exceeded
+    and "raise" fails the request with QueryBudgetExceeded instead, so a test
+    client surfaces the N+1 as an error.
+    """
+
+    def __init__(self, app, mode: str = None, default_budget: int = None):
+        self.app = app
+        self.mode = mode or settings.QUERY_BUDGET_MODE
+        self.default_budget = default_budget if default_budget is not None else settings.QUERY_BUDGET_DEFAULT
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode == "off":
+            await self.app(scope, receive, send)
+            return
+
+        counter = [0]
+        token = _statements.set(counter)
+
+        async def send_counted(message):
+            if message["type"] == "http.response.start":
+                count = counter[0]
+                self._check(scope, count)
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-query-count", str(count).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_counted)
+        finally:
+            _statements.reset(token)
+
+    def _check(self, scope, count: int):
+        route = scope.get("route")
+        budget = getattr(getattr(route, "endpoint", None), "query_budget", self.default_budget)
+        if count <= budget:
+            return
+        name = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+        metrics.incr("db.query_budget_exceeded")
+        message = f"{name} ran {count} SQL statements, budget {budget}"
+        if self.mode == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -1,9 +1,17 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from jose import jwt
 from passlib.context import CryptContext
 import os
 from dotenv import load_dotenv
-from typing import Optional
+from typing import Optional, Tuple
+
+from .config import settings
+from .metrics import metrics
 
 load_dotenv()
 
@@ -11,7 +19,73 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when PASSWORD_HASH_QUEUE_MAX hashing calls are already waiting"""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a bounded pool of processes.
+
+    Each hash or verify costs hundreds of milliseconds of CPU; in the API
+    process that time would be taken from every other request. Calls beyond
+    the pool size queue up to PASSWORD_HASH_QUEUE_MAX, after which they are
+    refused with PasswordHasherBusy instead of piling up.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._pool: Optional[ProcessPoolExecutor] = None
+            cls._instance._lock = threading.Lock()
+            cls._instance._pending = 0
+        return cls._instance
+
+    @property
+    def capacity(self) -> int:
+        return settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_MAX
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned, not forked: the API process runs threads that fork would copy mid-flight
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in the pool, or raise PasswordHasherBusy if it is saturated"""
+        with self._lock:
+            if self._pending >= self.capacity:
+                metrics.incr("auth.hash_rejected")
+                raise PasswordHasherBusy("Too many password checks in progress, try again shortly")
+            self._pending += 1
+            metrics.set_gauge("auth.hash_pending", self._pending)
+            executor = self._executor()
+        try:
+            return await asyncio.wrap_future(executor.submit(fn, *args))
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool for the next call
+            with self._lock:
+                if self._pool is executor:
+                    self._pool = None
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+                metrics.set_gauge("auth.hash_pending", self._pending)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -25,6 +99,25 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password; also returns a new hash when the stored one uses
+    outdated settings (e.g. BCRYPT_ROUNDS changed), otherwise None.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """
+    get_password_hash on the hashing pool; raises PasswordHasherBusy when saturated.
+    """
+    return await PasswordHasher().run(get_password_hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    verify_and_update_password on the hashing pool; raises PasswordHasherBusy when saturated.
+    """
+    return await PasswordHasher().run(verify_and_update_password, plain_password, hashed_password)
+
 def create_access_token(
     data: dict,
     expires_delta: Optional[timedelta] = None
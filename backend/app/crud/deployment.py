@@ -0,0 +1,86 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import SQLAlchemyError
+from typing import List, Optional
+
+from ..models.deployment import Deployment, DeploymentStatus
+from ..core.logger import logger
+
+async def get_deployment(db: AsyncSession, deployment_id: int) -> Optional[Deployment]:
+    """Get a single deployment job by ID with its website loaded"""
+    try:
+        result = await db.execute(
+            select(Deployment)
+            .options(joinedload(Deployment.website, innerjoin=True))
+            .where(Deployment.id == deployment_id)
+        )
+        return result.scalars().first()
+    except SQLAlchemyError as e:
+        logger.error(f"Error fetching deployment {deployment_id}: {str(e)}")
+        raise
+
+async def get_deployments_by_website(
+    db: AsyncSession,
+    website_id: int,
+    skip: int = 0,
+    limit: int = 20
+) -> List[Deployment]:
+    """Get the most recent deployment jobs of a website"""
+    try:
+        result = await db.execute(
+            select(Deployment)
+            .where(Deployment.website_id == website_id)
+            .order_by(Deployment.id.desc())
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+    except SQLAlchemyError as e:
+        logger.error(f"Error fetching deployments for website {website_id}: {str(e)}")
+        raise
+
+async def get_all_deployments(
+    db: AsyncSession,
+    status: Optional[DeploymentStatus] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[Deployment]:
+    """Get deployment jobs across all websites, newest first"""
+    try:
+        query = select(Deployment)
+        if status:
+            query = query.where(Deployment.status == status)
+        result = await db.execute(
+            query.order_by(Deployment.id.desc())
+                 .offset(skip)
+                 .limit(limit)
+        )
+        return list(result.scalars().all())
+    except SQLAlchemyError as e:
+        logger.error(f"Error fetching deployments: {str(e)}")
+        raise
+
+async def count_pending_deployments(db: AsyncSession) -> int:
+    """Number of jobs waiting for a worker"""
+    try:
+        return await db.scalar(
+            select(func.count())
+            .select_from(Deployment)
+            .where(Deployment.status == DeploymentStatus.QUEUED)
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Error counting pending deployments: {str(e)}")
+        raise
+
+async def get_queued_deployment(db: AsyncSession, website_id: int) -> Optional[Deployment]:
+    """The job of a website waiting for a worker, if any (there is at most one)"""
+    try:
+        result = await db.execute(
+            select(Deployment)
+            .where(Deployment.website_id == website_id, Deployment.status == DeploymentStatus.QUEUED)
+        )
+        return result.scalars().first()
+    except SQLAlchemyError as e:
+        logger.error(f"Error fetching queued deployment of website {website_id}: {str(e)}")
+        raise
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Select
+
+from ..models.review import Review
+from ..models.user import User
+from ..models.website import Website, WebsiteStatus
+
+
+class QueryFilter:
+    """
+    Optional criteria of a list query, turned into SQL predicates.
+
+    Subclasses are dataclasses whose fields default to None, meaning "no
+    constraint"; clauses() returns the predicates of the fields that are set,
+    so filters can be built straight from query parameters and combined.
+    """
+
+    def clauses(self) -> List:
+        raise NotImplementedError
+
+    def apply(self, query: Select) -> Select:
+        clauses = self.clauses()
+        return query.where(*clauses) if clauses else query
+
+
+def _created_between(model, after: Optional[datetime], before: Optional[datetime]) -> List:
+    clauses = []
+    if after is not None:
+        clauses.append(model.created_at >= after)
+    if before is not None:
+        clauses.append(model.created_at < before)
+    return clauses
+
+
+@dataclass
+class ReviewFilter(QueryFilter):
+    website_id: Optional[int] = None
+    user_id: Optional[int] = None
+    min_rating: Optional[int] = None
+    max_rating: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    def clauses(self) -> List:
+        clauses = _created_between(Review, self.created_after, self.created_before)
+        if self.website_id is not None:
+            clauses.append(Review.website_id == self.website_id)
+        if self.user_id is not None:
+            clauses.append(Review.user_id == self.user_id)
+        if self.min_rating is not None:
+            clauses.append(Review.rating >= self.min_rating)
+        if self.max_rating is not None:
+            clauses.append(Review.rating <= self.max_rating)
+        return clauses
+
+
+@dataclass
+class UserFilter(QueryFilter):
+    is_active: Optional[bool] = None
+    is_admin: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    def clauses(self) -> List:
+        clauses = _created_between(User, self.created_after, self.created_before)
+        if self.is_active is not None:
+            clauses.append(User.is_active.is_(self.is_active))
+        if self.is_admin is not None:
+            clauses.append(User.is_admin.is_(self.is_admin))
+        return clauses
+
+
+@dataclass
+class WebsiteFilter(QueryFilter):
+    status: Optional[WebsiteStatus] = None
+    owner_id: Optional[int] = None
+    # Unexpired websites only (expiry not set or in the future)
+    active: Optional[bool] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    def clauses(self) -> List:
+        clauses = _created_between(Website, self.created_after, self.created_before)
+        if self.status is not None:
+            clauses.append(Website.status == self.status)
+        if self.owner_id is not None:
+            clauses.append(Website.user_id == self.owner_id)
+        if self.active:
+            clauses.append((Website.expires_at.is_(None)) | (Website.expires_at >= datetime.utcnow()))
+        return clauses
@@ -0,0 +1,47 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Select, tuple_
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque cursor pointing just past the row (created_at, row_id)"""
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+
+def paginate(query: Select, model, skip: int, limit: int, cursor: Optional[str] = None) -> Select:
+    """
+    Order query newest first and select one page of it.
+
+    With a cursor the page starts right after the row it names, which the
+    (created_at, id) indexes answer without reading the skipped rows; skip
+    is then ignored. Without one it falls back to OFFSET for older clients.
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        return query.where(tuple_(model.created_at, model.id) < tuple_(created_at, row_id)).limit(limit)
+    return query.offset(skip).limit(limit)
+
+
+def next_cursor(rows: List, limit: int) -> Optional[str]:
+    """Cursor of the page after rows, or None when rows was the last page"""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].created_at, rows[-1].id)
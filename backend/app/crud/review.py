@@ -1,40 +1,104 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
 from ..models.review import Review
+from ..models.user import User
+from ..models.website import Website
 from datetime import datetime, timedelta
 from typing import Optional
 from app.schemas import review
+from .filters import ReviewFilter
+from .pagination import paginate
 
-def get_review(db: Session, review_id: int):
-    return db.query(Review).filter(Review.id == review_id).first()
+# Reviews are returned with their author and website (and its owner), all
+# many-to-one, so they are joined into the review query. Anything else the
+# schemas do not read raises instead of lazily issuing a query per row.
+REVIEW_LOADS = (
+    joinedload(Review.user),
+    joinedload(Review.website).joinedload(Website.owner, innerjoin=True),
+    raiseload("*"),
+)
+# Lists identify the website by id and name only
+REVIEW_LIST_LOADS = (
+    joinedload(Review.user),
+    joinedload(Review.website).load_only(Website.id, Website.name),
+    raiseload("*"),
+)
 
-def get_reviews_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(Review).filter(Review.user_id == user_id).offset(skip).limit(limit).all()
+async def get_review(db: AsyncSession, review_id: int):
+    result = await db.execute(
+        select(Review)
+        .options(*REVIEW_LOADS)
+        .where(Review.id == review_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
 
-def get_all_reviews(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Review).offset(skip).limit(limit).all()
+async def get_reviews_by_user(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    query = select(Review).options(*REVIEW_LIST_LOADS).where(Review.user_id == user_id)
+    result = await db.execute(paginate(query, Review, skip, limit, cursor))
+    return list(result.scalars().all())
 
-def create_review(db: Session, review: review.ReviewCreate, user_id: int):
+async def get_reviews_version(db: AsyncSession, user_id: Optional[int] = None) -> tuple:
+    """
+    Cheap version of a review list (all reviews, or one author's): it changes
+    when a review is added, edited or deleted, or a website or user the list
+    names is modified. Other websites and users do not count, so deploys and
+    sweeps of sites nobody reviewed leave it alone.
+    """
+    scope = [Review.user_id == user_id] if user_id is not None else []
+    query = select(
+        func.count(),
+        func.max(Review.updated_at),
+        func.max(Review.id),
+        select(func.max(Website.updated_at))
+        .where(Website.id.in_(select(Review.website_id).where(*scope)))
+        .scalar_subquery(),
+        select(func.max(User.updated_at))
+        .where(User.id.in_(select(Review.user_id).where(*scope)))
+        .scalar_subquery(),
+    ).select_from(Review).where(*scope)
+    return tuple((await db.execute(query)).one())
+
+async def get_all_reviews(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filters: Optional[ReviewFilter] = None
+):
+    query = select(Review).options(*REVIEW_LIST_LOADS)
+    if filters:
+        query = filters.apply(query)
+    result = await db.execute(paginate(query, Review, skip, limit, cursor))
+    return list(result.scalars().all())
+
+async def create_review(db: AsyncSession, review: review.ReviewCreate, user_id: int):
     db_review = Review(**review.dict(), user_id=user_id)
     db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
-    return db_review
+    await db.commit()
+    return await get_review(db, db_review.id)
 
-def update_review(db: Session, review_id: int, review_update: review.ReviewUpdate):
-    db_review = get_review(db, review_id)
+async def update_review(db: AsyncSession, review_id: int, review_update: review.ReviewUpdate):
+    db_review = await get_review(db, review_id)
     if not db_review:
         return None
     update_data = review_update.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_review, key, value)
-    db.commit()
-    db.refresh(db_review)
-    return db_review
+    await db.commit()
+    return await get_review(db, review_id)
 
-def delete_review(db: Session, review_id: int):
-    db_review = get_review(db, review_id)
+async def delete_review(db: AsyncSession, review_id: int):
+    db_review = await get_review(db, review_id)
     if not db_review:
         return None
-    db.delete(db_review)
-    db.commit()
-    return True
\ No newline at end of file
+    await db.delete(db_review)
+    await db.commit()
+    return True
@@ -1,72 +1,87 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from ..models.user import User
 from ..schemas.user import UserCreate, UserUpdate
-from ..core.security import get_password_hash
+from ..core.principal_cache import principal_cache
+from ..core.security import hash_password_async
+from .filters import UserFilter
+from .pagination import paginate
 from typing import List, Optional
 import logging
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-def get_user(db: Session, user_id: int) -> Optional[User]:
+async def get_user(db: AsyncSession, user_id: int) -> Optional[User]:
     """Get a single user by ID"""
     try:
-        return db.query(User).filter(User.id == user_id).first()
+        return await db.get(User, user_id)
     except SQLAlchemyError as e:
         logger.error(f"Error getting user {user_id}: {str(e)}")
         raise
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Get a user by email address"""
     try:
-        return db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
     except SQLAlchemyError as e:
         logger.error(f"Error getting user by email {email}: {str(e)}")
         raise
 
-def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
-    """Get list of users with pagination"""
+async def get_users(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filters: Optional[UserFilter] = None
+) -> List[User]:
+    """Get list of users with pagination and optional filtering, newest first"""
     try:
-        return db.query(User).offset(skip).limit(limit).all()
+        query = select(User)
+        if filters:
+            query = filters.apply(query)
+        result = await db.execute(paginate(query, User, skip, limit, cursor))
+        return list(result.scalars().all())
     except SQLAlchemyError as e:
         logger.error(f"Error getting users: {str(e)}")
         raise
 
-def create_user(db: Session, user: UserCreate) -> User:
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """Create a new user"""
     try:
         # Check if user already exists
-        if get_user_by_email(db, user.email):
+        if await get_user_by_email(db, user.email):
             raise ValueError(f"User with email {user.email} already exists")
         
         db_user = User(
             email=user.email,
-            hashed_password=get_password_hash(user.password),
+            hashed_password=await hash_password_async(user.password),
             full_name=user.full_name,
             is_admin=False  # Default to non-admin
         )
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         logger.info(f"Created new user with ID {db_user.id}")
         return db_user
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating user: {str(e)}")
         raise
 
-def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
+async def update_user(db: AsyncSession, user_id: int, user_update: UserUpdate) -> Optional[User]:
     """Update user information"""
     try:
-        db_user = get_user(db, user_id)
+        db_user = await get_user(db, user_id)
         if not db_user:
             return None
         
         update_data = user_update.dict(exclude_unset=True)
         
         if "password" in update_data:
-            update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+            update_data["hashed_password"] = await hash_password_async(update_data.pop("password"))
         
         # Set updated_at timestamp
         update_data["updated_at"] = datetime.utcnow()
@@ -75,44 +90,47 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[
             if hasattr(db_user, key):
                 setattr(db_user, key, value)
         
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        principal_cache.invalidate_user(user_id)
         logger.info(f"Updated user {user_id}")
         return db_user
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating user {user_id}: {str(e)}")
         raise
 
-def delete_user(db: Session, user_id: int) -> bool:
+async def delete_user(db: AsyncSession, user_id: int) -> bool:
     """Delete a user"""
     try:
-        db_user = get_user(db, user_id)
+        db_user = await get_user(db, user_id)
         if not db_user:
             return False
         
-        db.delete(db_user)
-        db.commit()
+        await db.delete(db_user)
+        await db.commit()
+        principal_cache.invalidate_user(user_id)
         logger.info(f"Deleted user {user_id}")
         return True
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting user {user_id}: {str(e)}")
         raise
 
-def set_admin_status(db: Session, user_id: int, is_admin: bool) -> Optional[User]:
+async def set_admin_status(db: AsyncSession, user_id: int, is_admin: bool) -> Optional[User]:
     """Set admin status for a user"""
     try:
-        db_user = get_user(db, user_id)
+        db_user = await get_user(db, user_id)
         if not db_user:
             return None
         
         db_user.is_admin = is_admin
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        principal_cache.invalidate_user(user_id)
         logger.info(f"Set admin status for user {user_id} to {is_admin}")
         return db_user
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error setting admin status for user {user_id}: {str(e)}")
         raise
\ No newline at end of file
@@ -1,76 +1,114 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, joinedload, raiseload, selectinload
 from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime, timedelta
 from typing import List, Optional
 import logging
 
+from ..models.user import User
 from ..models.website import Website, WebsiteStatus
 from ..schemas.website import WebsiteCreate, WebsiteUpdate
 from ..core.logger import logger
+from .filters import WebsiteFilter
+from .pagination import paginate
 
-def get_website(db: Session, website_id: int) -> Optional[Website]:
+# Websites are returned with their owner (joined: every website has one); other
+# relationships raise rather than lazily query per row
+DETAIL_LOADS = (joinedload(Website.owner, innerjoin=True), raiseload("*"))
+# List pages never return the deployment log, which can be large
+LIST_LOADS = DETAIL_LOADS + (defer(Website.deployment_log),)
+
+async def get_website(db: AsyncSession, website_id: int) -> Optional[Website]:
     """Get a single website by ID with owner relationship loaded"""
     try:
-        return db.query(Website)\
-               .options(joinedload(Website.owner))\
-               .filter(Website.id == website_id)\
-               .first()
+        result = await db.execute(
+            select(Website)
+            .options(*DETAIL_LOADS)
+            .where(Website.id == website_id)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
     except SQLAlchemyError as e:
         logger.error(f"Error fetching website {website_id}: {str(e)}")
         raise
 
-def get_websites_by_user(
-    db: Session, 
+async def get_websites_by_ids(db: AsyncSession, website_ids: List[int]) -> List[Website]:
+    """Get several websites by ID in one query"""
+    try:
+        result = await db.execute(
+            select(Website)
+            .options(*DETAIL_LOADS)
+            .where(Website.id.in_(website_ids))
+        )
+        return list(result.scalars().all())
+    except SQLAlchemyError as e:
+        logger.error(f"Error fetching websites {website_ids}: {str(e)}")
+        raise
+
+async def get_websites_by_user(
+    db: AsyncSession, 
     user_id: int, 
     skip: int = 0, 
     limit: int = 100,
-    include_expired: bool = False
+    include_expired: bool = False,
+    cursor: Optional[str] = None
 ) -> List[Website]:
-    """Get paginated websites for a specific user"""
+    """Get paginated websites for a specific user, newest first"""
     try:
-        query = db.query(Website)\
-                 .filter(Website.user_id == user_id)
+        query = select(Website).options(*LIST_LOADS)
+        query = WebsiteFilter(owner_id=user_id, active=not include_expired).apply(query)
         
-        if not include_expired:
-            query = query.filter(
-                (Website.expires_at.is_(None)) | 
-                (Website.expires_at >= datetime.utcnow())
-            )
-        
-        return query.order_by(Website.created_at.desc())\
-                   .offset(skip)\
-                   .limit(limit)\
-                   .all()
+        result = await db.execute(paginate(query, Website, skip, limit, cursor))
+        return list(result.scalars().all())
     except SQLAlchemyError as e:
         logger.error(f"Error fetching websites for user {user_id}: {str(e)}")
         raise
 
-def get_all_websites(
-    db: Session,
+async def get_websites_version(db: AsyncSession, user_id: int) -> tuple:
+    """
+    Cheap version of a user's website list: it changes when one of their
+    unexpired websites is added, modified, deleted or expires, or the user
+    (the owner shown on every row) is modified
+    """
+    try:
+        query = select(
+            func.count(),
+            func.max(Website.updated_at),
+            func.max(Website.id),
+            select(User.updated_at).where(User.id == user_id).scalar_subquery(),
+        )
+        query = WebsiteFilter(owner_id=user_id, active=True).apply(query.select_from(Website))
+        return tuple((await db.execute(query)).one())
+    except SQLAlchemyError as e:
+        logger.error(f"Error fetching website list version for user {user_id}: {str(e)}")
+        raise
+
+async def get_all_websites(
+    db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
-    only_active: bool = True
+    only_active: bool = True,
+    cursor: Optional[str] = None,
+    filters: Optional[WebsiteFilter] = None
 ) -> List[Website]:
-    """Get all websites with optional filtering"""
+    """Get all websites with optional filtering, newest first"""
     try:
-        query = db.query(Website)
+        query = select(Website).options(*LIST_LOADS)
         
         if only_active:
-            query = query.filter(
-                (Website.expires_at.is_(None)) | 
-                (Website.expires_at >= datetime.utcnow())
-            )
+            query = WebsiteFilter(active=True).apply(query)
+        if filters:
+            query = filters.apply(query)
         
-        return query.order_by(Website.created_at.desc())\
-                   .offset(skip)\
-                   .limit(limit)\
-                   .all()
+        result = await db.execute(paginate(query, Website, skip, limit, cursor))
+        return list(result.scalars().all())
     except SQLAlchemyError as e:
         logger.error(f"Error fetching all websites: {str(e)}")
         raise
 
-def create_website(
-    db: Session, 
+async def create_website(
+    db: AsyncSession, 
     website: WebsiteCreate, 
     user_id: int, 
     port: int,
@@ -92,22 +130,21 @@ def create_website(
         )
         
         db.add(db_website)
-        db.commit()
-        db.refresh(db_website)
-        return db_website
+        await db.commit()
+        return await get_website(db, db_website.id)
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating website: {str(e)}")
         raise
 
-def update_website(
-    db: Session, 
+async def update_website(
+    db: AsyncSession, 
     website_id: int, 
     website_update: WebsiteUpdate
 ) -> Optional[Website]:
     """Update website details with proper change tracking"""
     try:
-        db_website = get_website(db, website_id)
+        db_website = await get_website(db, website_id)
         if not db_website:
             return None
         
@@ -122,40 +159,46 @@ def update_website(
         
         if changes:
             logger.info(f"Updating website {website_id}: {', '.join(changes)}")
-            db.commit()
-            db.refresh(db_website)
+            await db.commit()
+            db_website = await get_website(db, website_id)
         
         return db_website
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating website {website_id}: {str(e)}")
         raise
 
-def delete_website(db: Session, website_id: int) -> bool:
+async def delete_website(db: AsyncSession, website_id: int) -> bool:
     """Delete a website with proper transaction handling"""
     try:
-        db_website = get_website(db, website_id)
+        # Reviews are deleted through the ORM cascade, so they must be loaded up front
+        result = await db.execute(
+            select(Website)
+            .options(selectinload(Website.reviews))
+            .where(Website.id == website_id)
+        )
+        db_website = result.scalars().first()
         if not db_website:
             return False
         
-        db.delete(db_website)
-        db.commit()
+        await db.delete(db_website)
+        await db.commit()
         logger.info(f"Deleted website {website_id}")
         return True
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting website {website_id}: {str(e)}")
         raise
 
-def update_website_status(
-    db: Session,
+async def update_website_status(
+    db: AsyncSession,
     website_id: int,
     status: WebsiteStatus,
     pid: Optional[int] = None
 ) -> Optional[Website]:
     """Update website status and process ID atomically"""
     try:
-        db_website = get_website(db, website_id)
+        db_website = await get_website(db, website_id)
         if not db_website:
             return None
         
@@ -163,30 +206,29 @@ def update_website_status(
         if pid is not None:
             db_website.pid = pid
         
-        db.commit()
-        db.refresh(db_website)
-        return db_website
+        await db.commit()
+        return await get_website(db, website_id)
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(
             f"Error updating status for website {website_id} "
             f"to {status}: {str(e)}"
         )
         raise
 
-def get_websites_by_status(
-    db: Session,
+async def get_websites_by_status(
+    db: AsyncSession,
     status: WebsiteStatus,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ) -> List[Website]:
-    """Get websites filtered by status"""
+    """Get websites filtered by status, newest first"""
     try:
-        return db.query(Website)\
-               .filter(Website.status == status)\
-               .offset(skip)\
-               .limit(limit)\
-               .all()
+        query = select(Website).options(*LIST_LOADS)
+        query = WebsiteFilter(status=status).apply(query)
+        result = await db.execute(paginate(query, Website, skip, limit, cursor))
+        return list(result.scalars().all())
     except SQLAlchemyError as e:
         logger.error(f"Error fetching {status} websites: {str(e)}")
         raise
\ No newline at end of file
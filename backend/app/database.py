@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -14,16 +16,29 @@ engine = create_engine(
     pool_pre_ping=True,  # Recommended for PostgreSQL
 )
 
-# Explicitly create the public schema if it doesn't exist
-try:
-    with engine.connect() as conn:
-        conn.execute(text("CREATE SCHEMA IF NOT EXISTS public"))
-        conn.commit()
-except Exception as e:
-    print(f"Warning: Could not create schema: {e}")
-
+# The schema is owned by the Alembic migrations in migrations/; nothing here runs DDL
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the API; threads, services and scripts keep the sync engine
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def _async_url(url: str):
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername))
+
+async_engine = create_async_engine(
+    _async_url(DATABASE_URL),
+    pool_pre_ping=True,
+)
+
+# Objects stay usable after commit: attributes are never lazily reloaded under asyncio
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -33,4 +48,11 @@ def get_db():
     finally:
         db.close()
 
-__all__ = ["SessionLocal", "engine", "Base", "get_db"]
\ No newline at end of file
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+__all__ = [
+    "SessionLocal", "engine", "Base", "get_db",
+    "AsyncSessionLocal", "async_engine", "get_async_db",
+]
\ No newline at end of file
@@ -1,5 +1,9 @@
-from fastapi import FastAPI
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from .api.routes import auth
 from .api.routes.users import router as users_router
 from .api.routes.users import admin_router as users_admin_router
@@ -7,11 +11,89 @@ from .api.routes.websites import router as websites_router
 from .api.routes.websites import admin_router as websites_admin_router
 from .api.routes.reviews import router as reviews_router
 from .api.routes.reviews import admin_router as reviews_admin_router
-from .database import engine, Base
+from .api.routes.deployments import router as deployments_router
+from .api.routes.deployments import admin_router as deployments_admin_router
+from .database import async_engine, engine
+from .services.deploy_queue import DeploymentQueue
+from .services.events import EventBroker
+from .services.user_changes import UserChangeListener
+from .services.expiry import ExpirySweeper
+from .services.leader import HostLeader
+from .services.reconciler import reconcile_sites
+from .services.runner_client import RunnerUnavailableError
+from .core.config import settings
+from .core.logger import logger
+from .core.query_budget import QueryBudgetMiddleware, install as install_query_counter
+from .core.security import PasswordHasher, PasswordHasherBusy
+from .crud.pagination import InvalidCursorError
 
-Base.metadata.create_all(bind=engine)
+def _start_background_services():
+    """
+    Let the deployment workers loose, then wait to become the host leader: the
+    one API worker that restores sites from the last run (unless the site runner
+    daemon owns them) and sweeps expired ones
+    """
+    DeploymentQueue().start()
+    embedded = not settings.SITE_RUNNER_SOCKET
+    if embedded and settings.HIBERNATE_IDLE_SECONDS and settings.WEB_CONCURRENCY > 1:
+        # The activator's sockets live in the worker that deployed the site
+        logger.warning("Hibernation needs the site runner or a single API worker: set SITE_RUNNER_SOCKET")
+    HostLeader().acquire()
+    try:
+        if embedded:
+            reconcile_sites()
+    except Exception as e:
+        logger.error(f"Startup reconciliation failed: {str(e)}")
+    finally:
+        ExpirySweeper().start()
 
-app = FastAPI(title="Deployment Manager API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Reconcile off the event loop so the API accepts requests meanwhile
+    threading.Thread(target=_start_background_services, name="startup", daemon=True).start()
+    # Principals cached by this worker follow user changes made by the others
+    UserChangeListener().start()
+    yield
+    await UserChangeListener().stop()
+    await EventBroker().stop()
+    ExpirySweeper().stop()
+    DeploymentQueue().stop()
+    HostLeader().release()
+    PasswordHasher().shutdown()
+    await async_engine.dispose()
+
+app = FastAPI(title="Deployment Manager API", lifespan=lifespan)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    # Logins, registrations and password changes all wait for the hashing pool
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
+@app.exception_handler(RunnerUnavailableError)
+async def runner_unavailable_handler(request: Request, exc: RunnerUnavailableError):
+    # Starting, stopping and deploying sites all go through the site runner daemon
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Site runner is unavailable"},
+        headers={"Retry-After": "5"}
+    )
+
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursorError):
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
+# Statement counting costs an event hook per query, so it is only installed when enabled
+if settings.QUERY_BUDGET_MODE != "off":
+    install_query_counter(async_engine, engine)
+    app.add_middleware(QueryBudgetMiddleware)
+
+# List pages compress well (repeated keys, deployment logs); event streams are never buffered
+if settings.GZIP_MIN_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_SIZE, compresslevel=settings.GZIP_LEVEL)
 
 # Add CORS middleware configuration
 app.add_middleware(
@@ -20,6 +102,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    # Keyset pagination of list endpoints; ETags to revalidate lists with If-None-Match
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Include authentication router
@@ -29,11 +113,13 @@ app.include_router(auth.router)
 app.include_router(users_router)
 app.include_router(websites_router)
 app.include_router(reviews_router)
+app.include_router(deployments_router)
 
 # Include admin routes
 app.include_router(users_admin_router)
 app.include_router(websites_admin_router)
 app.include_router(reviews_admin_router)
+app.include_router(deployments_admin_router)
 
 @app.get("/")
 def read_root():
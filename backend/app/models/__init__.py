@@ -1,3 +1,5 @@
 from .user import User
 from .website import Website
-from .review import Review
\ No newline at end of file
+from .review import Review
+from .deployment import Deployment
+from .site_process import SiteProcess
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, Text, text
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from enum import Enum
+from ..database import Base
+
+class DeploymentStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SUPERSEDED = "superseded"  # Given up for a newer deployment of the same website
+
+class Deployment(Base):
+    __tablename__ = "deployments"
+    # Deploy requests for a website with a job already waiting join that job
+    __table_args__ = (
+        Index(
+            "uq_deployments_website_id_queued",
+            "website_id",
+            unique=True,
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    website_id = Column(Integer, ForeignKey("websites.id", ondelete="CASCADE"), index=True, nullable=False)
+    requested_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    status = Column(String(20), default=DeploymentStatus.QUEUED, index=True, nullable=False)
+    stage = Column(String(50), nullable=True)  # Current step of a running job
+    commit_sha = Column(String(40), nullable=True)
+    error = Column(Text, nullable=True)
+    worker = Column(String(255), nullable=True)  # host:pid of the worker running the job
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    website = relationship("Website", back_populates="deployments")
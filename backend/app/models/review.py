@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..database import Base
 
 class Review(Base):
     __tablename__ = "reviews"
+    # Keyset pagination walks (created_at, id), optionally within one website or author
+    __table_args__ = (
+        Index("ix_reviews_created_at_id", "created_at", "id"),
+        Index("ix_reviews_website_id_created_at_id", "website_id", "created_at", "id"),
+        Index("ix_reviews_user_id_created_at_id", "user_id", "created_at", "id"),
+        # max(updated_at) versions the list for conditional GETs
+        Index("ix_reviews_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String)
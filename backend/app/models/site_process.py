@@ -0,0 +1,15 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from datetime import datetime
+from ..database import Base
+
+class SiteProcess(Base):
+    """A site server process, recorded so every API worker can inspect and stop it"""
+    __tablename__ = "site_processes"
+
+    port = Column(Integer, primary_key=True)
+    pid = Column(Integer, nullable=False)
+    pgid = Column(Integer, nullable=False)
+    # Clock ticks after boot the process started at (/proc/<pid>/stat): tells a reused pid apart
+    start_time = Column(BigInteger, nullable=False)
+    host = Column(String(255), nullable=False)  # Host whose process table pid belongs to
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
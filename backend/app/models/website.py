@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Enum as SAEnum, Integer, String, DateTime, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship, validates
 from datetime import datetime
 from enum import Enum
@@ -10,16 +10,35 @@ class WebsiteStatus(str, Enum):
     RUNNING = "running"
     DEPLOYING = "deploying"
     ERROR = "error"
+    HIBERNATED = "hibernated"
+
+# Statuses in which the site answers requests (a hibernated one wakes on demand)
+SERVING_STATUSES = (WebsiteStatus.RUNNING, WebsiteStatus.HIBERNATED)
 
 class Website(Base):
     __tablename__ = "websites"
+    # Keyset pagination walks (created_at, id), optionally within one owner or status
+    __table_args__ = (
+        Index("ix_websites_created_at_id", "created_at", "id"),
+        Index("ix_websites_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_websites_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_websites_expires_at", "expires_at"),
+        # The expiry sweep walks the serving sites of one status in expiry order
+        Index("ix_websites_status_expires_at_id", "status", "expires_at", "id"),
+        Index("ix_websites_updated_at", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), index=True, nullable=False)
     custom_domain = Column(String(255), unique=True, nullable=True)
     git_repo = Column(String(512), nullable=False)
     port = Column(Integer, unique=True, nullable=False)
-    status = Column(String(50), default=WebsiteStatus.STOPPED, nullable=False)
+    # A native enum on PostgreSQL (4 bytes per row and per index entry), values as plain strings
+    status = Column(
+        SAEnum(*[s.value for s in WebsiteStatus], name="website_status"),
+        default=WebsiteStatus.STOPPED,
+        nullable=False
+    )
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -29,6 +48,12 @@ class Website(Base):
 
     owner = relationship("User", back_populates="websites")
     reviews = relationship("Review", back_populates="website", cascade="all, delete-orphan")
+    deployments = relationship(
+        "Deployment",
+        back_populates="website",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
 
     @property
     def url(self):
@@ -1,8 +1,8 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
-from .user import User
-from .website import Website
+from .user import User, UserSummary
+from .website import Website, WebsiteRef
 
 class ReviewBase(BaseModel):
     content: str
@@ -27,5 +27,17 @@ class Review(ReviewBase):
     user_full_name: Optional[str] = None
     website_name: Optional[str] = None
 
+    class Config:
+        from_attributes = True
+
+class ReviewSummary(ReviewBase):
+    """A review as listed, with its author and website reduced to what identifies them"""
+    id: int
+    user_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    user: Optional[UserSummary] = None
+    website: Optional[WebsiteRef] = None
+
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -17,6 +17,16 @@ class UserUpdate(BaseModel):
     is_active: Optional[bool] = None
     is_admin: Optional[bool] = None
 
+class UserSummary(BaseModel):
+    """Who owns a website or wrote a review, as nested in list responses"""
+    id: int
+    # Validated when stored; re-checking EmailStr on output costs more than the rest of the row
+    email: str
+    full_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 class User(UserBase):
     id: int
     is_active: bool
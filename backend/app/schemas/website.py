@@ -1,15 +1,16 @@
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 from ..core.config import settings
-from .user import User
+from .user import User, UserSummary
 
 class WebsiteStatus(str, Enum):
     STOPPED = "stopped"
     RUNNING = "running"
     DEPLOYING = "deploying"
     ERROR = "error"
+    HIBERNATED = "hibernated"
 
 class WebsiteBase(BaseModel):
     name: str = Field(..., max_length=255, example="My Awesome Site")
@@ -53,6 +54,59 @@ class Website(WebsiteBase):
 
     class Config:
         from_attributes = True
-        json_encoders = {
-            datetime: lambda v: v.isoformat(),
-        }
\ No newline at end of file
+
+class WebsiteSummary(BaseModel):
+    """A website as listed: no deployment log or process details"""
+    id: int
+    name: str
+    git_repo: str
+    port: int
+    status: WebsiteStatus
+    user_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    url: Optional[str] = None
+    custom_domain: Optional[str] = None
+    owner: Optional[UserSummary] = None
+
+    class Config:
+        from_attributes = True
+
+class WebsiteEvent(BaseModel):
+    """A website status change, as sent on the event streams"""
+    id: int
+    user_id: int
+    name: str
+    status: str  # A WebsiteStatus, or "deleted"
+
+class WebsiteRef(BaseModel):
+    """The website a review is about"""
+    id: int
+    name: str
+
+    class Config:
+        from_attributes = True
+
+class WebsiteIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class ExpirySweep(BaseModel):
+    """Outcome of an expiry sweep"""
+    dry_run: bool
+    expired: int
+    stopped: int
+    processes: int
+    failed: int
+    website_ids: List[int]
+
+class Release(BaseModel):
+    commit: str
+    activated_at: datetime
+    current: bool
+
+class LogChunk(BaseModel):
+    offset: int = Field(..., description="Byte offset the content starts at")
+    next_offset: int = Field(..., description="Offset to request next (or to stream from)")
+    size: int = Field(..., description="Current size of the log file in bytes")
+    content: str
@@ -0,0 +1,230 @@
+import os
+import selectors
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..core.logger import logger
+from ..core.metrics import metrics
+from .supervisor import ProcessSupervisor
+
+LISTEN_BACKLOG = 512
+# A server that dies before it is ready is not restarted sooner than this
+RESTART_BACKOFF = 5.0
+
+
+class ActivatedSite:
+    """State of one socket-activated site"""
+
+    def __init__(self, port: int, sock: socket.socket, serve_dir: Path, log_path: str):
+        self.port = port
+        self.sock = sock
+        self.serve_dir = serve_dir
+        self.log_path = log_path
+        self.process: Optional[subprocess.Popen] = None
+        self.pidfd: Optional[int] = None
+        self.ready_fd: Optional[int] = None
+        self.woken_at: Optional[float] = None
+        self.failed_at = 0.0
+        self.listening = False  # Listen socket registered with the selector
+
+
+class SocketActivator:
+    """
+    Scale-to-zero serving for sites in process mode.
+
+    The manager owns every site's listening socket. A site's server inherits
+    it, serves until it has been idle for idle_timeout and exits; connections
+    that arrive while it sleeps wait in the socket's backlog until the watcher
+    thread sees the socket readable and starts the server again, so none are
+    refused. on_change(port, pid) is called when a site wakes (pid) or falls
+    asleep (None).
+    """
+
+    def __init__(
+        self,
+        supervisor: ProcessSupervisor,
+        on_change: Callable[[int, Optional[int]], None],
+        idle_timeout: float
+    ):
+        self.supervisor = supervisor
+        self.on_change = on_change
+        self.idle_timeout = idle_timeout
+        self._sites: Dict[int, ActivatedSite] = {}
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._watcher: Optional[threading.Thread] = None
+
+    def register(self, port: int, serve_dir: Path, log_path: str, start: bool = True) -> Optional[int]:
+        """Take over port for serve_dir; returns the server pid, or None while asleep"""
+        with self._lock:
+            site = self._sites.get(port)
+            if site is not None:
+                return site.process.pid if site.process else None
+
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.bind(("0.0.0.0", port))
+                sock.listen(LISTEN_BACKLOG)
+                sock.setblocking(False)
+            except OSError:
+                sock.close()
+                raise
+            site = ActivatedSite(port, sock, serve_dir, log_path)
+            self._sites[port] = site
+            if start:
+                self._spawn(site)
+            else:
+                self._listen(site)
+            self._ensure_watcher()
+            return site.process.pid if site.process else None
+
+    def unregister(self, port: int) -> Optional[int]:
+        """Release port; returns the pid of a server still running, for the caller to stop"""
+        with self._lock:
+            site = self._sites.pop(port, None)
+            if site is None:
+                return None
+            if site.listening:
+                self._selector.unregister(site.sock)
+            site.sock.close()
+            self._close_process_fds(site)
+            return site.process.pid if site.process else None
+
+    def is_registered(self, port: int) -> bool:
+        return port in self._sites
+
+    def pid(self, port: int) -> Optional[int]:
+        site = self._sites.get(port)
+        return site.process.pid if site and site.process else None
+
+    def _listen(self, site: ActivatedSite):
+        """Wait for the next connection on a sleeping site (caller holds the lock)"""
+        if not site.listening:
+            self._selector.register(site.sock, selectors.EVENT_READ, ("listen", site.port))
+            site.listening = True
+
+    def _spawn(self, site: ActivatedSite, woken_at: Optional[float] = None):
+        """Start the site's server on the shared socket (caller holds the lock)"""
+        if site.listening:
+            self._selector.unregister(site.sock)
+            site.listening = False
+
+        ready_r, ready_w = os.pipe()
+        listen_fd = site.sock.fileno()
+        command = [
+            sys.executable, "-m", "app.services.static_server",
+            "--listen-fd", str(listen_fd),
+            "--root", str(site.serve_dir),
+            "--idle-timeout", str(self.idle_timeout),
+            "--ready-fd", str(ready_w),
+        ]
+        try:
+            with open(site.log_path, "a") as log_f:
+                site.process = subprocess.Popen(
+                    command,
+                    cwd=Path(__file__).resolve().parents[2],
+                    pass_fds=(listen_fd, ready_w),
+                    preexec_fn=os.setsid,
+                    stdout=log_f,
+                    stderr=subprocess.STDOUT
+                )
+        except OSError:
+            os.close(ready_r)
+            raise
+        finally:
+            os.close(ready_w)
+        self.supervisor.track(site.process)
+        site.woken_at = woken_at
+
+        site.ready_fd = ready_r
+        self._selector.register(ready_r, selectors.EVENT_READ, ("ready", site.port))
+        try:
+            site.pidfd = os.pidfd_open(site.process.pid)
+            self._selector.register(site.pidfd, selectors.EVENT_READ, ("exit", site.port))
+        except (AttributeError, OSError):
+            site.pidfd = None  # Exits are then noticed on the watcher's periodic pass
+
+    def _close_process_fds(self, site: ActivatedSite):
+        for attr in ("ready_fd", "pidfd"):
+            fd = getattr(site, attr)
+            if fd is not None:
+                self._selector.unregister(fd)
+                os.close(fd)
+                setattr(site, attr, None)
+
+    def _ensure_watcher(self):
+        if self._watcher is None or not self._watcher.is_alive():
+            self._watcher = threading.Thread(target=self._watch, name="socket-activator", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            events = self._selector.select(timeout=1.0)
+            changes: List[Tuple[int, Optional[int]]] = []
+            with self._lock:
+                for key, _ in events:
+                    kind, port = key.data
+                    site = self._sites.get(port)
+                    if site is None:
+                        continue  # Unregistered while we were waiting
+                    if kind == "listen" and site.listening:
+                        self._wake(site)
+                    elif kind == "ready" and site.ready_fd == key.fd:
+                        self._on_ready(site, changes)
+                    elif kind == "exit" and site.pidfd == key.fd:
+                        self._on_exit(site, changes)
+
+                now = time.monotonic()
+                for site in self._sites.values():
+                    if site.process is not None and site.process.poll() is not None:
+                        self._on_exit(site, changes)
+                    elif site.process is None and not site.listening and now - site.failed_at >= RESTART_BACKOFF:
+                        self._listen(site)
+                metrics.set_gauge(
+                    "hibernate.sleeping", sum(1 for s in self._sites.values() if s.process is None)
+                )
+
+            for port, pid in changes:
+                try:
+                    self.on_change(port, pid)
+                except Exception as e:
+                    logger.error(f"Error recording activation change for port {port}: {str(e)}")
+
+    def _wake(self, site: ActivatedSite):
+        logger.info(f"Waking site on port {site.port}")
+        try:
+            self._spawn(site, woken_at=time.monotonic())
+        except OSError as e:
+            logger.error(f"Could not wake site on port {site.port}: {str(e)}")
+            site.process = None
+            site.failed_at = time.monotonic()
+
+    def _on_ready(self, site: ActivatedSite, changes: List[Tuple[int, Optional[int]]]):
+        signalled = os.read(site.ready_fd, 1)
+        self._selector.unregister(site.ready_fd)
+        os.close(site.ready_fd)
+        site.ready_fd = None
+        if signalled and site.woken_at is not None:
+            metrics.observe("hibernate.wake_seconds", time.monotonic() - site.woken_at)
+            metrics.incr("hibernate.wakes")
+            changes.append((site.port, site.process.pid))
+        site.woken_at = None
+
+    def _on_exit(self, site: ActivatedSite, changes: List[Tuple[int, Optional[int]]]):
+        crashed = site.ready_fd is not None or site.process.poll() != 0
+        self._close_process_fds(site)
+        self.supervisor.reap_exited()
+        site.process = None
+        if crashed:
+            logger.error(f"Server for port {site.port} exited unexpectedly, retrying on the next connection")
+            site.failed_at = time.monotonic()
+        else:
+            logger.info(f"Site on port {site.port} hibernated")
+            self._listen(site)
+        changes.append((site.port, None))
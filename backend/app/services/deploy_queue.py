@@ -0,0 +1,364 @@
+import fcntl
+import os
+import socket
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from typing import Callable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import SessionLocal, engine
+from ..models.deployment import Deployment, DeploymentStatus
+from ..models.website import Website, WebsiteStatus, SERVING_STATUSES
+from ..crud.deployment import count_pending_deployments, get_queued_deployment
+from ..core.config import settings
+from ..core.logger import logger
+from ..core.metrics import metrics
+from .deployment import STATIC_SITES_DIR, DeploymentSuperseded, WebsiteProcessManager
+
+# First key of the (namespace, website id) advisory locks that serialize deployments of a site
+DEPLOY_LOCK_NAMESPACE = 0x6465706C
+# Each lost race to queue a website's job means another request queued one; bounds the retries
+ENQUEUE_ATTEMPTS = 10
+# How often a running deployment asks whether a newer one of its site is waiting
+SUPERSEDED_POLL_INTERVAL = 1.0
+
+
+class QueueFullError(Exception):
+    """Raised when the number of waiting deployments reached DEPLOY_QUEUE_MAX"""
+
+
+class DeploymentQueue:
+    """
+    Persisted deployment jobs executed by a bounded pool of worker threads.
+
+    Jobs are rows in the deployments table. Workers claim the oldest queued
+    row with SELECT ... FOR UPDATE SKIP LOCKED and run it with their own
+    session, so the pool size caps how many clones run at once. Threads are
+    enough here: the heavy lifting happens in git subprocesses.
+
+    A website has at most one queued job, which later requests join, and
+    one job running at a time, under a per-site lock held across workers and
+    hosts. The latest request wins: a running job that sees a newer one for
+    its site gives up its clone, unless it already activated. Stopping,
+    rolling back and deleting a site take the same lock (site_lock), so they
+    never interleave with a release being activated.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.workers = []
+            cls._instance._wakeup = threading.Condition()
+            cls._instance._stopping = threading.Event()
+            cls._instance.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+            cls._instance._running = 0
+            cls._instance._running_lock = threading.Lock()
+        return cls._instance
+
+    def start(self, size: Optional[int] = None):
+        """Start the worker threads (idempotent)"""
+        if self.workers:
+            return
+        self._stopping.clear()
+        self._requeue_orphaned_jobs()
+        for i in range(size or settings.DEPLOY_WORKERS):
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"deploy-worker-{i}",
+                daemon=True
+            )
+            worker.start()
+            self.workers.append(worker)
+        logger.info(f"Started {len(self.workers)} deployment workers")
+
+    def stop(self, timeout: float = 10.0):
+        """Ask workers to exit after their current job"""
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for worker in self.workers:
+            worker.join(timeout)
+        self.workers = []
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        website: Website,
+        requested_by: Optional[int] = None
+    ) -> Deployment:
+        """
+        Persist a deployment job for website and wake a worker, or return the
+        job already waiting for it (which supersedes one running for it)
+        """
+        website_id = website.id
+        for attempt in range(ENQUEUE_ATTEMPTS):
+            job = await get_queued_deployment(db, website_id)
+            if job is not None:
+                metrics.incr("deploy.coalesced")
+                return job
+
+            if await count_pending_deployments(db) >= settings.DEPLOY_QUEUE_MAX:
+                metrics.incr("deploy.rejected")
+                raise QueueFullError("Too many deployments are waiting, try again shortly")
+
+            job = Deployment(
+                website_id=website_id,
+                requested_by=requested_by,
+                status=DeploymentStatus.QUEUED
+            )
+            db.add(job)
+            # A serving site keeps its status until a release of the job is activated:
+            # superseded or failed before that, the job leaves it serving as it was
+            if website.status not in SERVING_STATUSES:
+                website.status = WebsiteStatus.DEPLOYING
+            try:
+                await db.commit()
+            except IntegrityError:
+                # A concurrent request queued one first (uq_deployments_website_id_queued);
+                # join it, or queue again if a worker claimed it meanwhile
+                await db.rollback()
+                if attempt == ENQUEUE_ATTEMPTS - 1:
+                    raise
+                # The rollback expired it, and an expired attribute can't load lazily under asyncio
+                await db.refresh(website)
+                continue
+            await db.refresh(job)
+            metrics.incr("deploy.enqueued")
+            with self._wakeup:
+                self._wakeup.notify()
+            return job
+
+    def _requeue_orphaned_jobs(self):
+        """Put back jobs that a previous run of this host left half-done"""
+        host = socket.gethostname()
+        with SessionLocal() as db:
+            orphaned = db.query(Deployment).filter(
+                Deployment.status == DeploymentStatus.RUNNING,
+                Deployment.worker.like(f"{host}:%")
+            ).all()
+            queued = set(db.scalars(
+                select(Deployment.website_id).where(
+                    Deployment.status == DeploymentStatus.QUEUED,
+                    Deployment.website_id.in_([job.website_id for job in orphaned])
+                )
+            ))
+            for job in orphaned:
+                # Our own id can only be stale here: no worker has started yet
+                if job.worker != self.worker_id and _pid_alive(int(job.worker.rsplit(":", 1)[1])):
+                    continue
+                if job.website_id in queued:
+                    logger.warning(f"Dropping interrupted deployment {job.id}, a newer one is queued")
+                    job.status = DeploymentStatus.SUPERSEDED
+                    job.finished_at = datetime.utcnow()
+                    continue
+                logger.warning(f"Requeueing interrupted deployment {job.id}")
+                job.status = DeploymentStatus.QUEUED
+                job.worker = None
+                job.stage = None
+                queued.add(job.website_id)
+            db.commit()
+
+    def _claim(self) -> Optional[int]:
+        """Atomically move the oldest queued job to running; returns its id"""
+        with SessionLocal() as db:
+            job = db.query(Deployment)\
+                    .filter(Deployment.status == DeploymentStatus.QUEUED)\
+                    .order_by(Deployment.id)\
+                    .with_for_update(skip_locked=True)\
+                    .first()
+            if not job:
+                return None
+            # Guard on the status too, for databases without row locks (e.g. SQLite)
+            started_at = datetime.utcnow()
+            claimed = db.query(Deployment)\
+                        .filter(Deployment.id == job.id, Deployment.status == DeploymentStatus.QUEUED)\
+                        .update(
+                            {"status": DeploymentStatus.RUNNING, "started_at": started_at, "worker": self.worker_id},
+                            synchronize_session="fetch"
+                        )
+            db.commit()
+            if not claimed:
+                return None
+            metrics.observe("deploy.queue_wait_seconds", (started_at - job.created_at).total_seconds())
+            return job.id
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                job_id = self._claim()
+            except Exception as e:
+                logger.error(f"Error claiming deployment job: {str(e)}")
+                job_id = None
+
+            if job_id is None:
+                with self._wakeup:
+                    self._wakeup.wait(settings.DEPLOY_POLL_INTERVAL)
+                continue
+            self._run(job_id)
+
+    def _run(self, job_id: int):
+        started = time.monotonic()
+        metrics.set_gauge("deploy.running", self._running_delta(1))
+        try:
+            with SessionLocal() as db:
+                website_id = db.scalar(select(Deployment.website_id).where(Deployment.id == job_id))
+            if website_id is None:
+                # The website (and its jobs) was deleted after the claim
+                return
+            with self.site_lock(website_id):
+                metrics.observe("deploy.lock_wait_seconds", time.monotonic() - started)
+                self._deploy(job_id, started)
+        finally:
+            metrics.set_gauge("deploy.running", self._running_delta(-1))
+
+    def _deploy(self, job_id: int, started: float):
+        """Run a claimed job; the caller holds its website's deploy lock"""
+        with SessionLocal() as db:
+            job = db.query(Deployment).filter(Deployment.id == job_id).first()
+            website = job.website if job else None
+            if website is None:
+                # The website (and its jobs) was deleted while the job waited for the lock
+                return
+            website_id, created_at = website.id, job.created_at
+
+            def report(stage: str, commit: Optional[str] = None):
+                job.stage = stage
+                if commit:
+                    job.commit_sha = commit
+                db.commit()
+
+            superseded = _superseded_check(job_id, website_id)
+            status, error = DeploymentStatus.SUCCEEDED, None
+            try:
+                if superseded():
+                    # Requested again while this job waited for the lock: don't clone at all
+                    raise DeploymentSuperseded(f"Deployment {job_id} was superseded before it started")
+                WebsiteProcessManager().deploy_static_site(
+                    db,
+                    website.git_repo,
+                    website.name,
+                    website.user_id,
+                    progress=report,
+                    superseded=superseded
+                )
+                metrics.incr("deploy.succeeded")
+            except DeploymentSuperseded as e:
+                # The newer job is queued; the website keeps its status until that one ends
+                db.rollback()
+                logger.info(f"Deployment {job_id} for website {website_id} superseded: {str(e)}")
+                status = DeploymentStatus.SUPERSEDED
+                metrics.incr("deploy.superseded")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Deployment {job_id} for website {website_id} failed: {str(e)}")
+                status, error = DeploymentStatus.FAILED, str(e)
+                metrics.incr("deploy.failed")
+
+            # By id: the website, and its jobs with it, may have been deleted meanwhile (e.g. with its owner)
+            finished_at = datetime.utcnow()
+            recorded = db.query(Deployment)\
+                         .filter(Deployment.id == job_id)\
+                         .update({"status": status, "error": error, "finished_at": finished_at}, synchronize_session=False)
+            if status == DeploymentStatus.FAILED:
+                # Failed before deploy_static_site could settle the website's status
+                db.query(Website)\
+                  .filter(Website.id == website_id, Website.status == WebsiteStatus.DEPLOYING.value)\
+                  .update(
+                      {"status": WebsiteStatus.ERROR.value, "deployment_log": error, "updated_at": finished_at},
+                      synchronize_session=False
+                  )
+            db.commit()
+            if not recorded:
+                logger.warning(f"Website {website_id} was deleted during deployment {job_id}")
+            metrics.observe("deploy.run_seconds", time.monotonic() - started)
+            metrics.observe("deploy.latency_seconds", (finished_at - created_at).total_seconds())
+
+    @contextmanager
+    def site_lock(self, *website_ids: int):
+        """
+        Hold the deploy locks of websites against every worker of every host.
+        A running deployment holds its website's until it ends; anything else
+        that changes what a site serves takes them too. They are taken in id
+        order, so holders of several never deadlock.
+        """
+        website_ids = sorted(set(website_ids))
+        if not website_ids:
+            yield
+            return
+
+        if engine.dialect.name != "postgresql":
+            # Without PostgreSQL there is a single host: lock files do
+            lock_dir = STATIC_SITES_DIR / ".deploy-locks"
+            lock_dir.mkdir(parents=True, exist_ok=True)
+            with ExitStack() as stack:
+                for website_id in website_ids:
+                    lock_f = stack.enter_context(open(lock_dir / f"{website_id}.lock", "w"))
+                    fcntl.flock(lock_f, fcntl.LOCK_EX)
+                    stack.callback(fcntl.flock, lock_f, fcntl.LOCK_UN)
+                yield
+            return
+
+        # Session-level locks on a connection of their own: PostgreSQL drops
+        # them if the holder dies, and no transaction stays open meanwhile
+        with engine.connect() as conn:
+            try:
+                for website_id in website_ids:
+                    conn.execute(select(func.pg_advisory_lock(DEPLOY_LOCK_NAMESPACE, website_id)))
+                conn.commit()
+                yield
+            finally:
+                try:
+                    conn.execute(select(func.pg_advisory_unlock_all()))
+                    conn.commit()
+                except Exception as e:
+                    # Never hand a connection back to the pool still holding a lock
+                    logger.error(f"Error releasing deploy locks of websites {website_ids}: {str(e)}")
+                    conn.invalidate()
+
+    def _running_delta(self, delta: int) -> int:
+        with self._running_lock:
+            self._running += delta
+            return self._running
+
+
+def _superseded_check(job_id: int, website_id: int) -> Callable[[], bool]:
+    """
+    Whether a job newer than job_id is queued for the website, or claimed and
+    waiting for its lock; asked of the database at most every
+    SUPERSEDED_POLL_INTERVAL seconds
+    """
+    checked_at, superseded = None, False
+
+    def check() -> bool:
+        nonlocal checked_at, superseded
+        now = time.monotonic()
+        if superseded or (checked_at is not None and now - checked_at < SUPERSEDED_POLL_INTERVAL):
+            return superseded
+        checked_at = now
+        with SessionLocal() as db:
+            superseded = db.scalar(
+                select(Deployment.id).where(
+                    Deployment.website_id == website_id,
+                    Deployment.status.in_((DeploymentStatus.QUEUED, DeploymentStatus.RUNNING)),
+                    Deployment.id > job_id
+                ).limit(1)
+            ) is not None
+        return superseded
+
+    return check
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
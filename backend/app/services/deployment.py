@@ -1,10 +1,7 @@
 import os
 import subprocess
-import signal
-import socket
 from pathlib import Path
-import sys
-from typing import Optional, Dict
+from typing import Callable, Optional, Dict, List, Union
 from sqlalchemy.orm import Session
 from contextlib import contextmanager
 from datetime import datetime
@@ -12,19 +9,35 @@ from ..models.website import Website, WebsiteStatus
 from ..models.user import User
 from ..core.config import settings
 from ..core.logger import logger
+from .git_cache import GitCancelledError, GitMirrorCache, MirrorCheckout
+from .runner import SiteRunner
+from .runner_client import RunnerClient
 
 STATIC_SITES_DIR = Path(os.getenv("STATIC_SITES_DIR", "/app/static_sites"))
 
+class DeploymentSuperseded(Exception):
+    """Raised when a deployment was given up because a newer one of the site is waiting"""
+
 class WebsiteProcessManager:
     _instance = None
-    PORT_RANGE_SIZE = 100  # Number of sequential ports to allocate
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance.processes = {}  # Dictionary to store running processes
+            # Whatever serves the sites: the runner daemon if there is one, else this process
+            cls._instance.runner: Union[SiteRunner, RunnerClient] = (
+                RunnerClient(settings.SITE_RUNNER_SOCKET, settings.SITE_RUNNER_TIMEOUT)
+                if settings.SITE_RUNNER_SOCKET else SiteRunner()
+            )
+            cls._instance.git_cache = GitMirrorCache(
+                STATIC_SITES_DIR / ".git-cache", settings.GIT_CACHE_MAX_BYTES
+            )
         return cls._instance
 
+    @property
+    def multiplexed(self) -> bool:
+        return settings.STATIC_SERVER_MODE == "multiplexed"
+
     def _sanitize_name(self, name: str) -> str:
         """Sanitize names to be filesystem-safe"""
         return "".join(c if c.isalnum() else "_" for c in name)
@@ -36,36 +49,15 @@ class WebsiteProcessManager:
         user_dir.mkdir(parents=True, exist_ok=True)
         return user_dir / website_name
 
-    def get_available_port(self, db: Session) -> int:
-        """Find an available port in the configured range"""
-        used_ports = {w.port for w in db.query(Website.port).all()}
-        base_port = settings.WEBSITE_MIN_PORT
-        
-        for offset in range(self.PORT_RANGE_SIZE):
-            port = base_port + offset
-            if port not in used_ports and self._is_port_available(port):
-                return port
-        
-        raise ValueError(
-            f"No available ports in range {base_port}-{base_port + self.PORT_RANGE_SIZE - 1}"
-        )
-
-    def _is_port_available(self, port: int) -> bool:
-        """Check if a port is actually available on the system"""
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            try:
-                s.bind(('', port))
-                return True
-            except socket.error:
-                return False
+    def log_path(self, full_name: str, website_name: str) -> Path:
+        """Path of the log file a website's deployments and server write to"""
+        return STATIC_SITES_DIR / self._sanitize_name(full_name) / "logs" / f"{website_name}.log"
 
     @contextmanager
     def _log_execution(self, full_name: str, website_name: str):
         """Context manager for logging operations"""
-        sanitized_name = self._sanitize_name(full_name)
-        log_dir = STATIC_SITES_DIR / sanitized_name / "logs"
-        log_dir.mkdir(parents=True, exist_ok=True)
-        log_file = log_dir / f"{website_name}.log"
+        log_file = self.log_path(full_name, website_name)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
         
         try:
             with open(log_file, 'a') as f:
@@ -81,9 +73,21 @@ class WebsiteProcessManager:
         db: Session,
         git_repo: str,
         website_name: str,
-        user_id: int
+        user_id: int,
+        progress: Optional[Callable[..., None]] = None,
+        superseded: Optional[Callable[[], bool]] = None
     ) -> int:
-        """Deploy a static site and return the port number"""
+        """
+        Deploy a static site and return the port number.
+        superseded is polled until the release is activated; once it returns
+        True the clone is abandoned with DeploymentSuperseded.
+        """
+        report = progress or (lambda stage, commit=None: None)
+
+        def check_superseded():
+            if superseded and superseded():
+                raise DeploymentSuperseded(f"Deployment of {website_name} was superseded by a newer one")
+
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
             raise ValueError(f"User {user_id} not found")
@@ -101,112 +105,223 @@ class WebsiteProcessManager:
         
         with self._log_execution(user.full_name, website_name) as log_f:
             try:
-                # Clean and prepare directory
-                if site_dir.exists():
+                # Sites deployed before release directories existed are replaced wholesale
+                if site_dir.exists() and not (site_dir / "releases").is_dir():
                     subprocess.run(["rm", "-rf", str(site_dir)], check=True)
-                
-                site_dir.mkdir(parents=True, exist_ok=True)
-
-                # Clone repository
-                log_f.write(f"Cloning repository: {git_repo}\n")
-                clone_result = subprocess.run(
-                    ["git", "clone", "--depth", "1", git_repo, str(site_dir)],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                
-                if clone_result.returncode != 0:
-                    error_msg = f"Git clone failed: {clone_result.stderr}"
-                    log_f.write(error_msg)
-                    website.status = WebsiteStatus.ERROR
-                    website.deployment_log = error_msg
-                    db.commit()
-                    raise RuntimeError(error_msg)
-
-                # Start HTTP server - using sys.executable for reliability
-                python_executable = sys.executable
-                log_f.write(f"Starting server on port {port} using {python_executable}\n")
-                process = subprocess.Popen(
-                    [
-                        python_executable, "-m", "http.server", 
-                        str(port), 
-                        "--directory", str(site_dir)
-                    ],
-                    cwd=site_dir,
-                    preexec_fn=os.setsid,
-                    stdout=log_f,
-                    stderr=subprocess.STDOUT
-                )
-                
-                self.processes[port] = process
+
+                # Fetch into the shared mirror and prepare the release off to the side
+                log_f.write(f"Fetching repository: {git_repo}\n")
+                check_superseded()
+                report("fetching")
+                try:
+                    # The mirror stays locked until the release is prepared: eviction can't drop it
+                    with self.git_cache.checkout(git_repo, log_f, superseded) as checkout:
+                        commit = checkout.commit
+                        check_superseded()
+                        report("preparing", commit)
+                        self._prepare_release(checkout, site_dir, log_f, superseded)
+                except GitCancelledError as e:
+                    raise DeploymentSuperseded(f"Deployment of {website_name} was superseded by a newer one: {str(e)}")
+                except RuntimeError as e:
+                    raise RuntimeError(f"Git checkout failed: {str(e)}")
+
+                # Past this point the deployment runs to the end
+                check_superseded()
+                # Atomically point the live site at the new release
+                report("activating")
+                self._activate_release(site_dir, commit)
+                log_f.write(f"Activated release {commit}\n")
+                self._prune_releases(site_dir)
+
+                # A running server follows the symlink; the runner only starts one if needed
+                report("starting")
+                state = self._start_server(port, site_dir / "current", website.custom_domain, log_f)
                 
                 # Update website status
-                website.status = WebsiteStatus.RUNNING
-                website.pid = process.pid
+                website.status = self._serving_status(state)
+                website.pid = state["pid"]
+                website.deployment_log = None
                 db.commit()
                 
                 return port
 
+            except DeploymentSuperseded as e:
+                # The newer deployment takes over the site; the previous release keeps serving
+                log_f.write(f"{str(e)}\n")
+                raise
+
             except Exception as e:
-                # Update website status and log error
-                website.status = WebsiteStatus.ERROR
+                log_f.write(f"{str(e)}\n")
+                # A failed redeploy leaves the previous release serving
+                try:
+                    state = self.runner.status(port)
+                except Exception:
+                    state = {"serving": False}
+                website.status = self._serving_status(state) if state["serving"] else WebsiteStatus.ERROR
                 website.deployment_log = str(e)
                 db.commit()
-                
-                # Clean up if deployment fails
-                if site_dir.exists():
-                    subprocess.run(["rm", "-rf", str(site_dir)], check=True)
                 raise
 
+    def _prepare_release(
+        self,
+        checkout: MirrorCheckout,
+        site_dir: Path,
+        log_f,
+        cancelled: Optional[Callable[[], bool]] = None
+    ):
+        """Materialize the checked out commit under releases/ unless it is already there"""
+        commit = checkout.commit
+        release_dir = site_dir / "releases" / commit
+        if release_dir.is_dir():
+            log_f.write(f"Release {commit} already prepared\n")
+            return
+
+        log_f.write(f"Checking out {commit}\n")
+        staging_dir = site_dir / "releases" / f".{commit}.{os.getpid()}.tmp"
+        if staging_dir.exists():
+            subprocess.run(["rm", "-rf", str(staging_dir)], check=True)
+        try:
+            checkout.materialize(staging_dir, cancelled)
+            os.rename(staging_dir, release_dir)
+        finally:
+            if staging_dir.exists():
+                subprocess.run(["rm", "-rf", str(staging_dir)], check=True)
+
+    def _activate_release(self, site_dir: Path, release: str):
+        """Swap the current symlink to releases/<release> in one rename"""
+        staging_link = site_dir / f".current.{os.getpid()}.tmp"
+        if staging_link.is_symlink():
+            staging_link.unlink()
+        os.symlink(Path("releases") / release, staging_link)
+        os.replace(staging_link, site_dir / "current")
+        # Release age is tracked by activation time for pruning and rollback
+        os.utime(site_dir / "releases" / release)
+
+    def _prune_releases(self, site_dir: Path):
+        """Keep the most recently activated releases and drop the rest"""
+        current = self.current_release(site_dir)
+        for release in self._list_release_dirs(site_dir)[settings.RELEASES_TO_KEEP:]:
+            if release.name != current:
+                subprocess.run(["rm", "-rf", str(release)], check=True)
+
+    def _list_release_dirs(self, site_dir: Path) -> List[Path]:
+        """Release directories, most recently activated first"""
+        releases_dir = site_dir / "releases"
+        if not releases_dir.is_dir():
+            return []
+        releases = [p for p in releases_dir.iterdir() if p.is_dir() and not p.name.startswith(".")]
+        return sorted(releases, key=lambda p: p.stat().st_mtime, reverse=True)
+
+    def current_release(self, site_dir: Path) -> Optional[str]:
+        """Name of the release the current symlink points at"""
+        try:
+            return Path(os.readlink(site_dir / "current")).name
+        except OSError:
+            return None
+
+    def list_releases(self, full_name: str, website_name: str) -> List[Dict]:
+        """Retained releases of a site, most recently activated first"""
+        site_dir = self._get_site_path(full_name, website_name)
+        current = self.current_release(site_dir)
+        return [
+            {
+                "commit": release.name,
+                "activated_at": datetime.utcfromtimestamp(release.stat().st_mtime),
+                "current": release.name == current,
+            }
+            for release in self._list_release_dirs(site_dir)
+        ]
+
+    def rollback_site(
+        self,
+        db: Session,
+        website: Website,
+        release: Optional[str] = None
+    ) -> str:
+        """Point a site back at a retained release (the previous one by default)"""
+        site_dir = self._get_site_path(website.owner.full_name, website.name)
+        current = self.current_release(site_dir)
+        candidates = [p.name for p in self._list_release_dirs(site_dir)]
+
+        if release is None:
+            previous = [name for name in candidates if name != current]
+            if not previous:
+                raise ValueError("No previous release to roll back to")
+            release = previous[0]
+        elif release not in candidates:
+            raise ValueError(f"Release {release} not found")
+
+        with self._log_execution(website.owner.full_name, website.name) as log_f:
+            self._activate_release(site_dir, release)
+            log_f.write(f"Rolled back to release {release}\n")
+            state = self._start_server(website.port, site_dir / "current", website.custom_domain, log_f)
+
+        website.pid = state["pid"]
+        website.status = self._serving_status(state)
+        db.commit()
+        return release
+
+    def resume_sites(self, websites: List[Website], concurrency: int = 1) -> Dict[int, Optional[int]]:
+        """
+        Serve the current release of each website again without touching git.
+
+        Returns the serving pid by port (None for a hibernating site); sites
+        that could not be started are left out and the reason is written to
+        their log. With hibernation on, sites start asleep.
+        """
+        sites = [site for site in (self._site_of(w, wake=False) for w in websites) if Path(site["root"]).is_dir()]
+        if not sites:
+            return {}
+        # One batch: a single route table write when multiplexed, bounded parallel starts otherwise
+        results = self.runner.start(sites, concurrency)
+        return {port: state["pid"] for port, state in results.items() if "error" not in state}
+
+    def adopt_sites(self, websites: List[Website]) -> Dict[int, int]:
+        """Take over the websites an earlier run left serving; returns the serving pid by port"""
+        return self.runner.adopt([self._site_of(website) for website in websites])
+
+    def is_serving(self, port: int) -> bool:
+        """Whether the site on port is being served (by the runner, another API worker or an earlier run)"""
+        return self.runner.status(port)["serving"]
+
+    @staticmethod
+    def _serving_status(state: Dict) -> WebsiteStatus:
+        return WebsiteStatus.HIBERNATED if state.get("hibernated") else WebsiteStatus.RUNNING
+
+    @staticmethod
+    def _site(port: int, serve_dir: Path, custom_domain: Optional[str], log_file, wake: bool = True) -> Dict:
+        """How the runner should serve a site; its server writes to log_file"""
+        return {"port": port, "root": str(serve_dir), "host": custom_domain, "log": str(log_file), "wake": wake}
+
+    def _site_of(self, website: Website, wake: bool = True) -> Dict:
+        """How the runner should serve a website's current release"""
+        site_dir = self._get_site_path(website.owner.full_name, website.name)
+        log_file = self.log_path(website.owner.full_name, website.name)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        return self._site(website.port, site_dir / "current", website.custom_domain, log_file, wake)
+
+    def _start_server(
+        self,
+        port: int,
+        serve_dir: Path,
+        custom_domain: Optional[str],
+        log_f
+    ) -> Dict:
+        """Serve serve_dir on port unless it already is; returns the site's serving state"""
+        # The runner appends to the same log
+        log_f.flush()
+        state = self.runner.start([self._site(port, serve_dir, custom_domain, log_f.name)])[port]
+        if "error" in state:
+            raise RuntimeError(f"Failed to start server on port {port}: {state['error']}")
+        return state
+
     def stop_site(self, port: int) -> bool:
         """Gracefully stop a running site"""
-        if port not in self.processes:
-            # Process might not be in memory but still running (e.g. after server restart)
-            try:
-                # Try to find pid by port through netstat or lsof
-                pid_check = subprocess.run(
-                    ["lsof", "-i", f":{port}", "-t"],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                
-                if pid_check.returncode == 0 and pid_check.stdout.strip():
-                    pid = int(pid_check.stdout.strip())
-                    logger.info(f"Found process {pid} on port {port} - attempting to kill")
-                    try:
-                        os.kill(pid, signal.SIGTERM)
-                        # Wait a bit to make sure the process has time to terminate
-                        subprocess.run(
-                            ["sleep", "2"],
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE
-                        )
-                        return True
-                    except ProcessLookupError:
-                        logger.warning(f"Process {pid} not found")
-                    except Exception as e:
-                        logger.error(f"Error killing process {pid}: {str(e)}")
-                
-                # If we're here, either no process was found or we couldn't kill it
-                # But we'll return True so the user can continue with other operations
-                return True
-            except Exception as e:
-                logger.error(f"Error checking for process on port {port}: {str(e)}")
-                # Return True to allow operations to continue
-                return True
-            
-        try:
-            process = self.processes[port]
-            os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-            process.wait(timeout=10)
-            del self.processes[port]
-            return True
-        except Exception as e:
-            logger.error(f"Error stopping site on port {port}: {str(e)}")
-            # Return True anyway to avoid blocking operations
-            return True
+        return self.stop_sites([port])[port]
+
+    def stop_sites(self, ports: List[int]) -> Dict[int, bool]:
+        """Stop several sites at once, sharing a single wait deadline"""
+        return self.runner.stop(ports)
 
     def delete_site(
         self,
@@ -0,0 +1,164 @@
+import asyncio
+import contextvars
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, Set, Union
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..core.config import settings
+from ..core.logger import logger
+from ..core.metrics import metrics
+from ..database import AsyncSessionLocal, async_engine
+from ..models.website import Website
+from ..schemas.website import WebsiteEvent
+from .pg_listener import listen_forever
+
+# Channel notified by the websites trigger (migration 0005_website_status_notify)
+CHANNEL = "website_status"
+HEARTBEAT_INTERVAL = 15.0
+
+# Sent instead of events that may have been missed: reload the list
+RESYNC = "resync"
+
+Event = Union[WebsiteEvent, str]
+
+
+class Subscription:
+    """The status events one client receives: a user's websites, or every website"""
+
+    def __init__(self, user_id: Optional[int]):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+
+    def put(self, event: Event):
+        if self.queue.full():
+            # Too slow to keep up: drop the backlog and have the client reload instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            metrics.incr("events.resyncs")
+            event = RESYNC
+        self.queue.put_nowait(event)
+
+    async def __aiter__(self) -> AsyncIterator[Optional[Event]]:
+        """Yield events as they arrive; None as a heartbeat when there were none for a while"""
+        while True:
+            try:
+                async with asyncio.timeout(HEARTBEAT_INTERVAL):
+                    event = await self.queue.get()
+            except TimeoutError:
+                event = None
+            yield event
+
+
+class EventBroker:
+    """
+    Fans website status changes out to the event stream subscribers of this process.
+
+    A single listener task per process receives every change: on PostgreSQL
+    it LISTENs on one dedicated connection for the trigger's NOTIFY, elsewhere
+    it polls the websites table every EVENTS_POLL_INTERVAL seconds. Each change
+    is then put on the queue of the owner's subscribers and of the admin
+    subscribers, so the cost of a change does not depend on the database
+    however many clients are connected.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            # Subscriptions by website owner; None holds the all-websites ones
+            cls._instance._subscriptions: Dict[Optional[int], Set[Subscription]] = {}
+            cls._instance._count = 0
+            cls._instance._task: Optional[asyncio.Task] = None
+        return cls._instance
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: Optional[int] = None) -> AsyncIterator[Subscription]:
+        """
+        Receive the status changes of user_id's websites, or of all websites if
+        None. Changes made once this is entered are delivered, so a client can
+        load the current state afterwards without missing one.
+        """
+        self._ensure_listener()
+        subscription = Subscription(user_id)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        self._count += 1
+        metrics.set_gauge("events.subscribers", self._count)
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscriptions[user_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[user_id]
+            self._count -= 1
+            metrics.set_gauge("events.subscribers", self._count)
+
+    def publish(self, event: Event):
+        """Deliver an event to its owner's and the admin subscribers; RESYNC goes to everyone"""
+        if event == RESYNC:
+            targets = [s for subscriptions in self._subscriptions.values() for s in subscriptions]
+        else:
+            targets = [*self._subscriptions.get(event.user_id, ()), *self._subscriptions.get(None, ())]
+        for subscription in targets:
+            subscription.put(event)
+        metrics.incr("events.published")
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _ensure_listener(self):
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        listen = self._listen_postgresql if async_engine.dialect.name == "postgresql" else self._poll
+        # A fresh context: the listener outlives the request that started it
+        self._task = loop.create_task(listen(), context=contextvars.Context())
+
+    async def _listen_postgresql(self):
+        await listen_forever(CHANNEL, self._on_notify, "website status changes", on_connect=self._on_connect)
+
+    def _on_connect(self, reconnected: bool):
+        if reconnected:
+            # Changes made while reconnecting were not seen
+            self.publish(RESYNC)
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            event = WebsiteEvent(**json.loads(payload))
+        except ValueError as e:
+            logger.error(f"Invalid website status notification {payload!r}: {str(e)}")
+            return
+        self.publish(event)
+
+    async def _poll(self):
+        """Databases without LISTEN/NOTIFY: compare statuses of recently updated websites"""
+        statuses: Dict[int, str] = {}
+        since: Optional[datetime] = None
+        while True:
+            query = select(Website.id, Website.user_id, Website.name, Website.status, Website.updated_at)
+            if since is not None:
+                query = query.where(Website.updated_at >= since)
+            try:
+                async with AsyncSessionLocal() as db:
+                    rows = (await db.execute(query)).all()
+            except SQLAlchemyError as e:
+                logger.error(f"Error polling website statuses: {str(e)}")
+                rows = []
+            for row in rows:
+                if since is not None and statuses.get(row.id) != row.status:
+                    self.publish(WebsiteEvent(id=row.id, user_id=row.user_id, name=row.name, status=row.status))
+                statuses[row.id] = row.status
+            latest = max((row.updated_at for row in rows if row.updated_at), default=None)
+            if since is None or (latest and latest > since):
+                since = latest or datetime.min
+            await asyncio.sleep(settings.EVENTS_POLL_INTERVAL)
@@ -0,0 +1,177 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select, tuple_, update
+
+from ..database import SessionLocal
+from ..models.user import User
+from ..models.website import Website, WebsiteStatus, SERVING_STATUSES
+from ..core.config import settings
+from ..core.logger import logger
+from ..core.metrics import metrics
+from .deploy_queue import DeploymentQueue
+from .deployment import WebsiteProcessManager
+
+
+class ExpirySweeper:
+    """
+    Stops websites that expired, or whose owner's plan expired, on a timer.
+
+    Expired sites are found in batches of EXPIRY_SWEEP_BATCH through the
+    (status, expires_at, id) and (plan_expires_at, id) indexes. Each batch is
+    stopped with a single stop_sites() call, which signals its servers
+    together and waits on one deadline, so the batch size bounds how many
+    sites stop at once; the batch is then marked stopped with one UPDATE.
+    Stopping closes the site's listener (its process, socket or static host
+    route); the port stays reserved to the website so a renewed site keeps
+    its URL.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._thread: Optional[threading.Thread] = None
+            cls._instance._stopping = threading.Event()
+            # One sweep at a time, whether timed or requested by an admin
+            cls._instance._sweep_lock = threading.Lock()
+        return cls._instance
+
+    def start(self):
+        """Sweep every EXPIRY_SWEEP_INTERVAL seconds (idempotent; 0 disables)"""
+        if self._thread is not None or settings.EXPIRY_SWEEP_INTERVAL <= 0:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._loop, name="expiry-sweeper", daemon=True)
+        self._thread.start()
+        mode = " (dry run)" if settings.EXPIRY_SWEEP_DRY_RUN else ""
+        logger.info(f"Sweeping expired websites every {settings.EXPIRY_SWEEP_INTERVAL}s{mode}")
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stopping.wait(settings.EXPIRY_SWEEP_INTERVAL):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Expiry sweep failed: {str(e)}")
+
+    def sweep(self, dry_run: Optional[bool] = None) -> Dict:
+        """
+        Stop every serving website past its expiry or its owner's plan expiry.
+        With dry_run (default EXPIRY_SWEEP_DRY_RUN) they are only counted and logged.
+        """
+        if dry_run is None:
+            dry_run = settings.EXPIRY_SWEEP_DRY_RUN
+        with self._sweep_lock:
+            started = time.monotonic()
+            now = datetime.utcnow()
+            result = {"dry_run": dry_run, "expired": 0, "stopped": 0, "processes": 0, "failed": 0, "website_ids": []}
+            seen = set()
+            for batch in self._expired_batches(now):
+                # A site can be past both expiries; a dry run would list it twice
+                batch = [w for w in batch if w.id not in seen]
+                seen.update(w.id for w in batch)
+                if not batch:
+                    continue
+                result["expired"] += len(batch)
+                result["website_ids"].extend(w.id for w in batch)
+                if dry_run:
+                    logger.info(f"Dry run: would stop expired websites {[w.id for w in batch]}")
+                    continue
+                try:
+                    processes = self._reclaim(batch, now)
+                except Exception as e:
+                    logger.error(f"Error stopping expired websites {[w.id for w in batch]}: {str(e)}")
+                    result["failed"] += len(batch)
+                    continue
+                result["stopped"] += len(batch)
+                result["processes"] += processes
+
+            elapsed = time.monotonic() - started
+            metrics.observe("expiry.sweep_seconds", elapsed)
+            if not dry_run:
+                metrics.incr("expiry.sites_stopped", result["stopped"])
+                metrics.incr("expiry.processes_reclaimed", result["processes"])
+                metrics.incr("expiry.failed", result["failed"])
+            metrics.set_gauge("expiry.last_expired", result["expired"])
+            if result["expired"]:
+                logger.info(
+                    f"Expiry sweep{' (dry run)' if dry_run else ''} in {elapsed:.2f}s: "
+                    f"{result['expired']} expired, {result['stopped']} stopped "
+                    f"({result['processes']} processes), {result['failed']} failed"
+                )
+            return result
+
+    def _expired_batches(self, now: datetime) -> Iterator[List]:
+        """Serving websites past their own expiry, then those of users whose plan expired"""
+        size = settings.EXPIRY_SWEEP_BATCH
+        columns = (Website.id, Website.port, Website.pid)
+        for status in SERVING_STATUSES:
+            after = None
+            while True:
+                query = select(*columns, Website.expires_at)\
+                    .where(Website.status == status, Website.expires_at < now)\
+                    .order_by(Website.expires_at, Website.id)\
+                    .limit(size)
+                if after:
+                    query = query.where(tuple_(Website.expires_at, Website.id) > after)
+                with SessionLocal() as db:
+                    rows = db.execute(query).all()
+                if not rows:
+                    break
+                after = (rows[-1].expires_at, rows[-1].id)
+                yield rows
+                if len(rows) < size:
+                    break
+
+        after = None
+        while True:
+            query = select(User.id, User.plan_expires_at)\
+                .where(User.plan_expires_at < now)\
+                .order_by(User.plan_expires_at, User.id)\
+                .limit(size)
+            if after:
+                query = query.where(tuple_(User.plan_expires_at, User.id) > after)
+            with SessionLocal() as db:
+                users = db.execute(query).all()
+                if not users:
+                    break
+                after = (users[-1].plan_expires_at, users[-1].id)
+                rows = db.execute(
+                    select(*columns)
+                    .where(Website.user_id.in_([u.id for u in users]), Website.status.in_(SERVING_STATUSES))
+                ).all()
+            for i in range(0, len(rows), size):
+                yield rows[i:i + size]
+            if len(users) < size:
+                break
+
+    def _reclaim(self, batch: List, now: datetime) -> int:
+        """Stop a batch of sites and mark them stopped in one statement; returns the processes stopped"""
+        manager = WebsiteProcessManager()
+        ids = [w.id for w in batch]
+        # Under their deploy locks, so that no redeploy activates a release meanwhile
+        with DeploymentQueue().site_lock(*ids):
+            with SessionLocal() as db:
+                # Leave sites alone that were stopped or deleted in the meantime
+                batch = db.execute(
+                    select(Website.id, Website.port, Website.pid)
+                    .where(Website.id.in_(ids), Website.status.in_(SERVING_STATUSES))
+                ).all()
+            manager.stop_sites([w.port for w in batch])
+            with SessionLocal() as db:
+                db.execute(
+                    update(Website)
+                    .where(Website.id.in_([w.id for w in batch]))
+                    .values(status=WebsiteStatus.STOPPED.value, pid=None, updated_at=now)
+                )
+                db.commit()
+        # Multiplexed sites share the static host, which keeps running
+        return 0 if manager.multiplexed else sum(1 for w in batch if w.pid)
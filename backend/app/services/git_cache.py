@@ -0,0 +1,232 @@
+import fcntl
+import hashlib
+import os
+import re
+import shutil
+import signal
+import subprocess
+import tarfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, TextIO, Tuple
+
+from ..core.logger import logger
+
+# How often a running git command checks whether it is still wanted
+CANCEL_POLL_INTERVAL = 0.5
+
+
+class GitCancelledError(Exception):
+    """Raised when a git command was killed because its result is no longer wanted"""
+
+
+def _kill(process: subprocess.Popen):
+    """Kill a git command with the helpers it spawned (remote transports, index-pack)"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+class MirrorCheckout:
+    """A fetched commit of a mirror, which stays locked until the checkout ends"""
+
+    def __init__(self, cache: "GitMirrorCache", mirror: Path, commit: str):
+        self._cache = cache
+        self.mirror = mirror
+        self.commit = commit
+
+    def materialize(self, dest: Path, cancelled: Optional[Callable[[], bool]] = None):
+        """Write the tree of the commit into dest (without any .git metadata)"""
+        self._cache._archive(self.mirror, self.commit, dest, cancelled)
+
+
+class GitMirrorCache:
+    """
+    Persistent bare mirrors of deployed repositories.
+
+    Each repository is mirrored once, keyed by its normalized URL, so sites
+    deploying the same repo share objects and redeploys only fetch what
+    changed. Unlike the single-commit clones (--depth 1) they replaced,
+    mirrors keep the full history of every branch: that is what makes a
+    fetch incremental, at the cost of disk. A mirror's size is taken with
+    git count-objects after each fetch, so the whole history counts against
+    max_bytes; mirrors are evicted least-recently-used first once the cache
+    grows past it. A mirror is locked from its fetch until the commit is
+    materialized (checkout), and eviction skips locked mirrors.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def normalize_url(git_repo: str) -> str:
+        """Canonical form of a repository URL used as the cache key"""
+        url = git_repo.strip()
+        # git@host:owner/repo -> ssh://git@host/owner/repo
+        if match := re.match(r"^(?P<user>[^@/]+)@(?P<host>[^:/]+):(?P<path>.+)$", url):
+            url = f"ssh://{match.group('user')}@{match.group('host')}/{match.group('path')}"
+        scheme, sep, rest = url.partition("://")
+        host, _, path = rest.partition("/")
+        path = path.rstrip("/")
+        if path.endswith(".git"):
+            path = path[:-4]
+        return f"{scheme.lower()}{sep}{host.lower()}/{path}"
+
+    def mirror_path(self, git_repo: str) -> Path:
+        key = hashlib.sha1(self.normalize_url(git_repo).encode()).hexdigest()[:20]
+        return self.cache_dir / f"{key}.git"
+
+    @contextmanager
+    def _locked(self, mirror: Path, blocking: bool = True):
+        """Hold an exclusive lock on a mirror; yields False if it is busy and blocking is off"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(mirror.with_suffix(".lock"), "w") as lock_f:
+            try:
+                fcntl.flock(lock_f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_f, fcntl.LOCK_UN)
+
+    def _git(
+        self,
+        args: List[str],
+        log_f: Optional[TextIO] = None,
+        cancelled: Optional[Callable[[], bool]] = None
+    ) -> str:
+        """Run git; with cancelled, poll it while git runs and kill git once it returns True"""
+        git = subprocess.Popen(
+            ["git", *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            start_new_session=True
+        )
+        while True:
+            try:
+                stdout, stderr = git.communicate(timeout=CANCEL_POLL_INTERVAL if cancelled else None)
+                break
+            except subprocess.TimeoutExpired:
+                if cancelled():
+                    _kill(git)
+                    raise GitCancelledError("git was cancelled")
+        if log_f and stderr:
+            log_f.write(stderr)
+        if git.returncode != 0:
+            raise RuntimeError(f"git {args[0]} failed: {stderr}")
+        return stdout.strip()
+
+    @contextmanager
+    def checkout(
+        self,
+        git_repo: str,
+        log_f: Optional[TextIO] = None,
+        cancelled: Optional[Callable[[], bool]] = None
+    ) -> Iterator[MirrorCheckout]:
+        """
+        Bring the mirror up to date and yield the commit its HEAD points to;
+        the mirror stays locked, against fetches and eviction, until the block ends
+        """
+        mirror = self.mirror_path(git_repo)
+        with self._locked(mirror):
+            if (mirror / "HEAD").exists():
+                if log_f:
+                    log_f.write(f"Updating cached mirror {mirror.name}\n")
+                self._git(["--git-dir", str(mirror), "fetch", "--prune", "--quiet", "origin"], log_f, cancelled)
+            else:
+                if log_f:
+                    log_f.write(f"Creating cached mirror {mirror.name}\n")
+                shutil.rmtree(mirror, ignore_errors=True)
+                try:
+                    self._git(["clone", "--mirror", "--quiet", git_repo, str(mirror)], log_f, cancelled)
+                except (RuntimeError, GitCancelledError):
+                    shutil.rmtree(mirror, ignore_errors=True)
+                    raise
+            commit = self._git(["--git-dir", str(mirror), "rev-parse", "HEAD^{commit}"])
+            self._record_size(mirror)
+            os.utime(mirror)
+            yield MirrorCheckout(self, mirror, commit)
+
+        self.evict(keep=mirror)
+
+    def _archive(
+        self,
+        mirror: Path,
+        commit: str,
+        dest: Path,
+        cancelled: Optional[Callable[[], bool]] = None
+    ):
+        """Extract the tree of commit into dest; the caller holds the mirror's lock"""
+        dest.mkdir(parents=True, exist_ok=True)
+        archive = subprocess.Popen(
+            ["git", "--git-dir", str(mirror), "archive", "--format=tar", commit],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True
+        )
+        killed = False
+        try:
+            with tarfile.open(fileobj=archive.stdout, mode="r|") as tar:
+                if cancelled is None:
+                    tar.extractall(dest, filter="data")
+                else:
+                    for member in tar:
+                        if cancelled():
+                            killed = True
+                            _kill(archive)
+                            raise GitCancelledError("git archive was cancelled")
+                        tar.extract(member, dest, filter="data")
+        finally:
+            archive.stdout.close()
+            stderr = archive.stderr.read().decode(errors="replace")
+            archive.stderr.close()
+            if archive.wait() != 0 and not killed:
+                raise RuntimeError(f"git archive failed: {stderr}")
+
+    def _record_size(self, mirror: Path) -> int:
+        """Store the mirror's size on disk next to it, from git's own object count"""
+        counts = dict(
+            line.split(": ", 1)
+            for line in self._git(["--git-dir", str(mirror), "count-objects", "-v"]).splitlines()
+        )
+        # Loose objects, packs and garbage, in KiB
+        size = sum(int(counts.get(key, 0)) for key in ("size", "size-pack", "size-garbage")) * 1024
+        mirror.with_suffix(".size").write_text(str(size))
+        return size
+
+    def _mirrors(self) -> List[Tuple[float, int, Path]]:
+        """(last used, size in bytes, path) for every cached mirror"""
+        mirrors = []
+        for mirror in self.cache_dir.glob("*.git"):
+            try:
+                size = int(mirror.with_suffix(".size").read_text())
+            except (OSError, ValueError):
+                # Not fetched since sizes were recorded; mirrors being cloned have no HEAD yet
+                if not (mirror / "HEAD").exists():
+                    continue
+                size = self._record_size(mirror)
+            mirrors.append((mirror.stat().st_mtime, size, mirror))
+        return mirrors
+
+    def evict(self, keep: Optional[Path] = None):
+        """Drop least recently used mirrors until the cache fits in max_bytes; locked (in use) ones stay"""
+        mirrors = sorted(self._mirrors())
+        total = sum(size for _, size, _ in mirrors)
+        for _, size, mirror in mirrors:
+            if total <= self.max_bytes:
+                break
+            if mirror == keep:
+                continue
+            with self._locked(mirror, blocking=False) as acquired:
+                if not acquired:
+                    continue
+                shutil.rmtree(mirror, ignore_errors=True)
+                mirror.with_suffix(".size").unlink(missing_ok=True)
+            total -= size
+            logger.info(f"Evicted git mirror {mirror.name} ({size} bytes)")
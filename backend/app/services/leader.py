@@ -0,0 +1,49 @@
+import fcntl
+import os
+from pathlib import Path
+
+from ..core.logger import logger
+
+STATIC_SITES_DIR = Path(os.getenv("STATIC_SITES_DIR", "/app/static_sites"))
+
+
+class HostLeader:
+    """
+    Elects the API worker that runs the host-wide duties: restoring sites
+    after a restart and sweeping expired ones.
+
+    Leadership is an exclusive flock on a file next to the sites, held for the
+    life of the worker; the kernel drops it when the worker exits however it
+    exits, and a worker blocked in acquire() takes over.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock_f = None
+        return cls._instance
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_f is not None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Become the leader, waiting for the current one to exit if blocking"""
+        if self._lock_f is not None:
+            return True
+        STATIC_SITES_DIR.mkdir(parents=True, exist_ok=True)
+        lock_f = open(STATIC_SITES_DIR / ".leader.lock", "w")
+        try:
+            fcntl.flock(lock_f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_f.close()
+            return False
+        self._lock_f = lock_f
+        logger.info(f"API worker {os.getpid()} is the host leader")
+        return True
+
+    def release(self):
+        lock_f, self._lock_f = self._lock_f, None
+        if lock_f is not None:
+            lock_f.close()
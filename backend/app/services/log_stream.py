@@ -0,0 +1,120 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from ..core.logger import logger
+from ..core.metrics import metrics
+
+CHUNK_SIZE = 64 * 1024
+POLL_INTERVAL = 0.5
+HEARTBEAT_INTERVAL = 15.0
+
+
+def read_log_range(path: Path, offset: Optional[int], limit: int) -> Tuple[int, bytes, int]:
+    """
+    Read up to limit bytes of a log file starting at offset (the last limit
+    bytes if offset is None); returns (start offset, data, file size).
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            start = max(0, size - limit) if offset is None else min(offset, size)
+            f.seek(start)
+            return start, f.read(limit), size
+    except FileNotFoundError:
+        return 0, b"", 0
+
+
+class _Watch:
+    """A file being tailed: one poller shared by every subscriber"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.size = _file_size(path)
+        # Replaced on every change, so waiting needs no lock and never misses one
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class LogTailer:
+    """
+    Follows log files for many concurrent readers on the event loop.
+
+    Each followed file gets a single polling task that stats it and wakes
+    the subscribers when it grows; every subscriber then reads the new
+    bytes from its own offset in bounded chunks. No threads are used and
+    the cost per interval is one stat per file, however many clients tail it.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._watches: Dict[Path, _Watch] = {}
+        return cls._instance
+
+    async def follow(self, path: Path, offset: int = 0) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+        """
+        Yield (next offset, data) as the file grows past offset, starting with
+        what is already there. Data is cut at line boundaries where possible;
+        None is yielded as a heartbeat when nothing was written for a while.
+        """
+        watch = self._watches.get(path)
+        if watch is None:
+            watch = self._watches[path] = _Watch(path)
+            watch.task = asyncio.ensure_future(self._poll(watch))
+        watch.subscribers += 1
+        metrics.set_gauge("logs.tailers", sum(w.subscribers for w in self._watches.values()))
+        try:
+            while True:
+                changed = watch.changed
+                if watch.size < offset:
+                    offset = 0  # The log was deleted or replaced; start over
+                if watch.size > offset:
+                    data = _read_lines(path, offset, watch.size - offset)
+                    if data:
+                        offset += len(data)
+                        yield offset, data
+                        continue
+                try:
+                    await asyncio.wait_for(changed.wait(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield offset, None
+        finally:
+            watch.subscribers -= 1
+            if watch.subscribers == 0:
+                watch.task.cancel()
+                del self._watches[path]
+            metrics.set_gauge("logs.tailers", sum(w.subscribers for w in self._watches.values()))
+
+    async def _poll(self, watch: _Watch):
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            try:
+                size = _file_size(watch.path)
+            except OSError as e:
+                logger.error(f"Error checking log file {watch.path}: {str(e)}")
+                continue
+            if size != watch.size:
+                watch.size = size
+                changed, watch.changed = watch.changed, asyncio.Event()
+                changed.set()
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _read_lines(path: Path, offset: int, available: int) -> bytes:
+    """Read one chunk from offset, trimmed to the last complete line if there is one"""
+    _, data, _ = read_log_range(path, offset, min(available, CHUNK_SIZE))
+    end = data.rfind(b"\n")
+    if end == -1:
+        # A partial line is only sent once it fills a whole chunk
+        return data if len(data) == CHUNK_SIZE else b""
+    return data[:end + 1]
@@ -0,0 +1,55 @@
+import asyncio
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from ..core.logger import logger
+from ..database import async_engine
+
+MAX_RECONNECT_DELAY = 30.0
+
+# asyncpg's notification callback: (connection, pid, channel, payload)
+NotifyCallback = Callable[[object, int, str, str], None]
+
+
+async def listen_forever(
+    channel: str,
+    on_notify: NotifyCallback,
+    description: str,
+    on_connect: Optional[Callable[[bool], None]] = None,
+    on_disconnect: Optional[Callable[[], None]] = None,
+):
+    """
+    LISTEN on a PostgreSQL channel until cancelled, reconnecting with backoff.
+
+    The connection is dedicated, outside the pool, which would otherwise lose
+    it for good. on_connect is called with whether this is a reconnect, once
+    the listener is in place: notifications sent while disconnected are lost,
+    so that is when to drop or reload whatever they would have updated.
+    on_disconnect is called whenever the connection is lost or fails.
+    """
+    listener_engine = create_async_engine(async_engine.url, poolclass=NullPool)
+    delay, connected_before = 1.0, False
+    try:
+        while True:
+            try:
+                async with listener_engine.connect() as conn:
+                    raw = (await conn.get_raw_connection()).driver_connection
+                    lost = asyncio.Event()
+                    raw.add_termination_listener(lambda _: lost.set())
+                    await raw.add_listener(channel, on_notify)
+                    logger.info(f"Listening for {description} on {channel}")
+                    if on_connect is not None:
+                        on_connect(connected_before)
+                    connected_before, delay = True, 1.0
+                    await lost.wait()
+            except Exception as e:
+                logger.error(f"Listener for {description} on {channel} failed: {str(e)}")
+            finally:
+                if on_disconnect is not None:
+                    on_disconnect()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+    finally:
+        await listener_engine.dispose()
@@ -0,0 +1,129 @@
+import socket
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.website import Website
+from ..core.config import settings
+from ..core.logger import logger
+
+T = TypeVar("T")
+
+
+class PortAllocator:
+    """
+    Constant-time allocator for website ports.
+
+    A bitmap of used ports and a FIFO of free candidates are rebuilt from the
+    websites table once, after which allocation and release are O(1). The
+    unique constraint on websites.port is the cross-process reservation: a
+    caller that loses a race to another API process gets an IntegrityError,
+    the port is marked used and the next candidate is tried.
+    """
+    _instance = None
+    MAX_ATTEMPTS = 20
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._lock = threading.Lock()
+            cls._instance._loaded = False
+        return cls._instance
+
+    @property
+    def base_port(self) -> int:
+        return settings.WEBSITE_MIN_PORT
+
+    @property
+    def size(self) -> int:
+        return settings.WEBSITE_PORT_RANGE_SIZE
+
+    async def load(self, db: AsyncSession):
+        """Rebuild the free set from the ports recorded in the database"""
+        used = bytearray(self.size)
+        for port in await db.scalars(select(Website.port)):
+            if self.base_port <= port < self.base_port + self.size:
+                used[port - self.base_port] = 1
+        with self._lock:
+            self._used = used
+            self._free: Deque[int] = deque(i for i in range(self.size) if not used[i])
+            self._loaded = True
+        logger.info(f"Port allocator loaded: {len(self._free)} of {self.size} ports free")
+
+    def _take(self) -> Optional[int]:
+        """Pop the next free port and mark it used (caller holds the lock)"""
+        skipped = 0
+        while self._free and skipped <= len(self._free):
+            offset = self._free.popleft()
+            if self._used[offset]:
+                continue  # Stale entry left behind by mark_used
+            port = self.base_port + offset
+            if not _is_port_available(port):
+                # Held by something outside our control; retry it later
+                self._free.append(offset)
+                skipped += 1
+                continue
+            self._used[offset] = 1
+            return port
+        return None
+
+    async def allocate(self, db: AsyncSession) -> int:
+        """Reserve a free port in-process"""
+        if not self._loaded:
+            await self.load(db)
+        with self._lock:
+            port = self._take()
+        if port is None:
+            # Ports may have been freed by another process (e.g. admin-manager.py)
+            await self.load(db)
+            with self._lock:
+                port = self._take()
+        if port is None:
+            raise ValueError(
+                f"No available ports in range {self.base_port}-{self.base_port + self.size - 1}"
+            )
+        return port
+
+    def release(self, port: int):
+        """Return a port to the free set"""
+        offset = port - self.base_port
+        if not self._loaded or not 0 <= offset < self.size:
+            return
+        with self._lock:
+            if self._used[offset]:
+                self._used[offset] = 0
+                self._free.append(offset)
+
+    def mark_used(self, port: int):
+        offset = port - self.base_port
+        if self._loaded and 0 <= offset < self.size:
+            with self._lock:
+                self._used[offset] = 1
+
+    async def assign(self, db: AsyncSession, create: Callable[[int], Awaitable[T]]) -> T:
+        """Allocate a port and pass it to create, retrying if another process took it"""
+        for _ in range(self.MAX_ATTEMPTS):
+            port = await self.allocate(db)
+            try:
+                return await create(port)
+            except IntegrityError:
+                logger.warning(f"Port {port} was taken concurrently, retrying")
+                self.mark_used(port)
+            except Exception:
+                self.release(port)
+                raise
+        raise ValueError("Could not reserve a port, please retry")
+
+
+def _is_port_available(port: int) -> bool:
+    """Check if a port is actually available on the system"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(('', port))
+            return True
+        except socket.error:
+            return False
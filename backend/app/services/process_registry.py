@@ -0,0 +1,81 @@
+import os
+import socket
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, select
+
+from ..database import SessionLocal
+from ..models.site_process import SiteProcess
+from ..core.logger import logger
+from .supervisor import pid_running, process_start_time
+
+
+class ProcessRegistry:
+    """
+    Which process serves which port, shared by every API worker on the host.
+
+    Site servers outlive the worker that started them, so ownership lives in
+    the site_processes table rather than in one worker's memory: any worker
+    can look a port up, check the process is still the one recorded (same
+    pid, process group and start time, so a recycled pid is not mistaken for
+    it) and signal it. Rows whose process is gone are dropped on lookup.
+    """
+
+    def __init__(self):
+        self.host = socket.gethostname()
+
+    def record(self, port: int, pid: int):
+        """Note that pid now serves port"""
+        self.record_many({port: pid})
+
+    def record_many(self, pids_by_port: Dict[int, int]):
+        rows = []
+        for port, pid in pids_by_port.items():
+            start_time = process_start_time(pid)
+            if start_time is None:
+                logger.warning(f"Process {pid} for port {port} exited before it was registered")
+                continue
+            try:
+                pgid = os.getpgid(pid)
+            except ProcessLookupError:
+                continue
+            rows.append(SiteProcess(port=port, pid=pid, pgid=pgid, start_time=start_time, host=self.host))
+        if not rows:
+            return
+        with SessionLocal() as db:
+            for row in rows:
+                db.merge(row)
+            db.commit()
+
+    def live(self, ports: Iterable[int]) -> Dict[int, int]:
+        """Map ports to their registered server's pid, for servers still running"""
+        ports = list(ports)
+        if not ports:
+            return {}
+        with SessionLocal() as db:
+            rows = db.scalars(
+                select(SiteProcess).where(SiteProcess.port.in_(ports), SiteProcess.host == self.host)
+            ).all()
+            live = {row.port: row.pid for row in rows if self._is_alive(row)}
+            stale = [row.port for row in rows if row.port not in live]
+            if stale:
+                db.execute(delete(SiteProcess).where(SiteProcess.port.in_(stale), SiteProcess.host == self.host))
+                db.commit()
+        return live
+
+    def forget(self, ports: List[int]):
+        """Drop the rows of ports whose servers were stopped"""
+        if not ports:
+            return
+        with SessionLocal() as db:
+            db.execute(delete(SiteProcess).where(SiteProcess.port.in_(ports), SiteProcess.host == self.host))
+            db.commit()
+
+    @staticmethod
+    def _is_alive(row: SiteProcess) -> bool:
+        if not pid_running(row.pid) or process_start_time(row.pid) != row.start_time:
+            return False
+        try:
+            return os.getpgid(row.pid) == row.pgid
+        except ProcessLookupError:
+            return False
@@ -0,0 +1,102 @@
+import socket
+import time
+from datetime import datetime
+from typing import Dict, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from ..database import SessionLocal
+from ..models.deployment import Deployment, DeploymentStatus
+from ..models.website import Website, WebsiteStatus, SERVING_STATUSES
+from ..core.config import settings
+from ..core.logger import logger
+from ..core.metrics import metrics
+from .deployment import WebsiteProcessManager
+
+
+def reconcile_sites() -> Dict[str, int]:
+    """
+    Bring the serving state in line with the websites table after a restart.
+
+    Every running or hibernated site is checked against the live system: servers that are
+    still listening are adopted, dead ones are restarted from their current
+    release with bounded parallelism, and sites without a release get a
+    deployment job. Statuses and pids are written in one transaction.
+    """
+    started = time.monotonic()
+    manager = WebsiteProcessManager()
+    counts = {"adopted": 0, "restarted": 0, "redeploying": 0, "failed": 0}
+
+    with SessionLocal() as db:
+        websites = db.query(Website)\
+                     .options(joinedload(Website.owner))\
+                     .filter(Website.status.in_(SERVING_STATUSES))\
+                     .all()
+        if not websites:
+            return counts
+
+        live = manager.adopt_sites(websites)
+        dead = [w for w in websites if w.port not in live]
+        counts["adopted"] = len(websites) - len(dead)
+
+        resumed = manager.resume_sites(dead, settings.RECONCILE_CONCURRENCY)
+        counts["restarted"] = len(resumed)
+
+        # A website has at most one queued job; the one already waiting will do
+        queued = set(db.scalars(
+            select(Deployment.website_id).where(
+                Deployment.status == DeploymentStatus.QUEUED,
+                Deployment.website_id.in_([w.id for w in dead])
+            )
+        ))
+        now = datetime.utcnow()
+        updates = []
+        for website in websites:
+            if website.port in live or website.port in resumed:
+                # Hibernating sites come back asleep: their socket accepts, the server starts on demand
+                pid = live.get(website.port) or resumed.get(website.port)
+                status = WebsiteStatus.RUNNING if pid else WebsiteStatus.HIBERNATED
+                updates.append({"id": website.id, "status": status.value, "pid": pid, "updated_at": now})
+            else:
+                # No release on disk (or it failed to start): build it again
+                if website.id not in queued:
+                    db.add(Deployment(website_id=website.id, status=DeploymentStatus.QUEUED))
+                updates.append({"id": website.id, "status": WebsiteStatus.DEPLOYING.value, "pid": None, "updated_at": now})
+                counts["redeploying"] += 1
+        db.bulk_update_mappings(Website, updates)
+        db.commit()
+
+        # Probing a socket-activated site would wake it; its socket is the runner's and already listening
+        serving = set(live) | {port for port, pid in resumed.items() if pid}
+
+    missing = _wait_until_serving(serving, settings.RECONCILE_TIMEOUT)
+    counts["failed"] = len(missing)
+    elapsed = time.monotonic() - started
+    metrics.observe("reconcile.time_to_serving_seconds", elapsed)
+    for key, value in counts.items():
+        metrics.set_gauge(f"reconcile.{key}", value)
+    logger.info(
+        f"Reconciled {len(websites)} sites in {elapsed:.2f}s: "
+        + ", ".join(f"{value} {key}" for key, value in counts.items())
+    )
+    if missing:
+        logger.error(f"Sites not serving after {settings.RECONCILE_TIMEOUT}s on ports {sorted(missing)}")
+    return counts
+
+
+def _wait_until_serving(ports: Set[int], timeout: float) -> Set[int]:
+    """Poll ports until each accepts connections; returns those that never did"""
+    deadline = time.monotonic() + timeout
+    pending = set(ports)
+    while pending and time.monotonic() < deadline:
+        pending = {port for port in pending if not _accepts_connections(port)}
+        if pending:
+            time.sleep(0.05)
+    return pending
+
+
+def _accepts_connections(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(0.2)
+        return s.connect_ex(("127.0.0.1", port)) == 0
@@ -0,0 +1,369 @@
+"""
+Site runner: owns the servers of deployed sites.
+
+SiteRunner starts, stops and reports on sites, whether they are routes on the
+multiplexed static host or processes of their own (socket-activated when
+hibernation is on). The API embeds one when SITE_RUNNER_SOCKET is unset;
+otherwise a long-lived daemon owns every site and the API, its workers and
+admin-manager.py call it over a Unix domain socket (see runner_client.py), so
+restarting or scaling the API leaves the sites alone. Run the daemon with:
+
+    python -m app.services.runner [--socket <path>]
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from ..database import SessionLocal
+from ..models.website import Website, WebsiteStatus, SERVING_STATUSES
+from ..core.config import settings
+from ..core.logger import logger, setup_logging
+from .activation import SocketActivator
+from .process_registry import ProcessRegistry
+from .runner_client import encode
+from .static_server import StaticHostController
+from .supervisor import ProcessSupervisor
+
+STATIC_SITES_DIR = Path(os.getenv("STATIC_SITES_DIR", "/app/static_sites"))
+
+
+def _state(serving: bool, pid: Optional[int] = None, hibernated: bool = False) -> Dict:
+    return {"serving": serving, "pid": pid, "hibernated": hibernated}
+
+
+class SiteRunner:
+    """
+    Starts, stops and reports on the servers of many sites per call.
+
+    A site is described by {"port", "root", "host", "log", "wake"}: the
+    directory to serve, its custom domain, the log file its server writes to
+    and, with hibernation, whether to start it awake. Starting is idempotent,
+    so a site already served keeps its server. Processes are recorded in the
+    shared registry, so servers started by another API worker or an earlier
+    run of the daemon can be inspected and stopped too.
+    """
+
+    def __init__(self):
+        self.static_host = StaticHostController(STATIC_SITES_DIR, workers=settings.STATIC_SERVER_WORKERS)
+        self.supervisor = ProcessSupervisor()
+        self.registry = ProcessRegistry()
+        self.activator = SocketActivator(self.supervisor, self._record_activation, settings.HIBERNATE_IDLE_SECONDS)
+        self._processes: Dict[int, subprocess.Popen] = {}  # Servers this runner started, by port
+        self._sites: Dict[int, Dict] = {}  # Last start of each port, for restart
+        self._lock = threading.Lock()
+
+    @property
+    def multiplexed(self) -> bool:
+        return settings.STATIC_SERVER_MODE == "multiplexed"
+
+    @property
+    def hibernation(self) -> bool:
+        return not self.multiplexed and settings.HIBERNATE_IDLE_SECONDS > 0
+
+    def _record_activation(self, port: int, pid: Optional[int]):
+        """Persist a site waking up (pid) or hibernating (None)"""
+        with SessionLocal() as db:
+            db.query(Website)\
+              .filter(Website.port == port, Website.status.in_(SERVING_STATUSES))\
+              .update({
+                  "status": WebsiteStatus.RUNNING if pid else WebsiteStatus.HIBERNATED,
+                  "pid": pid,
+                  "updated_at": datetime.utcnow()
+              }, synchronize_session=False)
+            db.commit()
+
+    def _live(self, ports: Iterable[int]) -> Dict[int, int]:
+        """Pids of the per-site processes serving ports, ours first, then the registry's"""
+        live, unknown = {}, []
+        with self._lock:
+            for port in ports:
+                process = self._processes.get(port)
+                if process is not None and process.poll() is None:
+                    live[port] = process.pid
+                else:
+                    self._processes.pop(port, None)
+                    unknown.append(port)
+        live.update(self.registry.live(unknown))
+        return live
+
+    def bulk_status(self, ports: Iterable[int]) -> Dict[int, Dict]:
+        """Whether each port is served, by which pid, and whether it is hibernating"""
+        ports = list(ports)
+        routed = self.static_host.routed_ports()
+        host_pids = self.static_host.worker_pids() if routed else []
+        result, rest = {}, []
+        for port in ports:
+            if port in routed:
+                result[port] = _state(True, host_pids[0] if host_pids else None)
+            elif self.activator.is_registered(port):
+                pid = self.activator.pid(port)
+                result[port] = _state(True, pid, hibernated=pid is None)
+            else:
+                rest.append(port)
+        live = self._live(rest)
+        for port in rest:
+            result[port] = _state(port in live, live.get(port))
+        return result
+
+    def status(self, port: int) -> Dict:
+        return self.bulk_status([port])[port]
+
+    def start(self, sites: List[Dict], concurrency: int = 1) -> Dict[int, Dict]:
+        """Serve each site unless it already is; returns its state, or {"error"} if it failed to start"""
+        for site in sites:
+            self._sites[site["port"]] = site
+        if self.multiplexed:
+            if not sites:
+                return {}
+            # One route table write and a single reload for every site
+            pid = self.static_host.add_routes([
+                {"port": site["port"], "root": site["root"], "host": site.get("host")} for site in sites
+            ])
+            for site in sites:
+                self._log(site, f"Routing port {site['port']} to {site['root']} on the static host\n")
+            return {site["port"]: _state(True, pid) for site in sites}
+
+        live = {} if self.hibernation else self._live(site["port"] for site in sites)
+        results = {port: _state(True, pid) for port, pid in live.items()}
+        pending = [site for site in sites if site["port"] not in live]
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pending) or 1))) as pool:
+            for site, result in zip(pending, pool.map(self._start_one, pending)):
+                results[site["port"]] = result
+        return results
+
+    def _start_one(self, site: Dict) -> Dict:
+        port = site["port"]
+        try:
+            with open(site["log"], "a") as log_f:
+                try:
+                    if self.hibernation:
+                        # The server exits when idle and is started again on the next connection
+                        log_f.write(
+                            f"Socket-activating port {port}, hibernating after "
+                            f"{settings.HIBERNATE_IDLE_SECONDS}s idle\n"
+                        )
+                        log_f.flush()
+                        pid = self.activator.register(port, Path(site["root"]), log_f.name, start=site.get("wake", True))
+                        return _state(True, pid, hibernated=pid is None)
+
+                    log_f.write(f"Starting server on port {port} using {sys.executable}\n")
+                    log_f.flush()
+                    serve_dir = Path(site["root"])
+                    process = subprocess.Popen(
+                        [sys.executable, "-m", "http.server", str(port), "--directory", str(serve_dir)],
+                        # Run outside the release so the current symlink can be swapped underneath
+                        cwd=serve_dir.parent,
+                        preexec_fn=os.setsid,
+                        stdout=log_f,
+                        stderr=subprocess.STDOUT
+                    )
+                except Exception as e:
+                    log_f.write(f"Failed to start server on port {port}: {str(e)}\n")
+                    raise
+        except Exception as e:
+            logger.error(f"Failed to start site on port {port}: {str(e)}")
+            return {"error": str(e)}
+
+        self.supervisor.track(process)
+        with self._lock:
+            self._processes[port] = process
+        self.registry.record(port, process.pid)
+        return _state(True, process.pid)
+
+    @staticmethod
+    def _log(site: Dict, message: str):
+        try:
+            with open(site["log"], "a") as log_f:
+                log_f.write(message)
+        except OSError as e:
+            logger.error(f"Could not write to {site['log']}: {str(e)}")
+
+    def stop(self, ports: Iterable[int]) -> Dict[int, bool]:
+        """Stop several sites at once, sharing a single wait deadline"""
+        ports = list(ports)
+        routed = self.static_host.remove_routes(ports)
+        results = {port: True for port in routed}
+
+        pids_by_port: Dict[int, int] = {}
+        for port in ports:
+            if port in routed:
+                continue
+            if self.activator.is_registered(port):
+                pid = self.activator.unregister(port)
+                results[port] = True
+                if pid:
+                    pids_by_port[port] = pid
+        pids_by_port.update(self._live(port for port in ports if port not in results))
+        with self._lock:
+            for port in pids_by_port:
+                self._processes.pop(port, None)
+
+        # Processes might not be registered but still running (e.g. started before the registry)
+        unknown = [port for port in ports if port not in results and port not in pids_by_port]
+        if unknown:
+            try:
+                host_pids = set(self.static_host.worker_pids())
+                for port, pid in self.supervisor.find_listeners(unknown).items():
+                    if pid in host_pids:
+                        continue  # Never take down the shared host for one site
+                    logger.info(f"Found process {pid} on port {port} - attempting to stop")
+                    pids_by_port[port] = pid
+            except Exception as e:
+                logger.error(f"Error looking up processes on ports {unknown}: {str(e)}")
+
+        stopped = self.supervisor.stop_many(pids_by_port.values())
+        self.registry.forget([port for port in pids_by_port if stopped.get(pids_by_port[port], True)])
+        for port in ports:
+            if port in pids_by_port and not stopped.get(pids_by_port[port], True):
+                logger.error(f"Error stopping site on port {port}")
+            # Report success regardless so callers can continue with other operations
+            results.setdefault(port, True)
+        return results
+
+    def restart(self, ports: Iterable[int]) -> Dict[int, Dict]:
+        """Stop sites and start them again from their last start; unknown ports get an error"""
+        ports = list(ports)
+        sites = [self._sites[port] for port in ports if port in self._sites]
+        results = {port: {"error": "Site was not started by this runner"} for port in ports if port not in self._sites}
+        self.stop([site["port"] for site in sites])
+        for site in sites:
+            # A restarted hibernating site comes back awake
+            site["wake"] = True
+        results.update(self.start(sites, len(sites)))
+        return results
+
+    def adopt(self, sites: List[Dict]) -> Dict[int, int]:
+        """Take over the sites an earlier run left serving; returns the pid serving each"""
+        ports = [site["port"] for site in sites]
+        if self.multiplexed:
+            routed = self.static_host.routed_ports().intersection(ports)
+            if not routed:
+                return {}
+            # Respawning the host (if it died with its owner) restores every routed site at once
+            pid = self.static_host.ensure_running()[0]
+            live = {port: pid for port in routed}
+        else:
+            host_pids = set(self.static_host.worker_pids())
+            live = {
+                port: pid
+                for port, pid in self.supervisor.find_listeners(ports).items()
+                if pid not in host_pids
+            }
+            if self.hibernation:
+                # Servers of the last run hold their socket alone; restart them socket-activated
+                self.supervisor.stop_many(live.values())
+                return {}
+            self.registry.record_many(live)
+        for site in sites:
+            if site["port"] in live:
+                self._sites[site["port"]] = site
+        return live
+
+
+# Requests the daemon answers, with the SiteRunner call each maps to
+OPERATIONS = {
+    "start": lambda runner, request: runner.start(request["sites"], int(request.get("concurrency", 1))),
+    "stop": lambda runner, request: runner.stop(request["ports"]),
+    "restart": lambda runner, request: runner.restart(request["ports"]),
+    "status": lambda runner, request: runner.status(request["port"]),
+    "bulk-status": lambda runner, request: runner.bulk_status(request["ports"]),
+    "adopt": lambda runner, request: runner.adopt(request["sites"]),
+}
+
+
+class RunnerRequestHandler(socketserver.StreamRequestHandler):
+    """Answers each request line of a connection in turn"""
+
+    def handle(self):
+        for line in self.rfile:
+            self.wfile.write(encode(self.server.dispatch(line)))
+            self.wfile.flush()
+
+
+class RunnerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, runner: SiteRunner):
+        self.runner = runner
+        super().__init__(socket_path, RunnerRequestHandler)
+        os.chmod(socket_path, 0o660)
+
+    def dispatch(self, line: bytes) -> Dict:
+        try:
+            request = json.loads(line)
+            operation = OPERATIONS[request["op"]]
+        except (ValueError, KeyError, TypeError) as e:
+            return {"ok": False, "error": f"Invalid request: {str(e)}"}
+        try:
+            return {"ok": True, "result": operation(self.runner, request)}
+        except (KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "error": f"Invalid {request['op']} request: {str(e)}"}
+        except Exception as e:
+            logger.error(f"Site runner {request['op']} failed: {str(e)}")
+            return {"ok": False, "error": str(e)}
+
+
+def _claim_socket(socket_path: str):
+    """Remove a socket left by a dead runner; refuse to start next to a live one"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except FileNotFoundError:
+            return
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+    raise SystemExit(f"A site runner is already listening on {socket_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Site runner daemon")
+    parser.add_argument("--socket", default=settings.SITE_RUNNER_SOCKET, help="Unix socket to listen on")
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("set SITE_RUNNER_SOCKET or pass --socket")
+
+    setup_logging()
+    from .deployment import WebsiteProcessManager
+    from .reconciler import reconcile_sites
+
+    runner = SiteRunner()
+    # This process is the runner: restore sites through it, not through the socket
+    WebsiteProcessManager().runner = runner
+    Path(args.socket).parent.mkdir(parents=True, exist_ok=True)
+    _claim_socket(args.socket)
+    server = RunnerServer(args.socket, runner)
+    # shutdown() waits for serve_forever, so it cannot run in the signal handler's thread
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+
+    def restore():
+        try:
+            reconcile_sites()
+        except Exception as e:
+            logger.error(f"Startup reconciliation failed: {str(e)}")
+
+    threading.Thread(target=restore, name="reconcile", daemon=True).start()
+    logger.info(f"Site runner listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+    # Site servers run in their own sessions and keep serving; socket-activated ones close with us
+    logger.info("Site runner stopped")
+
+
+if __name__ == "__main__":
+    main()
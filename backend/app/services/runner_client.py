@@ -0,0 +1,74 @@
+"""
+Client of the site runner daemon (app/services/runner.py).
+
+The protocol is one JSON object per line over a Unix domain socket: a request
+names an op and its batch, e.g. {"op": "bulk-status", "ports": [11000, 11001]},
+and the reply is {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+Results keyed by port come back with string keys, as JSON has no others.
+Kept free of the app's settings and database so admin-manager.py can use it.
+"""
+import json
+import socket
+from typing import Dict, Iterable, List, Optional
+
+
+class RunnerError(Exception):
+    """Raised when the site runner rejects or fails a request"""
+
+
+class RunnerUnavailableError(RunnerError):
+    """Raised when nothing is listening on the site runner's socket"""
+
+
+def encode(message: Dict) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+def _by_port(result: Dict) -> Dict[int, object]:
+    return {int(port): value for port, value in result.items()}
+
+
+class RunnerClient:
+    """Batched calls to the site runner; each call is one round trip on a fresh connection"""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _call(self, op: str, **params):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                sock.sendall(encode({"op": op, **params}))
+                with sock.makefile("rb") as reader:
+                    line = reader.readline()
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise RunnerUnavailableError(f"Site runner is not running at {self.socket_path}: {str(e)}")
+        except OSError as e:
+            raise RunnerError(f"Site runner request {op} failed: {str(e)}")
+        if not line:
+            raise RunnerError(f"Site runner closed the connection during {op}")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise RunnerError(reply.get("error") or f"Site runner request {op} failed")
+        return reply["result"]
+
+    def start(self, sites: List[Dict], concurrency: int = 1) -> Dict[int, Dict]:
+        """Serve sites ({"port", "root", "host", "log", "wake"}) unless already served"""
+        return _by_port(self._call("start", sites=sites, concurrency=concurrency))
+
+    def stop(self, ports: Iterable[int]) -> Dict[int, bool]:
+        return _by_port(self._call("stop", ports=list(ports)))
+
+    def restart(self, ports: Iterable[int]) -> Dict[int, Dict]:
+        return _by_port(self._call("restart", ports=list(ports)))
+
+    def status(self, port: int) -> Dict:
+        return self._call("status", port=port)
+
+    def bulk_status(self, ports: Iterable[int]) -> Dict[int, Dict]:
+        return _by_port(self._call("bulk-status", ports=list(ports)))
+
+    def adopt(self, sites: List[Dict]) -> Dict[int, int]:
+        return _by_port(self._call("adopt", sites=sites))
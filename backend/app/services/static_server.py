@@ -0,0 +1,507 @@
+"""
+Multiplexed asyncio static file server.
+
+A single host process (or one per core with SO_REUSEPORT) serves every
+deployed site. Each site keeps its own listening port, and requests whose
+Host header matches a site's custom domain are routed to that site from any
+listener. The route table lives in a JSON file written by
+StaticHostController; host processes re-read it on SIGHUP.
+
+Run a host worker with:
+
+    python -m app.services.static_server --routes <routes.json>
+
+The same server also runs a single socket-activated site for hibernation in
+process mode (see app/services/activation.py):
+
+    python -m app.services.static_server --listen-fd <fd> --root <dir> --idle-timeout <s>
+"""
+import argparse
+import asyncio
+import fcntl
+import html
+import json
+import mimetypes
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+from ..core.logger import logger, setup_logging
+from .supervisor import pid_running
+
+SERVER_NAME = "deployment-manager-static"
+REQUEST_HEAD_LIMIT = 16 * 1024
+KEEPALIVE_TIMEOUT = 15.0
+LISTEN_BACKLOG = 512
+INDEX_FILES = ("index.html", "index.htm")
+
+REASONS = {
+    200: "OK",
+    301: "Moved Permanently",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    431: "Request Header Fields Too Large",
+}
+
+
+def load_routes(routes_file: Path) -> List[Dict]:
+    """Read the route table, returning an empty list if it does not exist yet"""
+    try:
+        with open(routes_file) as f:
+            return json.load(f).get("sites", [])
+    except FileNotFoundError:
+        return []
+
+
+class StaticSiteHost:
+    """Serves the static sites listed in a routes file from one event loop"""
+
+    def __init__(self, routes_file: Path, reuse_port: bool = False):
+        self.routes_file = Path(routes_file)
+        self.reuse_port = reuse_port
+        self.ports: Dict[int, str] = {}  # listening port -> site root
+        self.hosts: Dict[str, str] = {}  # custom domain -> site root
+        self.servers: Dict[int, asyncio.AbstractServer] = {}
+        self.connections: Dict[int, Set[asyncio.StreamWriter]] = {}
+        self._sync_lock = asyncio.Lock()
+        self._stopped = asyncio.Event()
+        self.last_activity = time.monotonic()
+
+    def reload(self):
+        """Re-read the route table and reconcile listeners with it"""
+        ports, hosts = {}, {}
+        for site in load_routes(self.routes_file):
+            ports[int(site["port"])] = site["root"]
+            if site.get("host"):
+                hosts[site["host"].lower()] = site["root"]
+        self.ports, self.hosts = ports, hosts
+        asyncio.ensure_future(self._sync_listeners())
+
+    async def _sync_listeners(self):
+        async with self._sync_lock:
+            for port in set(self.servers) - set(self.ports):
+                self._close_listener(port)
+            for port in set(self.ports) - set(self.servers):
+                try:
+                    self.servers[port] = await self._open_listener(port)
+                    logger.info(f"Serving {self.ports.get(port)} on port {port}")
+                except OSError as e:
+                    logger.error(f"Could not listen on port {port}: {str(e)}")
+
+    async def _open_listener(self, port: int) -> asyncio.AbstractServer:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if self.reuse_port:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind(("0.0.0.0", port))
+            sock.listen(LISTEN_BACKLOG)
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        return await asyncio.start_server(
+            self._handle_connection, sock=sock, limit=REQUEST_HEAD_LIMIT
+        )
+
+    def _close_listener(self, port: int):
+        server = self.servers.pop(port, None)
+        if server:
+            server.close()
+        for writer in self.connections.pop(port, set()):
+            writer.close()
+        logger.info(f"Stopped serving port {port}")
+
+    async def serve_forever(self):
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGHUP, self.reload)
+        loop.add_signal_handler(signal.SIGTERM, self._stopped.set)
+        loop.add_signal_handler(signal.SIGINT, self._stopped.set)
+        self.reload()
+        await self._stopped.wait()
+        for port in list(self.servers):
+            self._close_listener(port)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        port = writer.get_extra_info("sockname")[1]
+        self.connections.setdefault(port, set()).add(writer)
+        self.last_activity = time.monotonic()
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT
+                    )
+                except asyncio.LimitOverrunError:
+                    await self._send_error(writer, 431, keep_alive=False)
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                self.last_activity = time.monotonic()
+                if not await self._handle_request(head, port, writer):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.get(port, set()).discard(writer)
+            writer.close()
+
+    async def _handle_request(self, head: bytes, port: int, writer: asyncio.StreamWriter) -> bool:
+        """Answer a single request; returns whether the connection may be reused"""
+        try:
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ", 2)
+        except ValueError:
+            await self._send_error(writer, 400, keep_alive=False)
+            return False
+
+        headers = {}
+        for line in header_lines:
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = (
+            connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        )
+        # Request bodies are never read, so a connection carrying one is not reusable
+        if headers.get("content-length", "0") != "0" or "transfer-encoding" in headers:
+            keep_alive = False
+
+        if method not in ("GET", "HEAD"):
+            await self._send_error(writer, 405, keep_alive, {"Allow": "GET, HEAD"})
+            return keep_alive
+
+        root = self.hosts.get(headers.get("host", "").split(":")[0].lower()) or self.ports.get(port)
+        url = urlsplit(target)
+        fs_path = self._translate_path(root, unquote(url.path)) if root else None
+        if fs_path is None:
+            await self._send_error(writer, 404, keep_alive)
+            return keep_alive
+
+        if os.path.isdir(fs_path):
+            if not url.path.endswith("/"):
+                location = url.path + "/" + (f"?{url.query}" if url.query else "")
+                await self._send_error(writer, 301, keep_alive, {"Location": location})
+                return keep_alive
+            for index in INDEX_FILES:
+                if os.path.isfile(os.path.join(fs_path, index)):
+                    fs_path = os.path.join(fs_path, index)
+                    break
+            else:
+                body = self._list_directory(fs_path, unquote(url.path))
+                await self._send(writer, 200, keep_alive, {
+                    "Content-Type": "text/html; charset=utf-8",
+                }, body if method == "GET" else b"", len(body))
+                return keep_alive
+
+        await self._send_file(writer, method, fs_path, headers, keep_alive)
+        return keep_alive
+
+    @staticmethod
+    def _translate_path(root: str, path: str) -> Optional[str]:
+        """Map a URL path onto the site root, refusing traversal and git metadata"""
+        parts = [p for p in path.split("/") if p not in ("", ".")]
+        for part in parts:
+            if part == ".." or part == ".git" or "\x00" in part or os.sep in part:
+                return None
+        fs_path = os.path.join(root, *parts)
+        if path.endswith("/"):
+            fs_path += "/"
+        return fs_path
+
+    async def _send_file(self, writer, method: str, fs_path: str, headers: Dict, keep_alive: bool):
+        try:
+            f = open(fs_path, "rb")
+        except OSError:
+            await self._send_error(writer, 404, keep_alive)
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            response_headers = {
+                "Content-Type": mimetypes.guess_type(fs_path)[0] or "application/octet-stream",
+                "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+            }
+            if self._not_modified(headers.get("if-modified-since"), st.st_mtime):
+                await self._send(writer, 304, keep_alive, response_headers)
+                return
+            await self._send(writer, 200, keep_alive, response_headers, content_length=st.st_size)
+            if method == "GET" and st.st_size:
+                await asyncio.get_running_loop().sendfile(writer.transport, f)
+
+    @staticmethod
+    def _not_modified(if_modified_since: Optional[str], mtime: float) -> bool:
+        if not if_modified_since:
+            return False
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    def _list_directory(fs_path: str, url_path: str) -> bytes:
+        try:
+            names = sorted(os.listdir(fs_path), key=str.lower)
+        except OSError:
+            names = []
+        title = html.escape(f"Directory listing for {url_path}")
+        items = []
+        for name in names:
+            if name == ".git":
+                continue
+            display = name + "/" if os.path.isdir(os.path.join(fs_path, name)) else name
+            items.append(f'<li><a href="{quote(display)}">{html.escape(display)}</a></li>')
+        page = (
+            f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title></head>"
+            f"<body><h1>{title}</h1><hr><ul>{''.join(items)}</ul><hr></body></html>"
+        )
+        return page.encode("utf-8")
+
+    async def _send_error(self, writer, status: int, keep_alive: bool, extra: Optional[Dict] = None):
+        body = f"{status} {REASONS[status]}\n".encode()
+        response_headers = {"Content-Type": "text/plain; charset=utf-8"}
+        response_headers.update(extra or {})
+        await self._send(writer, status, keep_alive, response_headers, body, len(body))
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        keep_alive: bool,
+        headers: Dict,
+        body: bytes = b"",
+        content_length: Optional[int] = None,
+    ):
+        lines = [
+            f"HTTP/1.1 {status} {REASONS[status]}",
+            f"Server: {SERVER_NAME}",
+            f"Date: {formatdate(usegmt=True)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if content_length is not None:
+            lines.append(f"Content-Length: {content_length}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+
+class ActivatedSiteHost(StaticSiteHost):
+    """Serves one site on an inherited listening socket and exits once idle"""
+
+    def __init__(self, listen_fd: int, root: str, idle_timeout: float, ready_fd: Optional[int] = None):
+        super().__init__(Path(os.devnull))
+        self.sock = socket.socket(fileno=listen_fd)
+        self.port = self.sock.getsockname()[1]
+        self.root = root
+        self.idle_timeout = idle_timeout
+        self.ready_fd = ready_fd
+
+    def reload(self):
+        self.ports = {self.port: self.root}
+        asyncio.ensure_future(self._sync_listeners())
+
+    async def _open_listener(self, port: int) -> asyncio.AbstractServer:
+        self.sock.setblocking(False)
+        server = await asyncio.start_server(
+            self._handle_connection, sock=self.sock, limit=REQUEST_HEAD_LIMIT
+        )
+        if self.ready_fd is not None:
+            # Tell the activator we are accepting (wake latency ends here)
+            os.write(self.ready_fd, b"1")
+            os.close(self.ready_fd)
+            self.ready_fd = None
+        return server
+
+    async def serve_forever(self):
+        watchdog = asyncio.ensure_future(self._exit_when_idle())
+        try:
+            await super().serve_forever()
+        finally:
+            watchdog.cancel()
+
+    async def _exit_when_idle(self):
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 5.0))
+            if self.connections.get(self.port) or time.monotonic() - self.last_activity < self.idle_timeout:
+                continue
+            # Stop accepting first: new connections queue on the activator's socket
+            server = self.servers.pop(self.port, None)
+            if server:
+                server.close()
+            await asyncio.sleep(0.1)
+            while self.connections.get(self.port):
+                await asyncio.sleep(0.1)
+            logger.info(f"Idle for {self.idle_timeout}s, releasing port {self.port}")
+            self._stopped.set()
+            return
+
+
+class StaticHostController:
+    """
+    Manages the route table and the worker processes of the multiplexed host.
+
+    Every mutation happens under an exclusive file lock and is followed by a
+    SIGHUP to the workers, so several API processes can share one host.
+    """
+
+    def __init__(self, base_dir: Path, workers: int = 1):
+        self.state_dir = Path(base_dir) / ".static-host"
+        self.routes_file = self.state_dir / "routes.json"
+        self.pid_file = self.state_dir / "workers.pid"
+        self.log_file = self.state_dir / "host.log"
+        self.workers = max(1, workers)
+        self._children: Dict[int, subprocess.Popen] = {}
+
+    @contextmanager
+    def _locked(self):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.state_dir / "routes.lock", "w") as lock_f:
+            fcntl.flock(lock_f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_f, fcntl.LOCK_UN)
+
+    def _write_routes(self, sites: List[Dict]):
+        tmp_file = self.routes_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump({"sites": sites}, f)
+        os.replace(tmp_file, self.routes_file)
+
+    def _is_alive(self, pid: int) -> bool:
+        if pid in self._children:
+            return self._children[pid].poll() is None
+        # Killed workers re-parented to a non-reaping init linger as zombies
+        return pid_running(pid)
+
+    def _read_pids(self) -> List[int]:
+        try:
+            return [int(p) for p in self.pid_file.read_text().split()]
+        except (FileNotFoundError, ValueError):
+            return []
+
+    def _ensure_workers(self) -> Tuple[List[int], bool]:
+        """Return live worker pids, spawning the host if needed (caller holds the lock)"""
+        pids = [pid for pid in self._read_pids() if self._is_alive(pid)]
+        if pids:
+            return pids, False
+
+        package_root = Path(__file__).resolve().parents[2]
+        command = [
+            sys.executable, "-m", "app.services.static_server",
+            "--routes", str(self.routes_file),
+        ]
+        if self.workers > 1:
+            command.append("--reuse-port")
+        with open(self.log_file, "a") as log_f:
+            for _ in range(self.workers):
+                process = subprocess.Popen(
+                    command,
+                    cwd=package_root,
+                    preexec_fn=_detach_ignoring_hangup,
+                    stdout=log_f,
+                    stderr=subprocess.STDOUT,
+                )
+                self._children[process.pid] = process
+                pids.append(process.pid)
+        self.pid_file.write_text(" ".join(str(pid) for pid in pids))
+        logger.info(f"Started static host workers {pids}")
+        return pids, True
+
+    def _signal_workers(self, pids: List[int]):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGHUP)
+            except ProcessLookupError:
+                logger.warning(f"Static host worker {pid} vanished before reload")
+
+    def add_route(self, port: int, root: Path, host: Optional[str] = None) -> int:
+        """Serve root on port (and for host, if given); returns the primary worker pid"""
+        return self.add_routes([{"port": port, "root": root, "host": host}])
+
+    def add_routes(self, routes: List[Dict]) -> int:
+        """Serve several sites with one reload; returns the primary worker pid"""
+        ports = {route["port"] for route in routes}
+        with self._locked():
+            sites = [s for s in load_routes(self.routes_file) if s["port"] not in ports]
+            sites += [
+                {"port": route["port"], "root": str(route["root"]), "host": route.get("host")}
+                for route in routes
+            ]
+            self._write_routes(sites)
+            pids, started = self._ensure_workers()
+            if not started:
+                self._signal_workers(pids)
+            return pids[0]
+
+    def ensure_running(self) -> List[int]:
+        """Start the host workers if none are alive; returns their pids"""
+        with self._locked():
+            return self._ensure_workers()[0]
+
+    def remove_route(self, port: int) -> bool:
+        """Stop serving port; returns False if it was not routed"""
+        return port in self.remove_routes([port])
+
+    def remove_routes(self, ports: List[int]) -> Set[int]:
+        """Stop serving several ports with one reload; returns the ports that were routed"""
+        wanted = set(ports)
+        with self._locked():
+            sites = load_routes(self.routes_file)
+            removed = {s["port"] for s in sites if s["port"] in wanted}
+            if not removed:
+                return removed
+            self._write_routes([s for s in sites if s["port"] not in removed])
+            self._signal_workers([pid for pid in self._read_pids() if self._is_alive(pid)])
+            return removed
+
+    def has_route(self, port: int) -> bool:
+        return any(s["port"] == port for s in load_routes(self.routes_file))
+
+    def routed_ports(self) -> Set[int]:
+        return {s["port"] for s in load_routes(self.routes_file)}
+
+    def worker_pids(self) -> List[int]:
+        return [pid for pid in self._read_pids() if self._is_alive(pid)]
+
+
+def _detach_ignoring_hangup():
+    """Start a new session and ignore SIGHUP until the host installs its handler"""
+    os.setsid()
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multiplexed static site host")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--routes", help="Path to the routes JSON file")
+    mode.add_argument("--listen-fd", type=int, help="Serve one site on this inherited socket")
+    parser.add_argument("--reuse-port", action="store_true", help="Share listeners with sibling workers")
+    parser.add_argument("--root", help="Site root for --listen-fd")
+    parser.add_argument("--idle-timeout", type=float, default=600.0, help="Exit after this many idle seconds")
+    parser.add_argument("--ready-fd", type=int, help="Write a byte here once accepting connections")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.listen_fd is not None:
+        if not args.root:
+            parser.error("--listen-fd requires --root")
+        host = ActivatedSiteHost(args.listen_fd, args.root, args.idle_timeout, args.ready_fd)
+    else:
+        host = StaticSiteHost(Path(args.routes), reuse_port=args.reuse_port)
+    asyncio.run(host.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import os
+import select
+import signal
+import subprocess
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..core.logger import logger
+
+TCP_LISTEN = "0A"
+
+
+def pid_running(pid: int) -> bool:
+    """Whether pid exists and is not a zombie awaiting a reaper"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The state field follows the parenthesised command name
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (FileNotFoundError, IndexError):
+        return False
+
+
+def process_start_time(pid: int) -> Optional[int]:
+    """When pid started, in clock ticks after boot; None if it is gone"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Field 22 counted from the pid, 20 after the parenthesised command name
+            return int(f.read().rsplit(")", 1)[1].split()[19])
+    except (FileNotFoundError, IndexError, ValueError):
+        return None
+
+
+class ProcessSupervisor:
+    """
+    Stops and reaps site server processes without shelling out.
+
+    Children are tracked by pid and signalled through their process group
+    (servers are started with setsid). Exit is awaited on pidfds with one
+    shared deadline, then survivors are escalated to SIGKILL. Processes we
+    did not start are located by reading /proc directly.
+    """
+
+    def __init__(self, term_timeout: float = 5.0, kill_timeout: float = 2.0):
+        self.term_timeout = term_timeout
+        self.kill_timeout = kill_timeout
+        self._children: Dict[int, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+
+    def track(self, process: subprocess.Popen):
+        with self._lock:
+            self._children[process.pid] = process
+
+    def is_running(self, pid: int) -> bool:
+        """Whether pid is alive (zombies count as dead)"""
+        with self._lock:
+            process = self._children.get(pid)
+        if process is not None:
+            return process.poll() is None
+        return pid_running(pid)
+
+    def find_listeners(self, ports: Iterable[int]) -> Dict[int, int]:
+        """Map each listening port in ports to the pid holding its socket"""
+        wanted = set(ports)
+        inodes: Dict[str, int] = {}
+        for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+            try:
+                with open(table) as f:
+                    next(f)
+                    for line in f:
+                        fields = line.split()
+                        if fields[3] != TCP_LISTEN:
+                            continue
+                        port = int(fields[1].rsplit(":", 1)[1], 16)
+                        if port in wanted:
+                            inodes[f"socket:[{fields[9]}]"] = port
+            except FileNotFoundError:
+                continue
+        if not inodes:
+            return {}
+
+        found: Dict[int, int] = {}
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
+                continue
+            try:
+                for fd in os.scandir(f"/proc/{entry.name}/fd"):
+                    port = inodes.get(os.readlink(fd.path))
+                    if port is not None and port not in found:
+                        found[port] = int(entry.name)
+            except (FileNotFoundError, PermissionError, ProcessLookupError):
+                continue
+            if len(found) == len(inodes):
+                break
+        return found
+
+    def find_listener(self, port: int) -> Optional[int]:
+        return self.find_listeners([port]).get(port)
+
+    def _signal(self, pid: int, sig: int):
+        """Signal the process group pid leads, or just pid otherwise"""
+        try:
+            if os.getpgid(pid) == pid:
+                os.killpg(pid, sig)
+            else:
+                os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self, pid: int):
+        with self._lock:
+            process = self._children.pop(pid, None)
+        if process is not None:
+            process.poll()
+            return
+        # Orphans re-parented to us (e.g. when the API runs as PID 1) need reaping too
+        try:
+            os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            pass
+
+    def _wait(self, pids: Set[int], timeout: float) -> Set[int]:
+        """Wait until pids exit or timeout passes; returns those still running"""
+        deadline = time.monotonic() + timeout
+        pidfds: Dict[int, int] = {}
+        poller = select.poll()
+        for pid in pids:
+            try:
+                fd = os.pidfd_open(pid)
+            except ProcessLookupError:
+                continue
+            except (AttributeError, OSError):
+                fd = None
+            if fd is not None:
+                pidfds[fd] = pid
+                poller.register(fd, select.POLLIN)
+        try:
+            remaining = {pid for pid in pids if self.is_running(pid)}
+            while remaining:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                # Without pidfd support fall back to short polling intervals
+                wait_ms = min(left, 0.05) * 1000 if len(pidfds) < len(remaining) else left * 1000
+                for fd, _ in poller.poll(wait_ms):
+                    poller.unregister(fd)
+                remaining = {pid for pid in remaining if self.is_running(pid)}
+            return remaining
+        finally:
+            for fd in pidfds:
+                os.close(fd)
+
+    def stop_many(self, pids: Iterable[int]) -> Dict[int, bool]:
+        """SIGTERM every pid, wait on all with one deadline, SIGKILL the rest and reap"""
+        targets = {pid for pid in pids if pid and pid != os.getpid()}
+        for pid in targets:
+            self._signal(pid, signal.SIGTERM)
+
+        survivors = self._wait(targets, self.term_timeout)
+        if survivors:
+            logger.warning(f"Escalating to SIGKILL for {sorted(survivors)}")
+            for pid in survivors:
+                self._signal(pid, signal.SIGKILL)
+            survivors = self._wait(survivors, self.kill_timeout)
+
+        for pid in targets - survivors:
+            self._reap(pid)
+        for pid in survivors:
+            logger.error(f"Process {pid} did not exit after SIGKILL")
+        return {pid: pid not in survivors for pid in targets}
+
+    def stop(self, pid: int) -> bool:
+        return self.stop_many([pid]).get(pid, True)
+
+    def reap_exited(self) -> List[int]:
+        """Collect tracked children that exited on their own"""
+        with self._lock:
+            exited = [pid for pid, p in self._children.items() if p.poll() is not None]
+            for pid in exited:
+                del self._children[pid]
+        return exited
@@ -0,0 +1,66 @@
+import asyncio
+import contextvars
+from typing import Optional
+
+from ..core.logger import logger
+from ..core.principal_cache import principal_cache
+from ..database import async_engine
+from .pg_listener import listen_forever
+
+# Channel notified by the users trigger (migration 0009_user_change_notify)
+CHANNEL = "user_changes"
+
+
+class UserChangeListener:
+    """
+    Drops the cached principals of users changed by any process.
+
+    The principal cache is per API worker; invalidate_user in the crud
+    functions only reaches the worker that made the change. On PostgreSQL
+    this LISTENs for the users trigger's NOTIFY on a dedicated connection, so
+    a change committed by another worker or by admin-manager.py evicts the
+    user here too. The cache only serves entries while this is connected
+    (PrincipalCache.shared) and is cleared on every reconnect, as
+    notifications sent meanwhile were lost.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._task: Optional[asyncio.Task] = None
+        return cls._instance
+
+    def start(self):
+        """Listen from the running event loop (idempotent; PostgreSQL only)"""
+        if async_engine.dialect.name != "postgresql":
+            return
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        self._task = loop.create_task(self._listen(), context=contextvars.Context())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _listen(self):
+        await listen_forever(
+            CHANNEL, self._on_notify, "user changes",
+            # Whatever changed before now may be cached stale
+            on_connect=lambda reconnected: principal_cache.set_shared(True),
+            on_disconnect=lambda: principal_cache.set_shared(False),
+        )
+
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            user_id = int(payload)
+        except ValueError:
+            logger.error(f"Invalid user change notification {payload!r}")
+            return
+        principal_cache.invalidate_user(user_id)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Fire a burst of redeploys at a running API and report queue behaviour.
+
+Every website owned by the given user is redeployed at once; the script then
+polls the deployment jobs until they finish and prints throughput plus queue
+wait / end-to-end latency percentiles taken from the job timestamps. Re-run
+with different DEPLOY_WORKERS settings on the server to tune the pool size.
+
+    python benchmarks/deploy_burst.py --api http://localhost:8000 \\
+        --email admin@example.com --password secret --rounds 3
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--rounds", type=int, default=1, help="Redeploys per website in the burst")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    token = session.post(
+        f"{args.api}/token", data={"username": args.email, "password": args.password}
+    ).json()["access_token"]
+    session.headers["Authorization"] = f"Bearer {token}"
+
+    websites = session.get(f"{args.api}/websites/", params={"limit": 1000}).json()
+    if not websites:
+        raise SystemExit("The user owns no websites to redeploy")
+    targets = [w["id"] for w in websites] * args.rounds
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(32) as pool:
+        responses = list(pool.map(
+            lambda website_id: session.post(f"{args.api}/websites/{website_id}/redeploy"), targets
+        ))
+    rejected = sum(1 for r in responses if r.status_code == 503)
+
+    # The redeploy response carries the website; the jobs are the newest ones per site
+    # (fewer than --rounds when requests joined a queued job)
+    job_ids = set()
+    for website_id in set(targets):
+        jobs = session.get(f"{args.api}/websites/{website_id}/deployments", params={"limit": args.rounds}).json()
+        job_ids.update(job["id"] for job in jobs)
+
+    finished = {}
+    while len(finished) < len(job_ids) and time.monotonic() - started < args.timeout:
+        for job_id in job_ids - set(finished):
+            job = session.get(f"{args.api}/deployments/{job_id}").json()
+            if job["status"] in ("succeeded", "failed", "superseded"):
+                finished[job_id] = job
+        time.sleep(0.5)
+    elapsed = time.monotonic() - started
+
+    parse = datetime.fromisoformat
+    waits = [(parse(j["started_at"]) - parse(j["created_at"])).total_seconds() for j in finished.values()]
+    totals = [(parse(j["finished_at"]) - parse(j["created_at"])).total_seconds() for j in finished.values()]
+    failed = sum(1 for j in finished.values() if j["status"] == "failed")
+
+    print(f"jobs: {len(job_ids)} finished: {len(finished)} failed: {failed} rejected (503): {rejected}")
+    print(f"throughput: {len(finished) / elapsed:.2f} deploys/s over {elapsed:.1f}s")
+    if finished:
+        for label, values in (("queue wait", waits), ("end-to-end", totals)):
+            print(
+                f"{label:<11} p50 {percentile(values, 0.5):7.2f}s  "
+                f"p95 {percentile(values, 0.95):7.2f}s  p99 {percentile(values, 0.99):7.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
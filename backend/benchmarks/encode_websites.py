@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of encoding a list of websites to a JSON response body.
+
+Builds --count Website objects with their owner (in memory, no database) and
+times the ways a route can turn them into bytes: jsonable_encoder + json.dumps
+(a JSONResponse built from dicts), a Python-mode dump rendered by orjson (what
+default_response_class=ORJSONResponse does) and Pydantic's dump_json, which
+FastAPI uses for routes with a response model and the default response class.
+Each is measured with the schema as it is and with the v1-style json_encoders
+it used to carry; the body is then gzipped at the middleware's level to show
+the size on the wire.
+
+    SECRET_KEY=x DATABASE_URL=sqlite:// python benchmarks/encode_websites.py --count 1000
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.website import Website  # noqa: E402
+from app.schemas.website import Website as WebsiteSchema  # noqa: E402
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+
+    class LegacyWebsiteSchema(WebsiteSchema):
+        """The schema with the json_encoders it had before"""
+
+        class Config:
+            from_attributes = True
+            json_encoders = {datetime: lambda v: v.isoformat()}
+
+
+def build(count: int, log_kb: int) -> list:
+    owner = User(id=1, email="owner@example.com", full_name="Owner", is_active=True, is_admin=False,
+                 created_at=datetime(2024, 1, 1))
+    log = ("Cloning into '/sites/bench'...\n" * (log_kb * 1024 // 31 + 1))[:log_kb * 1024]
+    started = datetime(2024, 1, 1)
+    return [
+        Website(
+            id=i + 1, name=f"site-{i}", git_repo="https://example.com/site.git",
+            port=settings.WEBSITE_MIN_PORT + i, status="running", user_id=1, owner=owner,
+            created_at=started + timedelta(minutes=i), updated_at=started + timedelta(minutes=i, seconds=5),
+            expires_at=started + timedelta(days=30), deployment_log=log,
+        )
+        for i in range(count)
+    ]
+
+
+def best_of(repeat: int, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--log-kb", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    websites = build(args.count, args.log_kb)
+    print(f"{args.count} websites, {args.log_kb} KiB deployment log each")
+    for label, schema in (("current schema", WebsiteSchema), ("json_encoders", LegacyWebsiteSchema)):
+        adapter = TypeAdapter(List[schema])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            models = adapter.validate_python(websites, from_attributes=True)
+        ways = {
+            "jsonable_encoder+json": lambda: json.dumps(jsonable_encoder(models)).encode(),
+            "pydantic dump_json": lambda: adapter.dump_json(models),
+        }
+        if orjson is not None:
+            ways["orjson"] = lambda: orjson.dumps(adapter.dump_python(models, mode="json"))
+        for way, fn in ways.items():
+            seconds, body = best_of(args.repeat, fn)
+            print(f"{label:<15} {way:<22} {seconds * 1000:8.2f}ms  {len(body) / 1024:8.1f} KiB")
+
+    adapter = TypeAdapter(List[WebsiteSchema])
+    body = adapter.dump_json(adapter.validate_python(websites, from_attributes=True))
+    seconds, compressed = best_of(args.repeat, lambda: gzip.compress(body, compresslevel=settings.GZIP_LEVEL))
+    print(f"gzip level {settings.GZIP_LEVEL}: {len(body) / 1024:.1f} KiB -> {len(compressed) / 1024:.1f} KiB "
+          f"in {seconds * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Measure payload size, load time and serialization time of a list page.
+
+Seeds --rows websites (each with a --log-kb deployment log) and as many
+reviews, then loads one page of each and serializes it the way FastAPI does
+(validate from attributes, dump to JSON) in three shapes: the full detail
+schemas with everything loaded (what the list endpoints returned before),
+the summary schemas with the list loader options (deferred deployment_log,
+website id and name only under reviews) and a sparse fieldset. Point
+DATABASE_URL at a scratch database; the seeded rows are removed at the end.
+
+    DATABASE_URL=sqlite:////tmp/payload.db python benchmarks/list_payload.py --rows 100
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pydantic import TypeAdapter  # noqa: E402
+from sqlalchemy import delete, insert, select  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import get_password_hash  # noqa: E402
+from app.crud.review import REVIEW_LIST_LOADS, REVIEW_LOADS  # noqa: E402
+from app.crud.website import LIST_LOADS  # noqa: E402
+from app.database import AsyncSessionLocal, Base, SessionLocal, engine  # noqa: E402
+from app.models.review import Review  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.website import Website  # noqa: E402
+from app.schemas.review import Review as ReviewSchema, ReviewSummary  # noqa: E402
+from app.schemas.website import Website as WebsiteSchema, WebsiteSummary  # noqa: E402
+
+BENCH_EMAIL = "payload-bench@example.com"
+
+
+def seed(rows: int, log_kb: int):
+    with SessionLocal() as db:
+        user = User(email=BENCH_EMAIL, full_name="Payload Bench", hashed_password=get_password_hash("bench"))
+        db.add(user)
+        db.flush()
+        log = ("Cloning into '/sites/bench'...\n" * (log_kb * 1024 // 31 + 1))[:log_kb * 1024]
+        first_port = settings.WEBSITE_MIN_PORT + settings.WEBSITE_PORT_RANGE_SIZE
+        db.execute(insert(Website), [
+            {
+                "name": f"payload-bench-{i}",
+                "git_repo": "https://example.com/bench.git",
+                "port": first_port + i,
+                "status": "running",
+                "user_id": user.id,
+                "deployment_log": log,
+            }
+            for i in range(rows)
+        ])
+        website_ids = db.scalars(select(Website.id).where(Website.user_id == user.id)).all()
+        db.execute(insert(Review), [
+            {"content": f"review {i}", "rating": i % 5 + 1, "user_id": user.id, "website_id": website_id}
+            for i, website_id in enumerate(website_ids)
+        ])
+        db.commit()
+        return user.id
+
+
+def remove_seed():
+    with SessionLocal() as db:
+        user = db.scalars(select(User).where(User.email == BENCH_EMAIL)).first()
+        if user:
+            db.execute(delete(Review).where(Review.user_id == user.id))
+            db.execute(delete(Website).where(Website.user_id == user.id))
+            db.delete(user)
+            db.commit()
+
+
+def median(values):
+    return sorted(values)[len(values) // 2]
+
+
+async def measure(model, loads, schema, user_id: int, rows: int, repeat: int, fields=None):
+    adapter = TypeAdapter(List[schema])
+    load_times, dump_times, size = [], [], 0
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            result = await db.execute(
+                select(model).options(*loads).where(model.user_id == user_id).order_by(model.id).limit(rows)
+            )
+            page = list(result.scalars().all())
+            load_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            body = adapter.dump_json(adapter.validate_python(page, from_attributes=True), include=fields)
+            dump_times.append(time.perf_counter() - started)
+            size = len(body)
+    return size, median(load_times), median(dump_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--log-kb", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    user_id = seed(args.rows, args.log_kb)
+    sparse = {"__all__": {"id", "name", "status"}}
+    cases = (
+        ("websites full", Website, (selectinload(Website.owner),), WebsiteSchema, None),
+        ("websites summary", Website, LIST_LOADS, WebsiteSummary, None),
+        ("websites id,name,status", Website, LIST_LOADS, WebsiteSummary, sparse),
+        ("reviews full", Review, REVIEW_LOADS, ReviewSchema, None),
+        ("reviews summary", Review, REVIEW_LIST_LOADS, ReviewSummary, None),
+    )
+    try:
+        print(f"rows per page: {args.rows} deployment log: {args.log_kb} KiB")
+        for name, model, loads, schema, fields in cases:
+            size, load, dump = asyncio.run(measure(model, loads, schema, user_id, args.rows, args.repeat, fields))
+            print(f"{name:<24} {size / 1024:9.1f} KiB  load {load * 1000:7.2f}ms  serialize {dump * 1000:7.2f}ms")
+    finally:
+        remove_seed()
+
+
+if __name__ == "__main__":
+    main()
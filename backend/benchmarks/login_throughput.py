@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Measure password-check throughput the way POST /token performs it.
+
+Runs a burst of concurrent bcrypt verifications on an event loop: inline on
+the loop thread (a blocking call in an async endpoint), on the default
+thread executor (how logins were checked before the hashing pool) and
+through PasswordHasher. It reports logins/second, logins per second per
+core and the worst event-loop stall seen meanwhile, which is the delay
+every other request on the API process would have suffered.
+
+    SECRET_KEY=x DATABASE_URL=sqlite:// python benchmarks/login_throughput.py \\
+        --logins 200 --concurrency 32
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import (  # noqa: E402
+    PasswordHasher, PasswordHasherBusy, get_password_hash, verify_and_update_password, verify_password_async
+)
+
+
+async def inline_verify(password: str, hashed: str):
+    return verify_and_update_password(password, hashed)
+
+
+async def thread_verify(password: str, hashed: str):
+    return await asyncio.to_thread(verify_and_update_password, password, hashed)
+
+
+async def burst(check, hashed: str, logins: int, concurrency: int):
+    stall = 0.0
+    done = asyncio.Event()
+
+    async def probe():
+        nonlocal stall
+        while not done.is_set():
+            started = time.monotonic()
+            await asyncio.sleep(0.01)
+            stall = max(stall, time.monotonic() - started - 0.01)
+
+    remaining, rejected = logins, 0
+
+    async def client():
+        nonlocal remaining, rejected
+        while remaining > 0:
+            remaining -= 1
+            try:
+                valid, _ = await check("bench-password", hashed)
+                assert valid
+            except PasswordHasherBusy:
+                rejected += 1
+
+    prober = asyncio.create_task(probe())
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+    done.set()
+    await prober
+    return elapsed, stall, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    hashed = get_password_hash("bench-password")
+    cores = os.cpu_count() or 1
+    print(f"bcrypt rounds: {settings.BCRYPT_ROUNDS} cores: {cores} hash workers: {settings.PASSWORD_HASH_WORKERS}")
+
+    # Start the pool processes outside the measurement
+    asyncio.run(verify_password_async("bench-password", hashed))
+    try:
+        for mode, check in (
+            ("inline", inline_verify), ("threads", thread_verify), ("pool", verify_password_async)
+        ):
+            elapsed, stall, rejected = asyncio.run(burst(check, hashed, args.logins, args.concurrency))
+            rate = (args.logins - rejected) / elapsed
+            print(
+                f"{mode:<8} {rate:7.1f} logins/s  {rate / cores:6.1f} logins/s/core  "
+                f"max loop stall {stall * 1000:7.1f}ms  rejected (503) {rejected}"
+            )
+    finally:
+        PasswordHasher().shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Measure time-to-all-sites-serving of the startup reconciliation.
+
+Seeds N websites marked running, each with a one-file release on disk, then
+runs reconcile_sites() the way API startup does and reports how long it took
+until every port accepted connections. Point DATABASE_URL and
+STATIC_SITES_DIR at scratch locations: the seeded rows are removed at the end
+but the servers of the last run are stopped only with --cleanup.
+
+    DATABASE_URL=sqlite:////tmp/reconcile.db STATIC_SITES_DIR=/tmp/reconcile \\
+        python benchmarks/startup_reconcile.py --sites 500
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import get_password_hash  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.website import Website, WebsiteStatus  # noqa: E402
+from app.services.deployment import WebsiteProcessManager  # noqa: E402
+from app.services.reconciler import reconcile_sites  # noqa: E402
+
+BENCH_EMAIL = "reconcile-bench@example.com"
+
+
+def seed(sites: int) -> list:
+    manager = WebsiteProcessManager()
+    with SessionLocal() as db:
+        user = User(email=BENCH_EMAIL, full_name="Reconcile Bench", hashed_password=get_password_hash("bench"))
+        db.add(user)
+        db.commit()
+        for i in range(sites):
+            name = f"bench{i}"
+            release = manager._get_site_path(user.full_name, name) / "releases" / "bench"
+            release.mkdir(parents=True, exist_ok=True)
+            (release / "index.html").write_text(f"<h1>{name}</h1>")
+            current = release.parent.parent / "current"
+            if not current.is_symlink():
+                os.symlink(os.path.join("releases", "bench"), current)
+            db.add(Website(
+                name=name,
+                git_repo="https://example.com/bench.git",
+                port=settings.WEBSITE_MIN_PORT + i,
+                status=WebsiteStatus.RUNNING,
+                user_id=user.id
+            ))
+        db.commit()
+        return [settings.WEBSITE_MIN_PORT + i for i in range(sites)]
+
+
+def remove_seed(ports: list, stop: bool):
+    if stop:
+        WebsiteProcessManager().stop_sites(ports)
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == BENCH_EMAIL).first()
+        if user:
+            db.query(Website).filter(Website.user_id == user.id).delete()
+            db.delete(user)
+            db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", type=int, default=500)
+    parser.add_argument("--cleanup", action="store_true", help="Stop the restored servers afterwards")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    ports = seed(args.sites)
+    try:
+        started = time.monotonic()
+        counts = reconcile_sites()
+        elapsed = time.monotonic() - started
+    finally:
+        remove_seed(ports, args.cleanup)
+
+    print(f"mode: {settings.STATIC_SERVER_MODE} concurrency: {settings.RECONCILE_CONCURRENCY}")
+    print(f"sites: {args.sites} " + " ".join(f"{key}: {value}" for key, value in counts.items()))
+    print(f"time to all serving: {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Compare memory and throughput of the two static serving modes.
+
+"process" starts one `python -m http.server` per site (the legacy layout),
+"multiplexed" routes every site through the asyncio static host. For each
+site count the script reports total RSS of the serving processes and the
+request rate of a fixed number of keep-alive GETs spread across all sites.
+
+    python benchmarks/static_server_density.py --sites 10,100,1000
+
+Run from the backend directory. 1000 sites in process mode needs roughly
+15-20 GB of RAM and a matching process limit.
+"""
+import argparse
+import http.client
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.static_server import StaticHostController  # noqa: E402
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def wait_for_ports(ports, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    pending = set(ports)
+    while pending and time.monotonic() < deadline:
+        for port in list(pending):
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+                conn.request("HEAD", "/")
+                conn.getresponse().read()
+                conn.close()
+                pending.discard(port)
+            except OSError:
+                pass
+        if pending:
+            time.sleep(0.1)
+    if pending:
+        raise RuntimeError(f"{len(pending)} sites never came up")
+
+
+def hammer(ports, requests, concurrency):
+    per_worker = max(1, requests // concurrency)
+
+    def worker(offset):
+        conns = {}
+        for i in range(per_worker):
+            port = ports[(offset + i) % len(ports)]
+            conn = conns.get(port)
+            if conn is None:
+                conn = conns[port] = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            conn.request("GET", "/index.html")
+            conn.getresponse().read()
+        for conn in conns.values():
+            conn.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return per_worker * concurrency / (time.perf_counter() - start)
+
+
+def start_process_mode(sites, base_port):
+    """Start one http.server per site; returns (pids, ports)"""
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-m", "http.server", str(base_port + i), "--directory", str(site)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        for i, site in enumerate(sites)
+    ]
+    return [p.pid for p in procs], [base_port + i for i in range(len(sites))]
+
+
+def start_multiplexed_mode(sites, base_port, state_dir, workers):
+    """Route every site through the static host; returns (pids, ports)"""
+    controller = StaticHostController(state_dir, workers=workers)
+    for i, site in enumerate(sites):
+        controller.add_route(base_port + i, site)
+    return controller.worker_pids(), [base_port + i for i in range(len(sites))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", default="10,100", help="Comma separated site counts")
+    parser.add_argument("--modes", default="process,multiplexed")
+    parser.add_argument("--base-port", type=int, default=21000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1, help="Static host workers in multiplexed mode")
+    args = parser.parse_args()
+
+    print(f"{'mode':<12} {'sites':>6} {'total RSS MB':>13} {'RSS/site KB':>12} {'req/s':>10}")
+    for count in (int(n) for n in args.sites.split(",")):
+        root = Path(tempfile.mkdtemp(prefix="static-bench-"))
+        sites = []
+        for i in range(count):
+            site = root / f"site{i}"
+            site.mkdir()
+            (site / "index.html").write_text(f"<h1>site {i}</h1>" + "x" * 2048)
+            sites.append(site)
+
+        for mode in args.modes.split(","):
+            if mode == "process":
+                pids, ports = start_process_mode(sites, args.base_port)
+            else:
+                pids, ports = start_multiplexed_mode(sites, args.base_port, root / mode, args.workers)
+            try:
+                wait_for_ports(ports)
+                total_kb = sum(rss_kb(pid) for pid in pids)
+                rate = hammer(ports, args.requests, args.concurrency)
+                print(f"{mode:<12} {count:>6} {total_kb / 1024:>13.1f} {total_kb / count:>12.0f} {rate:>10.0f}")
+            finally:
+                for pid in pids:
+                    os.kill(pid, signal.SIGTERM)
+                    try:
+                        os.waitpid(pid, 0)
+                    except ChildProcessError:
+                        pass
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
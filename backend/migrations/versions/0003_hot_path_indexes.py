@@ -0,0 +1,75 @@
+"""Indexes for the list, filter and expiry queries; websites.status as an enum
+
+Every dashboard list is a keyset walk over (created_at, id), optionally within
+one owner, status, website or author (app/crud/pagination.py and filters.py),
+and expiry checks range over websites.expires_at. Indexes that create_all may
+already have made are skipped.
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_deployments
+Create Date: 2026-10-17 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_hot_path_indexes"
+down_revision: Union[str, Sequence[str], None] = "0002_deployments"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WEBSITE_STATUSES = ("stopped", "running", "deploying", "error", "hibernated")
+website_status = sa.Enum(*WEBSITE_STATUSES, name="website_status")
+
+INDEXES = (
+    ("ix_users_created_at_id", "users", ["created_at", "id"]),
+    ("ix_websites_created_at_id", "websites", ["created_at", "id"]),
+    ("ix_websites_user_id_created_at_id", "websites", ["user_id", "created_at", "id"]),
+    ("ix_websites_status_created_at_id", "websites", ["status", "created_at", "id"]),
+    ("ix_websites_expires_at", "websites", ["expires_at"]),
+    ("ix_reviews_created_at_id", "reviews", ["created_at", "id"]),
+    ("ix_reviews_website_id_created_at_id", "reviews", ["website_id", "created_at", "id"]),
+    ("ix_reviews_user_id_created_at_id", "reviews", ["user_id", "created_at", "id"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        website_status.create(bind, checkfirst=True)
+        op.alter_column(
+            "websites", "status",
+            type_=website_status,
+            existing_nullable=False,
+            postgresql_using="lower(status)::website_status",
+        )
+    else:
+        with op.batch_alter_table("websites") as batch:
+            batch.alter_column("status", type_=website_status, existing_nullable=False)
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.alter_column(
+            "websites", "status",
+            type_=sa.String(length=50),
+            existing_nullable=False,
+            postgresql_using="status::text",
+        )
+        website_status.drop(bind, checkfirst=True)
+    else:
+        with op.batch_alter_table("websites") as batch:
+            batch.alter_column("status", type_=sa.String(length=50), existing_nullable=False)
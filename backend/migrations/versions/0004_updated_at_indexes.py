@@ -0,0 +1,39 @@
+"""Indexes on updated_at for the list versions behind conditional GETs
+
+The ETags of GET /websites/, GET /reviews/ and GET /reviews/public/all are
+derived from max(updated_at) of reviews, websites and users, which these
+indexes answer without reading the tables.
+
+Revision ID: 0004_updated_at_indexes
+Revises: 0003_hot_path_indexes
+Create Date: 2026-10-17 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_updated_at_indexes"
+down_revision: Union[str, Sequence[str], None] = "0003_hot_path_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("ix_reviews_updated_at", "reviews", ["updated_at"]),
+    ("ix_websites_updated_at", "websites", ["updated_at"]),
+    ("ix_users_updated_at", "users", ["updated_at"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
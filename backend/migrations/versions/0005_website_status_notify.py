@@ -0,0 +1,69 @@
+"""NOTIFY website_status when a website is created, changes status or is deleted
+
+The event streams of the API (app/services/events.py) LISTEN on this channel,
+so every writer is covered: the routes, the deployment workers, the
+reconciler's bulk updates and admin-manager.py. PostgreSQL only; other
+databases are polled by the API instead.
+
+Revision ID: 0005_website_status_notify
+Revises: 0004_updated_at_indexes
+Create Date: 2026-10-17 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_website_status_notify"
+down_revision: Union[str, Sequence[str], None] = "0004_updated_at_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION notify_website_status() RETURNS trigger AS $$
+DECLARE
+    site websites%ROWTYPE;
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.status IS NOT DISTINCT FROM OLD.status THEN
+        RETURN NULL;
+    ELSIF TG_OP = 'DELETE' THEN
+        site := OLD;
+    ELSE
+        site := NEW;
+    END IF;
+    PERFORM pg_notify('website_status', json_build_object(
+        'id', site.id,
+        'user_id', site.user_id,
+        'name', site.name,
+        'status', CASE WHEN TG_OP = 'DELETE' THEN 'deleted' ELSE site.status::text END
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+NOTIFY_TRIGGER = """
+CREATE TRIGGER websites_status_notify
+AFTER INSERT OR DELETE OR UPDATE OF status ON websites
+FOR EACH ROW
+EXECUTE FUNCTION notify_website_status()
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(NOTIFY_FUNCTION)
+    op.execute("DROP TRIGGER IF EXISTS websites_status_notify ON websites")
+    op.execute(NOTIFY_TRIGGER)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP TRIGGER IF EXISTS websites_status_notify ON websites")
+    op.execute("DROP FUNCTION IF EXISTS notify_website_status()")
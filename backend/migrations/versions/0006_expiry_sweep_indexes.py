@@ -0,0 +1,38 @@
+"""Indexes for the expiry sweep
+
+The sweep (app/services/expiry.py) walks the serving websites of one status in
+(expires_at, id) order and the users whose plan expired in (plan_expires_at,
+id) order, a batch at a time.
+
+Revision ID: 0006_expiry_sweep_indexes
+Revises: 0005_website_status_notify
+Create Date: 2026-10-17 14:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_expiry_sweep_indexes"
+down_revision: Union[str, Sequence[str], None] = "0005_website_status_notify"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("ix_websites_status_expires_at_id", "websites", ["status", "expires_at", "id"]),
+    ("ix_users_plan_expires_at_id", "users", ["plan_expires_at", "id"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
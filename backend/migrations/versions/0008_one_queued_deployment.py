@@ -0,0 +1,46 @@
+"""At most one queued deployment per website
+
+Deploy requests for a website that already has a job waiting join that job
+instead of queueing another. Duplicates queued before this revision are
+marked superseded, keeping the newest of each website.
+
+Revision ID: 0008_one_queued_deployment
+Revises: 0007_site_processes
+Create Date: 2026-10-17 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_one_queued_deployment"
+down_revision: Union[str, Sequence[str], None] = "0007_site_processes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+QUEUED = sa.text("status = 'queued'")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "UPDATE deployments SET status = 'superseded', finished_at = CURRENT_TIMESTAMP "
+        "WHERE status = 'queued' AND id NOT IN "
+        "(SELECT max(id) FROM deployments WHERE status = 'queued' GROUP BY website_id)"
+    )
+    op.create_index(
+        "uq_deployments_website_id_queued",
+        "deployments",
+        ["website_id"],
+        unique=True,
+        postgresql_where=QUEUED,
+        sqlite_where=QUEUED,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_deployments_website_id_queued", table_name="deployments")
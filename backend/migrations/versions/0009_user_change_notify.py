@@ -0,0 +1,55 @@
+"""NOTIFY user_changes when a user is updated or deleted
+
+Every API worker LISTENs on this channel and drops the user's cached
+principals (app/services/user_changes.py), so a demotion, deactivation or
+deletion applies to all workers at once, whoever made it: an API worker or
+admin-manager.py. PostgreSQL only.
+
+Revision ID: 0009_user_change_notify
+Revises: 0008_one_queued_deployment
+Create Date: 2026-10-17 20:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_user_change_notify"
+down_revision: Union[str, Sequence[str], None] = "0008_one_queued_deployment"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NOTIFY_FUNCTION = """
+CREATE OR REPLACE FUNCTION notify_user_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('user_changes', OLD.id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+NOTIFY_TRIGGER = """
+CREATE TRIGGER users_change_notify
+AFTER UPDATE OR DELETE ON users
+FOR EACH ROW
+EXECUTE FUNCTION notify_user_change()
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(NOTIFY_FUNCTION)
+    op.execute("DROP TRIGGER IF EXISTS users_change_notify ON users")
+    op.execute(NOTIFY_TRIGGER)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP TRIGGER IF EXISTS users_change_notify ON users")
+    op.execute("DROP FUNCTION IF EXISTS notify_user_change()")
@@ -0,0 +1,90 @@
+"""
+Shared fixtures: a scratch SQLite database migrated with Alembic, emptied
+after every test, and the API without its lifespan (no deployment workers,
+site runner or sweeper), so tests drive those pieces themselves.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+SCRATCH = Path(tempfile.mkdtemp(prefix="deployment-manager-tests-"))
+# Set before app is imported: settings and engines are created at import time
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{SCRATCH / 'test.db'}",
+    "SECRET_KEY": "test-secret",
+    "STATIC_SITES_DIR": str(SCRATCH / "sites"),
+    "WEBSITE_MIN_PORT": "18000",
+    "EXPIRY_SWEEP_INTERVAL": "0",
+    "QUERY_BUDGET_MODE": "off",
+    "WEB_CONCURRENCY": "1",
+    "EVENTS_POLL_INTERVAL": "0.1",
+})
+
+import asyncio  # noqa: E402
+
+import pytest  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.principal_cache import principal_cache  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.models.website import Website, WebsiteStatus  # noqa: E402
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    command.upgrade(Config(str(BACKEND / "alembic.ini")), "head")
+
+
+@pytest.fixture(autouse=True)
+def clean_database(schema):
+    yield
+    # Pooled aiosqlite connections belong to the event loop of the test that opened them
+    asyncio.run(async_engine.dispose())
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    principal_cache.clear()
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_user():
+    def make(email: str = "owner@example.com", is_admin: bool = False) -> User:
+        with SessionLocal() as db:
+            user = User(email=email, full_name=email.split("@")[0], hashed_password="!", is_admin=is_admin)
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+            return user
+    return make
+
+
+@pytest.fixture
+def make_website():
+    def make(user: User, name: str = "site", status: WebsiteStatus = WebsiteStatus.RUNNING) -> Website:
+        with SessionLocal() as db:
+            port = 18000 + db.query(Website).count()
+            website = Website(name=name, git_repo="https://example.com/site.git", port=port, status=status, user_id=user.id)
+            db.add(website)
+            db.commit()
+            db.refresh(website)
+            return website
+    return make
+
+
+@pytest.fixture
+def auth_headers():
+    def headers(user: User) -> dict:
+        return {"Authorization": f"Bearer {create_access_token(data={'sub': user.email})}"}
+    return headers
@@ -0,0 +1,85 @@
+import fastapi.routing
+import pytest
+from sqlalchemy import event
+
+from app.api.routes import reviews, websites
+from app.database import SessionLocal, async_engine
+from app.models.review import Review
+
+# (path, module of the route, its list query)
+LISTS = [
+    ("/websites/", websites, "get_websites_by_user"),
+    ("/reviews/", reviews, "get_reviews_by_user"),
+    ("/reviews/public/all", reviews, "get_all_reviews"),
+]
+
+
+@pytest.fixture
+def owner(make_user, make_website):
+    user = make_user()
+    website = make_website(user)
+    with SessionLocal() as db:
+        db.add(Review(content="Nice", rating=5, user_id=user.id, website_id=website.id))
+        db.commit()
+    return user
+
+
+@pytest.fixture
+def statements():
+    """SQL statements the API runs from here on"""
+    seen = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    yield seen
+    event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("a 304 must not run the list query or serialize the body")
+
+
+@pytest.mark.parametrize("path, module, list_query", LISTS)
+def test_matching_etag_answers_304_after_only_the_version_query(
+    client, owner, auth_headers, statements, monkeypatch, path, module, list_query
+):
+    headers = auth_headers(owner)
+    first = client.get(path, headers=headers)
+    assert first.status_code == 200, first.text
+    assert first.json()
+
+    monkeypatch.setattr(module, list_query, _fail)
+    monkeypatch.setattr(module, "project", _fail)
+    monkeypatch.setattr(fastapi.routing, "serialize_response", _fail)
+    statements.clear()
+    second = client.get(path, headers={**headers, "If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["ETag"] == first.headers["ETag"]
+    # The principal is cached by the first request: the collection version is all that runs
+    assert len(statements) == 1, statements
+
+
+@pytest.mark.parametrize("path, module, list_query", LISTS)
+def test_a_change_to_the_list_answers_200_again(client, owner, auth_headers, path, module, list_query):
+    headers = auth_headers(owner)
+    etag = client.get(path, headers=headers).headers["ETag"]
+    with SessionLocal() as db:
+        db.query(Review).update({"content": "Changed"})
+        db.query(websites.DBWebsite).update({"name": "renamed"})
+        db.commit()
+
+    response = client.get(path, headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_browsers_may_read_the_etag(client, owner, auth_headers):
+    response = client.get("/websites/", headers={**auth_headers(owner), "Origin": "http://localhost:3000"})
+
+    exposed = {h.strip().lower() for h in response.headers["Access-Control-Expose-Headers"].split(",")}
+    assert "etag" in exposed
@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.deployment import Deployment, DeploymentStatus
+from app.models.website import Website, WebsiteStatus
+from app.services import deploy_queue
+from app.services.deploy_queue import DeploymentQueue
+
+
+def _jobs(website_id: int) -> list:
+    with SessionLocal() as db:
+        return [
+            job.status for job in
+            db.query(Deployment).filter(Deployment.website_id == website_id).order_by(Deployment.id)
+        ]
+
+
+def test_redeploy_losing_the_race_to_a_claim_queues_again(client, make_user, make_website, auth_headers, monkeypatch):
+    owner = make_user()
+    website = make_website(owner, status=WebsiteStatus.RUNNING)
+    with SessionLocal() as db:
+        db.add(Deployment(website_id=website.id, status=DeploymentStatus.QUEUED))
+        db.commit()
+
+    real_get_queued_deployment = deploy_queue.get_queued_deployment
+    calls = []
+
+    async def racing_get_queued_deployment(db, website_id):
+        calls.append(website_id)
+        if len(calls) == 1:
+            # Looked before the other request's job was committed: the insert then conflicts
+            return None
+        # ...and a worker claimed that job before the retry looked again
+        assert DeploymentQueue()._claim() is not None
+        return await real_get_queued_deployment(db, website_id)
+
+    monkeypatch.setattr(deploy_queue, "get_queued_deployment", racing_get_queued_deployment)
+    response = client.post(f"/websites/{website.id}/redeploy", headers=auth_headers(owner))
+
+    assert response.status_code == 200, response.text
+    assert len(calls) == 2
+    assert _jobs(website.id) == [DeploymentStatus.RUNNING, DeploymentStatus.QUEUED]
+    # A serving site keeps serving (and its status) while the new job waits
+    assert response.json()["status"] == WebsiteStatus.RUNNING
+
+
+def test_redeploy_of_a_stopped_site_marks_it_deploying(client, make_user, make_website, auth_headers):
+    owner = make_user()
+    website = make_website(owner, status=WebsiteStatus.STOPPED)
+
+    response = client.post(f"/websites/{website.id}/redeploy", headers=auth_headers(owner))
+
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == WebsiteStatus.DEPLOYING
+    with SessionLocal() as db:
+        assert db.get(Website, website.id).status == WebsiteStatus.DEPLOYING
+    assert _jobs(website.id) == [DeploymentStatus.QUEUED]
+
+
+def test_concurrent_redeploys_join_one_queued_job(make_user, make_website, auth_headers):
+    owner = make_user()
+    website = make_website(owner, status=WebsiteStatus.RUNNING)
+
+    async def redeploy_all(requests: int) -> list:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=auth_headers(owner)) as http:
+            responses = await asyncio.gather(
+                *(http.post(f"/websites/{website.id}/redeploy") for _ in range(requests))
+            )
+        return [response.status_code for response in responses]
+
+    codes = asyncio.run(redeploy_all(50))
+
+    assert codes == [200] * 50
+    assert _jobs(website.id) == [DeploymentStatus.QUEUED]
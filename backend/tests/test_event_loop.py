@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.main import app
+from app.services.deployment import WebsiteProcessManager
+
+# Time the blocking call takes, and the most a list request may take meanwhile
+BLOCKING_SECONDS = 2.0
+MAX_LATENCY = 0.5
+
+
+def _slow(*args, **kwargs):
+    # As a git checkout or a server stop would: blocks the calling thread
+    time.sleep(BLOCKING_SECONDS)
+    return "release"
+
+
+@pytest.mark.parametrize("method, action, slow_call", [
+    ("POST", "rollback", "rollback_site"),
+    ("DELETE", "", "delete_site"),
+])
+def test_lists_stay_responsive_while_a_route_blocks_in_a_thread(
+    make_user, make_website, auth_headers, monkeypatch, method, action, slow_call
+):
+    owner = make_user()
+    website = make_website(owner)
+    headers = auth_headers(owner)
+    monkeypatch.setattr(WebsiteProcessManager, slow_call, _slow)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as http:
+            slow = asyncio.create_task(http.request(method, f"/websites/{website.id}/{action}".rstrip("/")))
+            await asyncio.sleep(0.2)  # let it reach the blocking call
+
+            async def timed_list():
+                started = time.monotonic()
+                response = await http.get("/websites/")
+                assert response.status_code == 200
+                return time.monotonic() - started
+
+            latencies = await asyncio.gather(*(timed_list() for _ in range(20)))
+            pending = not slow.done()
+            assert (await slow).status_code == 200
+            return latencies, pending
+
+    latencies, pending = asyncio.run(run())
+
+    assert pending, "the blocking call ended before the list requests were answered"
+    assert max(latencies) < MAX_LATENCY, latencies
@@ -0,0 +1,45 @@
+import asyncio
+from contextlib import AsyncExitStack
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.website import Website, WebsiteStatus
+from app.services.events import EventBroker
+
+SUBSCRIBERS = 500
+MAX_LATENCY = 2.0
+
+
+def test_a_status_change_reaches_every_subscriber(make_user, make_website):
+    owner, other = make_user("owner@example.com"), make_user("other@example.com")
+    website = make_website(owner, status=WebsiteStatus.RUNNING)
+
+    async def run():
+        broker = EventBroker()
+        async with AsyncExitStack() as stack:
+            # Half follow the owner's websites, half every website (admins)
+            subscriptions = [
+                await stack.enter_async_context(broker.subscribe(owner.id if i % 2 else None))
+                for i in range(SUBSCRIBERS)
+            ]
+            bystander = await stack.enter_async_context(broker.subscribe(other.id))
+            # Let the listener take in the current statuses first
+            await asyncio.sleep(3 * settings.EVENTS_POLL_INTERVAL)
+
+            with SessionLocal() as db:
+                db.get(Website, website.id).status = WebsiteStatus.STOPPED
+                db.commit()
+            events = await asyncio.wait_for(
+                asyncio.gather(*(subscription.queue.get() for subscription in subscriptions)),
+                MAX_LATENCY
+            )
+            await asyncio.sleep(3 * settings.EVENTS_POLL_INTERVAL)
+            missed_by_bystander = bystander.queue.empty()
+        await broker.stop()
+        return events, missed_by_bystander
+
+    events, missed_by_bystander = asyncio.run(run())
+
+    assert len(events) == SUBSCRIBERS
+    assert {(event.id, event.status) for event in events} == {(website.id, WebsiteStatus.STOPPED)}
+    assert missed_by_bystander
@@ -0,0 +1,45 @@
+import subprocess
+from pathlib import Path
+
+from app.services.git_cache import GitMirrorCache
+
+
+def _repo(path: Path, content: str) -> str:
+    path.mkdir(parents=True)
+    subprocess.run(["git", "init", "--quiet", str(path)], check=True)
+    (path / "index.html").write_text(content)
+    subprocess.run(["git", "-C", str(path), "add", "-A"], check=True)
+    subprocess.run(
+        ["git", "-C", str(path), "-c", "user.name=test", "-c", "user.email=test@example.com",
+         "commit", "--quiet", "-m", "test"],
+        check=True
+    )
+    return str(path)
+
+
+def test_eviction_skips_a_mirror_another_job_has_not_materialized(tmp_path):
+    first, second = _repo(tmp_path / "first", "first"), _repo(tmp_path / "second", "second")
+    # Any mirror is over budget: each fetch evicts every other one it can
+    cache = GitMirrorCache(tmp_path / "cache", max_bytes=1)
+
+    with cache.checkout(first) as checkout:
+        with cache.checkout(second):
+            pass
+        checkout.materialize(tmp_path / "release")
+
+    assert (tmp_path / "release" / "index.html").read_text() == "first"
+
+
+def test_released_mirrors_are_evicted_least_recently_used_first(tmp_path):
+    first, second = _repo(tmp_path / "first", "first"), _repo(tmp_path / "second", "second")
+    cache = GitMirrorCache(tmp_path / "cache", max_bytes=1)
+
+    with cache.checkout(first):
+        pass
+    assert cache.mirror_path(first).with_suffix(".size").read_text().isdigit()
+    with cache.checkout(second):
+        pass
+
+    assert not cache.mirror_path(first).exists()
+    assert not cache.mirror_path(first).with_suffix(".size").exists()
+    assert (cache.mirror_path(second) / "HEAD").exists()
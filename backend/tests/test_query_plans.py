@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from app.database import engine
+from app.models.website import Website
+
+# The statements and plan checks are shared with the EXPLAIN benchmark
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+from explain_queries import explain, hot_queries  # noqa: E402
+
+HOT_QUERIES = hot_queries()
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_is_answered_from_an_index(name):
+    with engine.connect() as conn:
+        plan, problems = explain(conn, HOT_QUERIES[name])
+
+    assert not problems, plan
+
+
+def test_a_query_without_an_index_is_reported():
+    with engine.connect() as conn:
+        plan, problems = explain(conn, select(Website).where(Website.git_repo == "https://example.com/site.git"))
+
+    assert problems, plan
@@ -16,6 +16,8 @@ export default function StatusBadge({ status }: StatusBadgeProps) {
         return 'bg-yellow-500 hover:bg-yellow-600';
       case WebsiteStatus.ERROR:
         return 'bg-red-500 hover:bg-red-600';
+      case WebsiteStatus.HIBERNATED:
+        return 'bg-blue-500 hover:bg-blue-600';
       default:
         return 'bg-gray-500 hover:bg-gray-600';
     }
@@ -128,7 +128,7 @@ export default function WebsiteCard({ website, className, isAdminView = false }:
           )}
         </div>
         
-        {website.status === WebsiteStatus.RUNNING && (
+        {(website.status === WebsiteStatus.RUNNING || website.status === WebsiteStatus.HIBERNATED) && (
           <Button variant="outline" size="sm" asChild className="border-cosmic-highlight text-cosmic-highlight hover:bg-cosmic-highlight/10">
             <Link href={getWebsiteUrl()} target="_blank" rel="noopener noreferrer">
               <ExternalLink className="mr-2 h-4 w-4" /> 
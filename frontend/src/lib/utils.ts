@@ -31,6 +31,8 @@ export function getStatusColor(status: string): string {
       return 'text-yellow-500';
     case 'error':
       return 'text-red-500';
+    case 'hibernated':
+      return 'text-blue-500';
     default:
       return 'text-gray-500';
   }
@@ -5,7 +5,8 @@ export enum WebsiteStatus {
   RUNNING = "running",
   STOPPED = "stopped",
   DEPLOYING = "deploying",
-  ERROR = "error"
+  ERROR = "error",
+  HIBERNATED = "hibernated"
 }
 
 export interface Website {